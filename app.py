@@ -14,6 +14,7 @@ from pathlib import Path
 from data_loader import (
     check_data_availability,
     load_main_data,
+    start_startup_loading,
     show_data_setup_instructions
 )
 
@@ -22,6 +23,7 @@ from utils.data_processor import (
     process_complete_data_structure_authoritative,
     process_veredas_dataframe_simple,
 )
+from utils.epi_dataset import EpiDataset
 
 # Configurar logging
 logging.basicConfig(
@@ -186,13 +188,8 @@ def handle_gray_area_click(municipio=None, vereda=None, data_original=None):
     """Maneja clics en áreas grises."""
     logger.info(f"🎯 Manejando clic en área gris: {municipio}, {vereda}")
 
-    if data_original and "handle_empty_area" in data_original:
-        return data_original["handle_empty_area"](
-            municipio=municipio,
-            vereda=vereda,
-            casos_df=data_original.get("casos", pd.DataFrame()),
-            epizootias_df=data_original.get("epizootias", pd.DataFrame()),
-        )
+    if isinstance(data_original, EpiDataset):
+        return data_original.handle_empty_area(municipio=municipio, vereda=vereda)
     else:
         return {
             "casos": pd.DataFrame(),
@@ -283,6 +280,10 @@ def main():
     # 1. CONFIGURAR PÁGINA PRIMERO
     configure_page()
 
+    # Casos, mapas, cobertura y logo se cargan en paralelo desde aquí;
+    # las llamadas de cada vista se unen a la carga en curso
+    start_startup_loading()
+
     # 2. Sidebar
     try:
         from components.sidebar import create_sidebar
@@ -327,8 +328,11 @@ def main():
             data_original=data,
         )
 
-        # Integrar información del área sin datos
+        # Integrar información del área sin datos. Las filas ya no son las del
+        # filtro: sin cube_filters ni metrics las vistas calculan sobre las filas
         data_filtered.update(data_filtered_with_zeros)
+        data_filtered.pop("cube_filters", None)
+        data_filtered.pop("metrics", None)
 
     # 6. Verificar filtrado
     casos_reduction = len(data["casos"]) - len(data_filtered["casos"])
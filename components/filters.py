@@ -5,9 +5,21 @@ Los nombres ya coinciden exactamente entre shapefiles y bases de datos
 
 import streamlit as st
 import pandas as pd
+import copy
 import logging
 from datetime import datetime, timedelta
 
+from config.settings import FILTROS_CONFIG
+from utils.data_processor import (
+    calculate_basic_metrics,
+    calculate_basic_metrics_from_cube,
+    get_regiones_from_dataframe_simple,
+)
+from utils.filter_engine import explain_filters, filter_positions, take_positions
+from utils.date_index import DATE_COLUMNS
+from utils.filter_cache import filter_cache_key, get_filter_cache
+from utils.epi_cube import PAIR_FILTER
+
 logger = logging.getLogger(__name__)
 
 # ===== FUNCIONES DE COMPARACIÓN SIMPLIFICADAS =====
@@ -119,14 +131,7 @@ def extract_regiones_from_veredas_data_simple(data):
 
         if "region" in veredas_df.columns and "municipi_1" in veredas_df.columns:
             logger.info("🗂️ Cargando regiones desde hoja VEREDAS SIMPLIFICADO")
-
-            for region in veredas_df["region"].dropna().unique():
-                municipios_region = (
-                    veredas_df[veredas_df["region"] == region]["municipi_1"]
-                    .dropna()
-                    .unique()
-                )
-                regiones[region] = sorted(list(set(municipios_region)))
+            regiones = get_regiones_from_dataframe_simple(veredas_df)
 
             logger.info(f"✅ Regiones cargadas SIMPLIFICADO: {list(regiones.keys())}")
             return regiones
@@ -534,160 +539,127 @@ def create_map_mode_selector(colors):
 def apply_all_filters_multiple(
     data, filters_location, filters_temporal, filters_advanced
 ):
-    """Aplica filtros SIMPLIFICADO - CON DEBUG para casos perdidos."""
-    casos_filtrados = data["casos"].copy()
-    epizootias_filtradas = data["epizootias"].copy()
-
-    initial_casos = len(casos_filtrados)
-    initial_epizootias = len(epizootias_filtradas)
+    """
+    Aplica todos los filtros con máscaras booleanas sobre las tablas base
+    (utils.filter_engine): un solo subconjunto por tabla, sin copias intermedias.
+    Las posiciones filtradas y sus métricas se comparten entre sesiones
+    (utils.filter_cache).
+    """
+    cube_filters = build_cube_filters(
+        filters_location,
+        filters_temporal,
+        filters_advanced,
+        data.get("veredas_por_municipio"),
+    )
+    frames = {"casos": data["casos"], "epizootias": data["epizootias"]}
 
-    # ===== DEBUG: LOGGING INICIAL =====
-    logger.info(f"🔄 INICIO FILTRADO: {initial_casos} casos, {initial_epizootias} epizootias")
+    entry = get_filter_cache().get_or_compute(
+        filter_cache_key(data, cube_filters),
+        lambda: compute_filter_entry(data, frames, cube_filters),
+    )
+    filtered = take_positions(frames, entry["positions"])
 
-    # Filtros de ubicación según modo (sin cambios)
-    if filters_location.get("modo") == "multiple":
-        # ... código de filtrado múltiple ...
-        pass
-    else:
-        # Filtrado único
-        if filters_location["municipio_display"] != "Todos":
-            municipio_target = filters_location["municipio_display"]
+    logger.debug(
+        f"✅ FILTRADO FINAL - Casos: {len(data['casos'])}→{len(filtered['casos'])}, "
+        f"Epizootias: {len(data['epizootias'])}→{len(filtered['epizootias'])}"
+    )
 
-            if "municipio" in casos_filtrados.columns:
-                antes_municipio = len(casos_filtrados)
-                casos_filtrados = casos_filtrados[
-                    casos_filtrados["municipio"] == municipio_target
-                ]
-                despues_municipio = len(casos_filtrados)
-                if antes_municipio != despues_municipio:
-                    logger.info(f"📍 Filtro municipio: {antes_municipio}→{despues_municipio} casos")
+    return {
+        "casos": filtered["casos"],
+        "epizootias": filtered["epizootias"],
+        **{k: v for k, v in data.items() if k not in ["casos", "epizootias"]},
+        "cube_filters": cube_filters,
+        # Copia propia: la entrada del caché es compartida por todas las sesiones
+        "metrics": copy.deepcopy(entry["metrics"]),
+        "filter_trace": (
+            explain_filters(frames, cube_filters, data.get("date_index"))
+            if is_filter_explain_enabled()
+            else None
+        ),
+    }
 
-            if "municipio" in epizootias_filtradas.columns:
-                epizootias_filtradas = epizootias_filtradas[
-                    epizootias_filtradas["municipio"] == municipio_target
-                ]
 
-        if filters_location["vereda_display"] != "Todas":
-            vereda_target = filters_location["vereda_display"]
+def is_filter_explain_enabled():
+    """
+    Modo explicación: DASHBOARD_FILTER_EXPLAIN para todos o ?explain=1 en la URL.
+    El parámetro se lee en cada rerun, así que quitarlo (o ?explain=0) lo apaga.
+    """
+    if FILTROS_CONFIG.get("explain"):
+        return True
+    try:
+        return st.query_params.get("explain") in ("1", "true")
+    except Exception:
+        return False
 
-            if "vereda" in casos_filtrados.columns:
-                antes_vereda = len(casos_filtrados)
-                casos_filtrados = casos_filtrados[
-                    casos_filtrados["vereda"] == vereda_target
-                ]
-                despues_vereda = len(casos_filtrados)
-                if antes_vereda != despues_vereda:
-                    logger.info(f"🏘️ Filtro vereda: {antes_vereda}→{despues_vereda} casos")
 
-            if "vereda" in epizootias_filtradas.columns:
-                epizootias_filtradas = epizootias_filtradas[
-                    epizootias_filtradas["vereda"] == vereda_target
-                ]
+def compute_filter_entry(data, frames, cube_filters):
+    """Posiciones filtradas y métricas de un estado de filtros (cache miss)."""
+    logger.debug(
+        f"🔄 INICIO FILTRADO: {len(data['casos'])} casos, {len(data['epizootias'])} epizootias"
+    )
+    positions = filter_positions(frames, cube_filters, data.get("date_index"))
+    for array in positions.values():
+        # Compartidas entre sesiones a través del caché: solo lectura
+        array.setflags(write=False)
+
+    cube = data.get("epi_cube")
+    if cube is not None:
+        metrics = calculate_basic_metrics_from_cube(cube, cube_filters)
+    else:
+        filtered = take_positions(frames, positions)
+        metrics = calculate_basic_metrics(filtered["casos"], filtered["epizootias"])
 
-    # ===== FILTROS TEMPORALES CON DEBUG =====
-    if filters_temporal["fecha_rango"] and len(filters_temporal["fecha_rango"]) == 2:
-        fecha_inicio = pd.Timestamp(filters_temporal["fecha_rango"][0])
-        fecha_fin = pd.Timestamp(filters_temporal["fecha_rango"][1]) + pd.Timedelta(
-            hours=23, minutes=59
-        )
+    return {"positions": positions, "metrics": metrics}
 
-        logger.info(f"📅 Aplicando filtro temporal: {fecha_inicio.date()} a {fecha_fin.date()}")
 
-        # FILTRO TEMPORAL PARA CASOS CON DEBUG
-        if "fecha_inicio_sintomas" in casos_filtrados.columns:
-            antes_temporal_casos = len(casos_filtrados)
-            
-            # ✅ DEBUG: Verificar casos con fechas problemáticas
-            casos_sin_fecha = casos_filtrados["fecha_inicio_sintomas"].isna().sum()
-            if casos_sin_fecha > 0:
-                logger.warning(f"⚠️ {casos_sin_fecha} casos SIN fecha_inicio_sintomas")
-            
-            # ✅ DEBUG: Verificar casos fuera del rango
-            casos_antes_rango = (casos_filtrados["fecha_inicio_sintomas"] < fecha_inicio).sum()
-            casos_despues_rango = (casos_filtrados["fecha_inicio_sintomas"] > fecha_fin).sum()
-            
-            if casos_antes_rango > 0:
-                logger.warning(f"📅 {casos_antes_rango} casos ANTES del rango temporal")
-            if casos_despues_rango > 0:
-                logger.warning(f"📅 {casos_despues_rango} casos DESPUÉS del rango temporal")
-            
-            # Aplicar filtro temporal
-            casos_filtrados = casos_filtrados[
-                (casos_filtrados["fecha_inicio_sintomas"] >= fecha_inicio)
-                & (casos_filtrados["fecha_inicio_sintomas"] <= fecha_fin)
-            ]
-            
-            despues_temporal_casos = len(casos_filtrados)
-            casos_perdidos = antes_temporal_casos - despues_temporal_casos
-            
-            if casos_perdidos > 0:
-                logger.warning(f"🚨 FILTRO TEMPORAL eliminó {casos_perdidos} casos: {antes_temporal_casos}→{despues_temporal_casos}")
-                
-                # ✅ DEBUG: Mostrar fechas extremas de los casos restantes
-                if not casos_filtrados.empty:
-                    fecha_min_restante = casos_filtrados["fecha_inicio_sintomas"].min()
-                    fecha_max_restante = casos_filtrados["fecha_inicio_sintomas"].max()
-                    logger.info(f"📊 Casos restantes: fechas de {fecha_min_restante.date()} a {fecha_max_restante.date()}")
-
-        # FILTRO TEMPORAL PARA EPIZOOTIAS (sin cambios)
-        if "fecha_notificacion" in epizootias_filtradas.columns:
-            antes_temporal_epi = len(epizootias_filtradas)
-            
-            epizootias_filtradas = epizootias_filtradas[
-                (epizootias_filtradas["fecha_notificacion"] >= fecha_inicio)
-                & (epizootias_filtradas["fecha_notificacion"] <= fecha_fin)
-            ]
-            
-            despues_temporal_epi = len(epizootias_filtradas)
-            if antes_temporal_epi != despues_temporal_epi:
-                logger.info(f"📅 Filtro temporal epizootias: {antes_temporal_epi}→{despues_temporal_epi}")
+def build_cube_filters(
+    filters_location, filters_temporal, filters_advanced, veredas_por_municipio=None
+):
+    """
+    Traduce los filtros activos al dict plano que evalúan el motor de
+    máscaras (utils.filter_engine) y el cubo (utils.epi_cube).
 
-    # ===== FILTROS AVANZADOS CON DEBUG =====
-    if (
-        filters_advanced["condicion_final"] != "Todas"
-        and "condicion_final" in casos_filtrados.columns
-    ):
-        antes_condicion = len(casos_filtrados)
-        casos_filtrados = casos_filtrados[
-            casos_filtrados["condicion_final"] == filters_advanced["condicion_final"]
-        ]
-        despues_condicion = len(casos_filtrados)
-        if antes_condicion != despues_condicion:
-            logger.info(f"⚰️ Filtro condición: {antes_condicion}→{despues_condicion} casos")
-
-    if filters_advanced["sexo"] != "Todos" and "sexo" in casos_filtrados.columns:
-        antes_sexo = len(casos_filtrados)
-        casos_filtrados = casos_filtrados[
-            casos_filtrados["sexo"] == filters_advanced["sexo"]
-        ]
-        despues_sexo = len(casos_filtrados)
-        if antes_sexo != despues_sexo:
-            logger.info(f"👤 Filtro sexo: {antes_sexo}→{despues_sexo} casos")
+    En selección múltiple las veredas se resuelven a pares (municipio, vereda)
+    con veredas_por_municipio (hoja VEREDAS), para no mezclar veredas
+    homónimas de otros municipios seleccionados.
+    """
+    cube_filters = {}
 
-    if filters_advanced["edad_rango"] and "edad" in casos_filtrados.columns:
-        edad_min, edad_max = filters_advanced["edad_rango"]
-        antes_edad = len(casos_filtrados)
-        casos_filtrados = casos_filtrados[
-            (casos_filtrados["edad"] >= edad_min)
-            & (casos_filtrados["edad"] <= edad_max)
-        ]
-        despues_edad = len(casos_filtrados)
-        if antes_edad != despues_edad:
-            logger.info(f"🎂 Filtro edad: {antes_edad}→{despues_edad} casos")
+    if filters_location.get("modo") == "multiple":
+        municipios_sel = filters_location.get("municipios_seleccionados", [])
+        veredas_sel = set(filters_location.get("veredas_seleccionadas", []))
+        if veredas_sel:
+            cube_filters[PAIR_FILTER] = tuple(
+                sorted(
+                    (municipio, vereda)
+                    for municipio in municipios_sel
+                    for vereda in (veredas_por_municipio or {}).get(municipio, veredas_sel)
+                    if vereda in veredas_sel
+                )
+            )
+        elif municipios_sel:
+            cube_filters["municipio"] = list(municipios_sel)
+    else:
+        if filters_location.get("municipio_display", "Todos") != "Todos":
+            cube_filters["municipio"] = filters_location["municipio_display"]
+        if filters_location.get("vereda_display", "Todas") != "Todas":
+            cube_filters["vereda"] = filters_location["vereda_display"]
 
-    # ===== LOG FINAL =====
-    final_casos = len(casos_filtrados)
-    final_epizootias = len(epizootias_filtradas)
+    fecha_rango = filters_temporal.get("fecha_rango")
+    if fecha_rango and len(fecha_rango) == 2:
+        cube_filters["fecha"] = (
+            pd.Timestamp(fecha_rango[0]),
+            pd.Timestamp(fecha_rango[1]) + pd.Timedelta(hours=23, minutes=59),
+        )
 
-    logger.info(
-        f"✅ FILTRADO FINAL - Casos: {initial_casos}→{final_casos}, Epizootias: {initial_epizootias}→{final_epizootias}"
-    )
+    if filters_advanced.get("condicion_final", "Todas") != "Todas":
+        cube_filters["condicion_final"] = filters_advanced["condicion_final"]
+    if filters_advanced.get("sexo", "Todos") != "Todos":
+        cube_filters["sexo"] = filters_advanced["sexo"]
+    if filters_advanced.get("edad_rango"):
+        cube_filters["edad"] = tuple(filters_advanced["edad_rango"])
 
-    return {
-        "casos": casos_filtrados,
-        "epizootias": epizootias_filtradas,
-        **{k: v for k, v in data.items() if k not in ["casos", "epizootias"]},
-    }
+    return cube_filters
 
 # ===== SISTEMA UNIFICADO DE FILTROS =====
 
@@ -728,6 +700,7 @@ def create_unified_filter_system(data):
 
     # Mostrar filtros activos
     show_active_filters(active_filters)
+    show_filter_trace(data_filtered.get("filter_trace"))
 
     # Botones de control
     st.sidebar.markdown("---")
@@ -790,13 +763,11 @@ def create_unified_filter_system(data):
 def create_temporal_filters_optimized(data):
     """Filtros temporales OPTIMIZADOS - CORREGIDO para incluir fechas nuevas."""
     st.sidebar.markdown("---")
-    fechas_disponibles = get_available_dates(data)
+    fecha_min, fecha_max_datos = get_date_bounds(data)
 
-    if not fechas_disponibles:
+    if fecha_min is None:
         return {"fecha_rango": None, "fecha_min": None, "fecha_max": None}
 
-    fecha_min = min(fechas_disponibles)
-    fecha_max_datos = max(fechas_disponibles)
     fecha_max = datetime.now()  # Siempre usar fecha actual como máximo
 
     # ✅ CORRECCIÓN: Extender el rango por defecto para incluir casos nuevos
@@ -988,17 +959,37 @@ def get_initial_index(options, session_key):
     return 0
 
 
-def get_available_dates(data):
-    """Obtiene fechas disponibles en los datos."""
-    fechas = []
-    if not data["casos"].empty and "fecha_inicio_sintomas" in data["casos"].columns:
-        fechas.extend(data["casos"]["fecha_inicio_sintomas"].dropna().tolist())
-    if (
-        not data["epizootias"].empty
-        and "fecha_notificacion" in data["epizootias"].columns
-    ):
-        fechas.extend(data["epizootias"]["fecha_notificacion"].dropna().tolist())
-    return fechas
+def get_date_bounds(data):
+    """
+    Fechas mínima y máxima de casos y epizootias.
+    Precalculadas en el índice de fechas; sin él se leen de las columnas.
+
+    Returns:
+        tuple: (pd.Timestamp, pd.Timestamp) o (None, None) si no hay fechas
+    """
+    date_index = data.get("date_index")
+    if date_index is not None:
+        return date_index.bounds()
+
+    extremos = []
+    for kind, col in DATE_COLUMNS.items():
+        df = data.get(kind)
+        if df is not None and not df.empty and col in df.columns:
+            fechas = pd.to_datetime(df[col], errors="coerce").dropna()
+            if not fechas.empty:
+                extremos.extend([fechas.min(), fechas.max()])
+    if not extremos:
+        return None, None
+    return min(extremos), max(extremos)
+
+
+def show_filter_trace(trace):
+    """Tabla de la traza de filtrado (solo en modo explicación)."""
+    if not trace:
+        return
+
+    with st.sidebar.expander("🧪 Explicación del filtrado", expanded=False):
+        st.dataframe(pd.DataFrame(trace), use_container_width=True, hide_index=True)
 
 
 def show_active_filters(active_filters):
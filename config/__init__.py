@@ -6,11 +6,18 @@ Módulo de configuración del dashboard
 from .settings import (
     DASHBOARD_CONFIG,
     DATA_FILES,
+    SOURCE_FILES,
+    STORAGE_CONFIG,
+    CACHE_CONFIG,
+    DOWNLOAD_CONFIG,
     CASOS_COLUMNS_MAP,
     EPIZOOTIAS_COLUMNS_MAP,
+    VEREDAS_COLUMNS,
+    EXCEL_SHEET_COLUMNS,
     GRUPOS_EDAD,
     CONDICION_FINAL_MAP,
     DESCRIPCION_EPIZOOTIAS_MAP,
+    DATASET_SCHEMA,
     FILTROS_CONFIG,
     TABS_CONFIG,
     VERSION_INFO,
@@ -27,11 +34,18 @@ __all__ = [
     # Settings
     "DASHBOARD_CONFIG",
     "DATA_FILES", 
+    "SOURCE_FILES",
+    "STORAGE_CONFIG",
+    "CACHE_CONFIG",
+    "DOWNLOAD_CONFIG",
     "CASOS_COLUMNS_MAP",
     "EPIZOOTIAS_COLUMNS_MAP",
+    "VEREDAS_COLUMNS",
+    "EXCEL_SHEET_COLUMNS",
     "GRUPOS_EDAD",
     "CONDICION_FINAL_MAP",
     "DESCRIPCION_EPIZOOTIAS_MAP",
+    "DATASET_SCHEMA",
     "FILTROS_CONFIG",
     "TABS_CONFIG",
     "VERSION_INFO",
@@ -2,6 +2,7 @@
 Configuraciones esenciales del dashboard.
 """
 
+import os
 from pathlib import Path
 
 # ===== RUTAS ESENCIALES =====
@@ -26,6 +27,61 @@ DATA_FILES = {
     "veredas_sheet": "VEREDAS",
 }
 
+# Nombre de archivo de cada clave lógica (caché de descargas y backends local/S3)
+SOURCE_FILES = {
+    "casos_excel": "BD_positivos.xlsx",
+    "cobertura": "cobertura_data.xlsx",
+    "logo_gobernacion": "logo.png",
+    "municipios_shp": "tolima_municipios.shp",
+    "municipios_shx": "tolima_municipios.shx",
+    "municipios_dbf": "tolima_municipios.dbf",
+    "municipios_prj": "tolima_municipios.prj",
+    "veredas_shp": "tolima_veredas.shp",
+    "veredas_shx": "tolima_veredas.shx",
+    "veredas_dbf": "tolima_veredas.dbf",
+    "veredas_prj": "tolima_veredas.prj",
+}
+
+# ===== ORIGEN DE ARCHIVOS =====
+STORAGE_CONFIG = {
+    # drive (st.secrets.drive_files) | local (directorio) | s3 (bucket compatible)
+    "backend": os.environ.get("DASHBOARD_STORAGE_BACKEND", "drive"),
+    "local_dir": os.environ.get("DASHBOARD_LOCAL_DATA_DIR", str(DATA_DIR)),
+    "s3_bucket": os.environ.get("DASHBOARD_S3_BUCKET"),
+    "s3_prefix": os.environ.get("DASHBOARD_S3_PREFIX", ""),
+    "s3_endpoint_url": os.environ.get("DASHBOARD_S3_ENDPOINT_URL"),
+}
+
+# ===== CACHÉ DE DATOS =====
+CACHE_CONFIG = {
+    # Segundos entre consultas de versión del archivo fuente en Google Drive
+    "version_check_interval": 60,
+    # Caché persistente de descargas (sobrevive reinicios del proceso)
+    "download_dir": os.environ.get("DASHBOARD_CACHE_DIR", str(DATA_DIR / ".cache")),
+    "download_max_bytes": 500 * 1024 * 1024,
+    # Refresco en segundo plano: reconstruye el dataset fuera del request
+    "background_refresh": True,
+    "refresh_interval": 180,
+    # Estado de disponibilidad (secrets + autenticación) compartido por las sesiones
+    "availability_ttl": 300,
+    "availability_backoff": 15,  # segundos tras el primer fallo (exponencial)
+    "availability_max_backoff": 300,
+    # Resultados de filtrado compartidos entre sesiones (LRU por memoria)
+    "filter_cache_max_bytes": 32 * 1024 * 1024,
+    "filter_cache_max_entries": 256,
+}
+
+# ===== DESCARGAS =====
+DOWNLOAD_CONFIG = {
+    "max_workers": 4,  # descargas simultáneas (ej. partes de shapefiles)
+    "retries": 3,  # intentos por archivo
+    "retry_backoff": 1.0,  # segundos base entre reintentos (exponencial)
+    "chunk_size": 8 * 1024 * 1024,  # bytes por petición de rango a Drive
+    "stall_timeout": 60,  # segundos sin recibir datos antes de abortar (se reanuda)
+    "startup_workers": 4,  # recursos cargados en paralelo al iniciar (casos, mapas, ...)
+    "startup_wait_timeout": 120,  # segundos que una vista espera la carga inicial antes de cargar por su cuenta
+}
+
 # ===== MAPEOS CRÍTICOS =====
 # Mapeo de columnas para casos
 CASOS_COLUMNS_MAP = {
@@ -46,6 +102,15 @@ EPIZOOTIAS_COLUMNS_MAP = {
     "DESCRIPCIÓN": "descripcion",
 }
 
+# Columnas leídas de cada hoja de BD_positivos.xlsx (el resto no se parsea)
+VEREDAS_COLUMNS = ["municipi_1", "vereda_nor", "region"]
+
+EXCEL_SHEET_COLUMNS = {
+    DATA_FILES["casos_sheet"]: list(CASOS_COLUMNS_MAP) + ["eps"],
+    DATA_FILES["epizootias_sheet"]: list(EPIZOOTIAS_COLUMNS_MAP),
+    DATA_FILES["veredas_sheet"]: VEREDAS_COLUMNS,
+}
+
 # ===== GRUPOS DE EDAD =====
 GRUPOS_EDAD = [
     {"min": 0, "max": 14, "label": "0-14 años"},
@@ -66,6 +131,31 @@ DESCRIPCION_EPIZOOTIAS_MAP = {
     "EN ESTUDIO": {"color": "#4682B4", "categoria": "En estudio"},
 }
 
+# ===== ESQUEMA CANÓNICO DEL DATASET =====
+# Columnas categóricas por tabla con sus valores conocidos; "municipios" y
+# "veredas" toman las categorías de la hoja VEREDAS (más las observadas)
+DATASET_SCHEMA = {
+    "casos": {
+        "categorical": {
+            "municipio": "municipios",
+            "vereda": "veredas",
+            "sexo": ["Masculino", "Femenino"],
+            "condicion_final": list(CONDICION_FINAL_MAP),
+            "grupo_edad": [grupo["label"] for grupo in GRUPOS_EDAD] + ["No especificado"],
+        },
+        "numeric": ["edad", "año_inicio"],
+    },
+    "epizootias": {
+        "categorical": {
+            "municipio": "municipios",
+            "vereda": "veredas",
+            "descripcion": list(DESCRIPCION_EPIZOOTIAS_MAP),
+            "categoria_resultado": ["Positivo", "Negativo", "No apta", "En Estudio", "Otro"],
+        },
+        "numeric": ["año_notificacion"],
+    },
+}
+
 # ===== CONFIGURACIÓN DE FILTROS =====
 FILTROS_CONFIG = {
     "municipio": {
@@ -78,6 +168,9 @@ FILTROS_CONFIG = {
         "default": "Todas",
         "jerarquia": 2,
     },
+    # Traza por etapa del filtrado (conteos y tiempos) para todas las sesiones;
+    # una sola sesión se activa con ?explain=1 en la URL
+    "explain": os.environ.get("DASHBOARD_FILTER_EXPLAIN", "").lower() in ("1", "true"),
 }
 
 # ===== CONFIGURACIÓN DE PESTAÑAS =====
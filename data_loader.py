@@ -7,6 +7,8 @@ import os
 import time
 import tempfile
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import streamlit as st
@@ -15,32 +17,340 @@ import geopandas as gpd
 
 logger = logging.getLogger(__name__)
 
-# Importaciones opcionales de Google
-try:
-    from google.oauth2 import service_account
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaIoBaseDownload
-    import io
-    GOOGLE_AVAILABLE = True
-except ImportError:
-    GOOGLE_AVAILABLE = False
-    logger.warning("⚠️ Google Drive libraries no disponibles")
+from config.settings import (
+    CACHE_CONFIG,
+    DOWNLOAD_CONFIG,
+    DATA_FILES,
+    EXCEL_SHEET_COLUMNS,
+    SOURCE_FILES,
+    STORAGE_CONFIG,
+)
+from utils.download_cache import PersistentDownloadCache
+from utils.storage_backends import GOOGLE_AVAILABLE, create_storage_backend
+from utils.dataset_snapshot import (
+    load_geo_snapshot,
+    load_snapshot,
+    save_geo_snapshot,
+    save_snapshot,
+)
+from utils.excel_reader import read_workbook_sheets
+from utils.epi_dataset import EpiDataset
+from utils.filter_cache import get_filter_cache
+
+
+class SharedDatasetCache:
+    """
+    Caché de proceso para el dataset procesado, compartido por todas las sesiones.
+    Se reconstruye solo cuando cambia la versión del archivo fuente.
+    """
+
+    def __init__(self, check_interval=60):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._check_interval = check_interval
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+        # Con refresco en segundo plano vigente los lectores no verifican versión
+        self._background_checked_at = None
+        self._background_ttl = 0.0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "rebuilds": 0,
+            "last_build_seconds": None,
+            "built_at": None,
+        }
+
+    def _is_fresh(self):
+        """True si hay datos y la versión se verificó hace menos del intervalo."""
+        if self._data is None:
+            return False
+        if self.is_background_managed():
+            return True
+        return time.time() - self._checked_at < self._check_interval
+
+    def mark_background_check(self, ttl):
+        """
+        Registra una verificación exitosa del refresco en segundo plano.
+        Mientras no pasen `ttl` segundos sin otra, los lectores confían en él.
+        """
+        self._background_ttl = ttl
+        self._background_checked_at = time.time()
+
+    def clear_background_check(self):
+        """El refresco se detuvo: los lectores vuelven a verificar versión."""
+        self._background_checked_at = None
+
+    def is_background_managed(self):
+        """
+        True si el refresco en segundo plano verificó hace poco. Si el hilo
+        muere o sus verificaciones fallan, se vuelve a la verificación periódica.
+        """
+        checked_at = self._background_checked_at
+        return checked_at is not None and time.time() - checked_at < self._background_ttl
+
+    def peek(self):
+        """Dataset activo sin verificar versión (None si nunca se construyó)."""
+        with self._lock:
+            return self._data
+
+    def get_or_build(self, resolve_version, build):
+        """
+        Retorna el dataset en caché o lo reconstruye si cambió la versión.
+
+        Args:
+            resolve_version: callable que retorna la versión actual del origen (o None)
+            build: callable que construye el dataset procesado (o None si falla)
+
+        Returns:
+            dict: Dataset procesado o None si nunca se pudo construir
+        """
+        with self._lock:
+            if self._is_fresh():
+                self._stats["hits"] += 1
+                return self._data
+
+        # Solo un hilo verifica versión / reconstruye a la vez
+        with self._build_lock:
+            with self._lock:
+                if self._is_fresh():
+                    self._stats["hits"] += 1
+                    return self._data
+
+            version = resolve_version()
+
+            with self._lock:
+                self._checked_at = time.time()
+                if self._data is not None and (version is None or version == self._version):
+                    self._stats["hits"] += 1
+                    return self._data
+                self._stats["misses"] += 1
+                had_data = self._data is not None
+
+            if had_data:
+                logger.info(f"🔄 Nueva versión del archivo fuente: {self._version} → {version}")
+
+            start_time = time.time()
+            data = build()
+
+            with self._lock:
+                if data is None:
+                    # Conservar la versión anterior si la reconstrucción falla
+                    return self._data
+
+                self._data = data
+                self._version = version
+                self._stats["last_build_seconds"] = round(time.time() - start_time, 3)
+                self._stats["built_at"] = datetime.now().isoformat(timespec="seconds")
+                if had_data:
+                    self._stats["rebuilds"] += 1
+                return data
+
+    def rebuild(self, version, build):
+        """
+        Construye `version` bajo el mismo lock que get_or_build y la intercambia:
+        un lector y el refresco nunca construyen la misma versión en paralelo.
+
+        Returns:
+            bool: True si se intercambió el dataset
+        """
+        with self._build_lock:
+            with self._lock:
+                if version == self._version:
+                    return False
+            start_time = time.time()
+            data = build()
+            if not self.swap(version, data):
+                return False
+            with self._lock:
+                self._stats["last_build_seconds"] = round(time.time() - start_time, 3)
+            return True
+
+    def swap(self, version, data):
+        """
+        Reemplaza atómicamente el dataset activo por uno ya construido.
+        Las sesiones que tienen una referencia al anterior la conservan intacta.
+        """
+        if data is None:
+            return False
+        with self._lock:
+            had_data = self._data is not None
+            self._data = data
+            self._version = version
+            self._checked_at = time.time()
+            self._stats["built_at"] = datetime.now().isoformat(timespec="seconds")
+            if had_data:
+                self._stats["rebuilds"] += 1
+        return True
+
+    def get_version(self):
+        """Versión del archivo fuente del dataset activo."""
+        with self._lock:
+            return self._version
+
+    def invalidate(self):
+        """Fuerza verificación de versión en la próxima lectura."""
+        with self._lock:
+            self._checked_at = 0.0
+
+    def get_stats(self):
+        """Retorna contadores de uso del caché."""
+        with self._lock:
+            return {**self._stats, "version": self._version}
+
+
+class AvailabilityStatus:
+    """
+    Estado de disponibilidad del sistema (librerías, secrets y autenticación)
+    compartido por todas las sesiones. Un resultado positivo se reutiliza
+    durante `ttl` segundos; tras un fallo se reintenta con backoff exponencial.
+    """
+
+    def __init__(self, ttl=300, backoff=15, max_backoff=300):
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._ttl = ttl
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._available = None
+        self._reason = None
+        self._checked_at = None
+        self._next_check_at = 0.0
+        self._failures = 0
+        self._stats = {"checks": 0, "probes": 0}
+
+    def get(self, probe, force=False):
+        """
+        Retorna la disponibilidad, ejecutando `probe` solo si el estado expiró.
+
+        Args:
+            probe: callable() -> (bool, motivo)
+            force: ignora TTL y backoff
+        """
+        requested_at = time.time()
+        with self._lock:
+            self._stats["checks"] += 1
+            if not force and self._is_fresh(requested_at):
+                return self._available
+
+        # Un solo prober a la vez, fuera de _lock: get_stats() no espera la red
+        with self._probe_lock:
+            with self._lock:
+                # Otro hilo verificó mientras esperábamos: reutilizar su resultado
+                if self._checked_at is not None and self._checked_at >= requested_at:
+                    return self._available
+
+            available, reason = probe()
+
+            # Publicar antes de soltar _probe_lock, para que quien espera lo vea
+            with self._lock:
+                now = time.time()
+                self._stats["probes"] += 1
+                self._available = available
+                self._reason = reason
+                self._checked_at = now
+
+                if available:
+                    self._failures = 0
+                    self._next_check_at = now + self._ttl
+                else:
+                    self._failures += 1
+                    delay = min(self._backoff * 2 ** (self._failures - 1), self._max_backoff)
+                    self._next_check_at = now + delay
+                    logger.warning(f"⚠️ System unavailable ({reason}), next check in {delay:.0f}s")
+
+                return available
+
+    def _is_fresh(self, now):
+        """True si hay un resultado vigente (llamar con _lock tomado)."""
+        return self._available is not None and now < self._next_check_at
+
+    def invalidate(self):
+        """Fuerza una nueva verificación en la próxima consulta."""
+        with self._lock:
+            self._next_check_at = 0.0
+
+    def get_stats(self):
+        """Retorna el estado actual y contadores."""
+        with self._lock:
+            return {
+                **self._stats,
+                "available": self._available,
+                "reason": self._reason,
+                "consecutive_failures": self._failures,
+                "checked_at": (
+                    datetime.fromtimestamp(self._checked_at).isoformat(timespec="seconds")
+                    if self._checked_at
+                    else None
+                ),
+                "next_check_in": max(0.0, round(self._next_check_at - time.time(), 1)),
+            }
+
+
+# Caché compartido entre reruns y sesiones del mismo proceso
+_dataset_cache = SharedDatasetCache(CACHE_CONFIG["version_check_interval"])
+
+# Disponibilidad compartida: evita releer secrets y re-autenticar en cada rerun
+_availability = AvailabilityStatus(
+    ttl=CACHE_CONFIG["availability_ttl"],
+    backoff=CACHE_CONFIG["availability_backoff"],
+    max_backoff=CACHE_CONFIG["availability_max_backoff"],
+)
+
+def _to_wgs84(gdf, name):
+    """Normaliza a EPSG:4326 (coordenadas que espera folium)."""
+    if gdf.crs is None:
+        logger.warning(f"⚠️ {name} sin CRS, se asume EPSG:4326")
+        return gdf.set_crs("EPSG:4326")
+    if gdf.crs.to_epsg() != 4326:
+        logger.info(f"🔄 Convirtiendo {name} de {gdf.crs} a EPSG:4326")
+        return gdf.to_crs("EPSG:4326")
+    return gdf
+
+
+# Partes de shapefiles configurables en el origen de archivos
+SHAPEFILE_FILES = {
+    key: filename
+    for key, filename in SOURCE_FILES.items()
+    if key.startswith(("municipios_", "veredas_"))
+}
 
 
 class ConsolidatedDataLoader:
     """
     Gestor consolidado para carga de datos y shapefiles desde Google Drive
+    (o el origen configurado en STORAGE_CONFIG["backend"])
     """
     
     def __init__(self):
-        self.service = None
+        self.backend = create_storage_backend(STORAGE_CONFIG, SOURCE_FILES)
+        self.download_cache = None
         self.cache_dir = self._setup_cache()
-        self._authenticated = False
+        self._metadata_cache = {}
+        self._download_metrics = {}
+        self._geo_cache = {}
+        self._geo_lock = threading.Lock()
         
     def _setup_cache(self):
-        """Configura directorio de caché temporal."""
+        """Configura caché persistente de descargas (temporal como respaldo)."""
         try:
-            cache_dir = tempfile.mkdtemp(prefix="tolima_data_cache_")
+            self.download_cache = PersistentDownloadCache(
+                CACHE_CONFIG["download_dir"],
+                max_bytes=CACHE_CONFIG["download_max_bytes"],
+            )
+            cache_dir = str(self.download_cache.root)
+            logger.info(f"📁 Persistent cache directory: {cache_dir}")
+            return cache_dir
+        except Exception as e:
+            logger.warning(f"⚠️ Persistent cache not available, using temp dir: {e}")
+
+        try:
+            self.download_cache = PersistentDownloadCache(
+                tempfile.mkdtemp(prefix="tolima_data_cache_"),
+                max_bytes=CACHE_CONFIG["download_max_bytes"],
+            )
+            cache_dir = str(self.download_cache.root)
             logger.info(f"📁 Cache directory: {cache_dir}")
             return cache_dir
         except Exception as e:
@@ -48,135 +358,248 @@ class ConsolidatedDataLoader:
             return None
 
     def _authenticate(self):
-        """Autenticación con Google Drive."""
-        if self._authenticated and self.service:
-            return True
+        """Prepara el acceso al origen de archivos (autenticación en Drive)."""
+        return self.backend.authenticate()
+
+    def _get_file_refs(self):
+        """
+        Archivos disponibles en el origen configurado.
 
+        Returns:
+            dict: {clave lógica: referencia del backend (file_id, ruta, clave S3)}
+        """
         try:
-            if not GOOGLE_AVAILABLE:
-                logger.error("❌ Google libraries not available")
-                return False
+            return self.backend.get_file_refs()
+        except Exception as e:
+            logger.error(f"❌ Error listing source files: {str(e)}")
+            return {}
 
-            if not hasattr(st.secrets, "gcp_service_account"):
-                logger.error("❌ gcp_service_account not found in secrets")
-                return False
+    def _get_file_metadata(self, file_id, force=False):
+        """
+        Obtiene metadatos de versión de un archivo en el origen (una sola llamada liviana).
+        Reutiliza la respuesta durante CACHE_CONFIG["version_check_interval"] segundos.
+        """
+        cached = self._metadata_cache.get(file_id)
+        if (
+            not force
+            and cached
+            and time.time() - cached["checked_at"] < CACHE_CONFIG["version_check_interval"]
+        ):
+            return cached["metadata"]
 
-            gcp_config = st.secrets["gcp_service_account"]
-            required_fields = ["type", "project_id", "private_key", "client_email"]
+        try:
+            metadata = self.backend.get_metadata(file_id)
+        except Exception as e:
+            logger.error(f"❌ File not accessible {file_id}: {str(e)}")
+            return None
 
-            if not all(field in gcp_config for field in required_fields):
-                logger.error(f"❌ Missing required fields in gcp_service_account")
-                return False
+        if not metadata:
+            return None
 
-            # Crear credenciales
-            credentials = service_account.Credentials.from_service_account_info(
-                gcp_config, 
-                scopes=["https://www.googleapis.com/auth/drive.readonly"]
-            )
+        self._metadata_cache[file_id] = {"metadata": metadata, "checked_at": time.time()}
+        return metadata
 
-            self.service = build("drive", "v3", credentials=credentials)
+    def _get_cached_version(self, file_id):
+        """Última versión conocida de un archivo, sin consultar el origen."""
+        cached = self._metadata_cache.get(file_id)
+        return cached["metadata"]["version"] if cached else None
 
-            # Test de conectividad
-            self.service.files().list(pageSize=1).execute()
-            
-            self._authenticated = True
-            logger.info("✅ Google Drive authenticated successfully")
-            return True
+    def _get_file_version(self, file_id):
+        """Obtiene la versión de un archivo (ej. modifiedTime + md5 en Drive) sin descargarlo."""
+        metadata = self._get_file_metadata(file_id, force=True)
+        return metadata["version"] if metadata else None
 
-        except Exception as e:
-            logger.error(f"❌ Authentication error: {str(e)}")
-            if "invalid_grant" in str(e).lower():
-                logger.error("💡 TIP: Check system time synchronization")
-            return False
+    def _download_file(self, file_id, filename, timeout=None, version=None):
+        """
+        Descarga un archivo desde el origen configurado usando el caché persistente.
+        El caché se indexa por file_id + versión, así que un archivo modificado
+        en el origen se detecta con una sola llamada de metadatos.
+
+        La descarga es reanudable: si se interrumpe, el siguiente intento
+        continúa desde el último byte recibido.
+
+        Args:
+            timeout: segundos sin recibir datos antes de abortar
+                (por defecto DOWNLOAD_CONFIG["stall_timeout"]); se aplica como
+                timeout de lectura del socket, así que también corta una
+                lectura bloqueada, y entre bloques que no traen datos
+        """
+        if not self.download_cache:
+            return None
 
-    def _download_file(self, file_id, filename, timeout=30):
-        """Descarga un archivo desde Google Drive con caché."""
-        if not self.cache_dir:
+        metadata = self._get_file_metadata(file_id)
+        if not metadata:
             return None
 
+        if version is None:
+            version = metadata["version"]
+
         # Verificar caché
-        cache_path = os.path.join(self.cache_dir, filename)
-        if os.path.exists(cache_path):
+        cache_path = self.download_cache.lookup(file_id, version, filename)
+        if cache_path:
             logger.info(f"📋 Cache hit: {filename}")
             return cache_path
 
-        if not self._authenticate():
-            return None
+        stall_timeout = timeout or DOWNLOAD_CONFIG["stall_timeout"]
+        metrics = {"bytes": 0, "resumed_from": 0, "chunks": 0, "first_byte_seconds": None}
+        total_size = int(metadata.get("size") or 0)
+        start_time = time.time()
 
         try:
             logger.info(f"📥 Downloading: {filename}")
 
-            # Verificar que el archivo existe
-            try:
-                self.service.files().get(fileId=file_id).execute()
-            except Exception as e:
-                logger.error(f"❌ File not accessible {file_id}: {str(e)}")
-                return None
+            def write_content(f, offset):
+                metrics["resumed_from"] = offset
+                if total_size and offset >= total_size:
+                    # El parcial ya está completo (interrumpido antes de registrarse)
+                    return
+
+                progress = {"received": offset, "at": time.time()}
+
+                def on_progress(received):
+                    now = time.time()
+                    metrics["chunks"] += 1
+                    if received > progress["received"]:
+                        if metrics["first_byte_seconds"] is None:
+                            metrics["first_byte_seconds"] = round(now - start_time, 3)
+                        progress["received"] = received
+                        progress["at"] = now
+                        metrics["bytes"] = received - offset
+                    elif now - progress["at"] > stall_timeout:
+                        raise TimeoutError(f"Download stalled: {filename}")
+
+                self.backend.write_to(
+                    file_id,
+                    f,
+                    offset=offset,
+                    chunk_size=DOWNLOAD_CONFIG["chunk_size"],
+                    on_progress=on_progress,
+                    timeout=stall_timeout,
+                )
 
-            # Descargar archivo
-            request = self.service.files().get_media(fileId=file_id)
-
-            with open(cache_path, "wb") as f:
-                downloader = MediaIoBaseDownload(f, request)
-                done = False
-                start_time = time.time()
-
-                while not done:
-                    if time.time() - start_time > timeout:
-                        logger.error(f"❌ Download timeout: {filename}")
-                        if os.path.exists(cache_path):
-                            os.remove(cache_path)
-                        return None
-
-                    try:
-                        status, done = downloader.next_chunk()
-                    except Exception as e:
-                        logger.error(f"❌ Download error: {str(e)}")
-                        if os.path.exists(cache_path):
-                            os.remove(cache_path)
-                        return None
-
-            # Verificar descarga exitosa
-            if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0:
-                logger.info(f"✅ Downloaded: {filename} ({os.path.getsize(cache_path)} bytes)")
-                return cache_path
-            else:
-                logger.error(f"❌ Empty file: {filename}")
-                if os.path.exists(cache_path):
-                    os.remove(cache_path)
-                return None
+            cache_path = self.download_cache.store_resumable(
+                file_id,
+                version,
+                filename,
+                write_content,
+                md5_checksum=metadata.get("md5Checksum"),
+            )
+
+            self._record_download_metrics(filename, metrics, start_time, ok=bool(cache_path))
+            if cache_path:
+                logger.info(
+                    f"✅ Downloaded: {filename} ({os.path.getsize(cache_path)} bytes, "
+                    f"{self._download_metrics[filename]['throughput_kbps']} KB/s)"
+                )
+            return cache_path
 
         except Exception as e:
+            self._record_download_metrics(filename, metrics, start_time, ok=False)
             logger.error(f"❌ Download error {filename}: {str(e)}")
-            if os.path.exists(cache_path):
-                os.remove(cache_path)
             return None
 
-    def check_availability(self):
-        """Verifica la disponibilidad completa del sistema."""
-        try:
-            # Verificar Google libraries
-            if not GOOGLE_AVAILABLE:
-                logger.warning("⚠️ Google libraries not available")
-                return False
+    def _record_download_metrics(self, filename, metrics, start_time, ok):
+        """Registra tiempo, latencia al primer byte y throughput de una descarga."""
+        elapsed = time.time() - start_time
+        self._download_metrics[filename] = {
+            **metrics,
+            "ok": ok,
+            "seconds": round(elapsed, 3),
+            "throughput_kbps": round(metrics["bytes"] / 1024 / elapsed, 1) if elapsed > 0 else None,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        }
 
-            # Verificar secrets
-            if not hasattr(st.secrets, "gcp_service_account"):
-                logger.warning("⚠️ gcp_service_account not found")
-                return False
+    def _download_with_retries(self, file_id, filename):
+        """Descarga un archivo reintentando con espera exponencial."""
+        retries = max(1, DOWNLOAD_CONFIG["retries"])
 
-            if not hasattr(st.secrets, "drive_files"):
-                logger.warning("⚠️ drive_files not found")
-                return False
+        for attempt in range(retries):
+            path = self._download_file(file_id, filename)
+            if path:
+                return path
+
+            if attempt < retries - 1:
+                wait = DOWNLOAD_CONFIG["retry_backoff"] * (2 ** attempt)
+                logger.warning(
+                    f"🔁 Reintentando {filename} en {wait:.1f}s ({attempt + 2}/{retries})"
+                )
+                time.sleep(wait)
+
+        return None
+
+    def _download_files_parallel(self, files, progress_callback=None):
+        """
+        Descarga varios archivos en paralelo con un pool acotado.
+
+        Args:
+            files: dict {key: (file_id, filename)}
+            progress_callback: callable(completados, total), se invoca en el hilo llamador
+
+        Returns:
+            dict: {key: path} de los archivos descargados
+        """
+        if not files:
+            return {}
+
+        downloaded = {}
+        total = len(files)
+        max_workers = max(1, min(DOWNLOAD_CONFIG["max_workers"], total))
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="drive_dl") as executor:
+            futures = {
+                executor.submit(self._download_with_retries, file_id, filename): (key, filename)
+                for key, (file_id, filename) in files.items()
+            }
+
+            for completed, future in enumerate(as_completed(futures), start=1):
+                key, filename = futures[future]
+                try:
+                    path = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Download error {filename}: {str(e)}")
+                    path = None
+
+                if path:
+                    downloaded[key] = path
+                else:
+                    logger.warning(f"⚠️ Failed to download: {filename}")
+
+                if progress_callback:
+                    progress_callback(completed, total)
+
+        return downloaded
+
+    def check_availability(self, force=False):
+        """
+        Verifica la disponibilidad completa del sistema.
+        El resultado se comparte entre sesiones con TTL (ver AvailabilityStatus).
+
+        Args:
+            force: ignora el estado cacheado y vuelve a verificar
+        """
+        return _availability.get(self._probe_availability, force=force)
+
+    def _probe_availability(self):
+        """
+        Verificación real: librerías, configuración y acceso al origen de archivos.
+
+        Returns:
+            tuple: (disponible, motivo)
+        """
+        try:
+            # Verificar librerías, configuración y conectividad del origen
+            available, reason = self.backend.check()
+            if not available:
+                return False, reason
 
             # Verificar archivos requeridos
-            drive_files = st.secrets.drive_files
+            drive_files = self._get_file_refs()
             required_files = ["casos_excel"]  # Archivo principal obligatorio
             
             missing_files = [f for f in required_files if f not in drive_files]
             if missing_files:
                 logger.warning(f"⚠️ Missing required files: {missing_files}")
-                return False
+                return False, f"missing_files:{','.join(missing_files)}"
 
             # Log archivos opcionales disponibles
             optional_files = ["cobertura", "logo"]
@@ -186,183 +609,294 @@ class ConsolidatedDataLoader:
                 else:
                     logger.info(f"ℹ️ Optional file '{opt_file}' not configured")
 
-            # Test de autenticación
-            if not self._authenticate():
-                return False
-
             logger.info("✅ All systems available")
-            return True
+            return True, None
 
         except Exception as e:
             logger.error(f"❌ Availability check error: {str(e)}")
-            return False
+            return False, f"error:{str(e)}"
 
-    def load_excel_data(self):
+    def load_excel_data(self, show_progress=True):
         """
         Carga los datos principales desde el archivo Excel en Google Drive.
+        Usa el caché compartido de proceso: solo reprocesa si cambió el archivo.
+
+        Args:
+            show_progress: muestra barra de progreso (False en hilos sin UI)
         
         Returns:
             dict: Estructura de datos procesada o None si falla
         """
         if not self.check_availability():
-            return None
+            # Durante el backoff de disponibilidad se sigue sirviendo lo ya cargado
+            cached = _dataset_cache.peek()
+            if cached is not None:
+                logger.warning("⚠️ Origen no disponible, se usa el dataset en caché")
+            return cached
 
-        drive_files = st.secrets.drive_files
-        progress_container = st.container()
-
-        try:
-            with progress_container:
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+        file_id = self._get_file_refs()["casos_excel"]
+        version_holder = {}
 
-                status_text.text("🔐 Autenticando con Google Drive...")
-                if not self._authenticate():
-                    raise Exception("Authentication failed")
+        def resolve_version():
+            version_holder["version"] = self._get_file_version(file_id)
+            return version_holder["version"]
 
-                progress_bar.progress(20)
-                status_text.text("📥 Descargando archivo principal...")
+        data = _dataset_cache.get_or_build(
+            resolve_version,
+            lambda: self._build_excel_dataset(
+                file_id, version_holder.get("version"), show_progress=show_progress
+            ),
+        )
 
-                # Descargar archivo Excel principal
-                excel_path = self._download_file(
-                    drive_files["casos_excel"], 
-                    "BD_positivos.xlsx"
-                )
+        if data is not None and CACHE_CONFIG["background_refresh"]:
+            start_background_refresher(self)
 
-                if not excel_path:
-                    raise Exception("Error downloading main Excel file")
+        return data
 
-                progress_bar.progress(40)
-                status_text.text("🔍 Verificando estructura del archivo...")
+    def _build_excel_dataset(self, file_id, version=None, show_progress=True):
+        """Descarga y procesa el Excel principal (camino lento, solo en cache miss)."""
+        # Snapshot Parquet del mismo checksum: evita descargar y parsear el Excel
+        metadata = self._get_file_metadata(file_id) or {}
+        checksum = metadata.get("md5Checksum") or version
+        snapshot_dir = self._get_snapshot_dir()
+
+        if snapshot_dir and checksum:
+            snapshot = load_snapshot(snapshot_dir, checksum)
+            if snapshot is not None:
+                from utils.data_processor import finalize_dataset
+                return finalize_dataset(snapshot)
+
+        if show_progress:
+            processed_data = self._build_excel_dataset_with_progress(file_id, version)
+        else:
+            try:
+                processed_data = self._read_and_process_excel(file_id, version)
+            except Exception as e:
+                logger.error(f"❌ Excel data loading error: {str(e)}")
+                processed_data = None
 
-                # Verificar estructura del archivo
-                excel_file = pd.ExcelFile(excel_path)
-                available_sheets = excel_file.sheet_names
-                logger.info(f"📋 Available sheets: {available_sheets}")
-                
-                required_sheets = ["ACUMU", "EPIZOOTIAS"]
-                missing_sheets = [s for s in required_sheets if s not in available_sheets]
-                
-                if missing_sheets:
-                    raise Exception(f"Missing required sheets: {missing_sheets}")
+        if processed_data and snapshot_dir and checksum:
+            save_snapshot(snapshot_dir, checksum, processed_data)
 
-                progress_bar.progress(60)
-                status_text.text("📊 Cargando datos...")
+        return processed_data
 
-                # Cargar hojas principales
-                casos_df = pd.read_excel(excel_path, sheet_name="ACUMU", engine="openpyxl")
-                epizootias_df = pd.read_excel(excel_path, sheet_name="EPIZOOTIAS", engine="openpyxl")
-                
-                logger.info(f"✅ Casos loaded: {len(casos_df)} records")
-                logger.info(f"✅ Epizootias loaded: {len(epizootias_df)} records")
+    def _get_snapshot_dir(self, name="snapshots"):
+        """Directorio de snapshots, junto al caché de descargas."""
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, name)
 
-                # Cargar hoja VEREDAS si existe
-                veredas_df = None
-                if "VEREDAS" in available_sheets:
-                    try:
-                        veredas_df = pd.read_excel(excel_path, sheet_name="VEREDAS", engine="openpyxl")
-                        logger.info(f"✅ Veredas loaded: {len(veredas_df)} records")
-                    except Exception as e:
-                        logger.warning(f"⚠️ Error loading VEREDAS sheet: {str(e)}")
+    def _build_excel_dataset_with_progress(self, file_id, version=None):
+        """Construye el dataset mostrando barra de progreso en la sesión actual."""
+        progress_container = st.container()
 
-                progress_bar.progress(80)
-                status_text.text("🔧 Procesando datos...")
+        try:
+            with progress_container:
+                progress_bar = st.progress(0)
+                status_text = st.empty()
 
-                # Procesar datos
-                processed_data = self._process_excel_data(casos_df, epizootias_df, veredas_df)
+                def report(percent, text):
+                    progress_bar.progress(percent)
+                    status_text.text(text)
 
-                progress_bar.progress(100)
-                status_text.text("✅ Datos cargados exitosamente!")
+                processed_data = self._read_and_process_excel(file_id, version, report)
 
                 # Limpiar UI
-                time.sleep(1)
                 progress_bar.empty()
                 status_text.empty()
                 progress_container.empty()
 
-                logger.info("✅ Excel data loaded successfully from Google Drive")
                 return processed_data
 
         except Exception as e:
-            if "progress_container" in locals():
-                progress_container.empty()
+            progress_container.empty()
 
             logger.error(f"❌ Excel data loading error: {str(e)}")
             st.error(f"❌ Error cargando datos: {str(e)}")
             return None
 
-    def load_shapefiles(self):
+    def _read_and_process_excel(self, file_id, version=None, progress=None):
+        """
+        Descarga el Excel y ejecuta el procesamiento completo (sin UI).
+
+        Args:
+            progress: callable(porcentaje, texto) opcional para reportar avance
+        """
+        report = progress or (lambda percent, text: None)
+
+        report(0, "🔐 Conectando con el origen de datos...")
+        if not self._authenticate():
+            raise Exception("Authentication failed")
+
+        report(20, "📥 Descargando archivo principal...")
+
+        # Descargar archivo Excel principal
+        excel_path = self._download_file(
+            file_id, 
+            SOURCE_FILES["casos_excel"],
+            version=version,
+        )
+
+        if not excel_path:
+            raise Exception("Error downloading main Excel file")
+
+        report(40, "📊 Cargando datos...")
+
+        # Una sola apertura del libro para todas las hojas y solo columnas usadas
+        sheets, available_sheets = read_workbook_sheets(
+            excel_path, EXCEL_SHEET_COLUMNS
+        )
+        logger.info(f"📋 Available sheets: {available_sheets}")
+        
+        required_sheets = [DATA_FILES["casos_sheet"], DATA_FILES["epizootias_sheet"]]
+        missing_sheets = [s for s in required_sheets if s not in available_sheets]
+        
+        if missing_sheets:
+            raise Exception(f"Missing required sheets: {missing_sheets}")
+
+        casos_df = sheets[DATA_FILES["casos_sheet"]]
+        epizootias_df = sheets[DATA_FILES["epizootias_sheet"]]
+        veredas_df = sheets.get(DATA_FILES["veredas_sheet"])
+
+        report(80, "🔧 Procesando datos...")
+
+        # Procesar datos
+        processed_data = self._process_excel_data(casos_df, epizootias_df, veredas_df)
+
+        report(100, "✅ Datos cargados exitosamente!")
+
+        logger.info("✅ Excel data loaded successfully from Google Drive")
+        return processed_data
+
+    def load_shapefiles(self, show_progress=True, force_check=False):
         """
         Carga los shapefiles desde Google Drive.
+        Los GeoDataFrames procesados (en EPSG:4326) se comparten en memoria y se
+        guardan como GeoParquet por versión; un rerun no lee ni parsea archivos.
+
+        Args:
+            show_progress: muestra barra de progreso (False en hilos sin UI)
+            force_check: verifica la versión aunque el caché esté vigente
         
         Returns:
             dict: {'municipios': GeoDataFrame, 'veredas': GeoDataFrame} o None
         """
+        # Camino rápido sin lock: durante una reconstrucción se sirve la versión anterior
+        cached = self._geo_cache
+        if cached and not force_check and (
+            _dataset_cache.is_background_managed()
+            or time.time() - cached["checked_at"] < CACHE_CONFIG["version_check_interval"]
+        ):
+            return cached["data"]
+
         if not self.check_availability():
-            return None
+            # Igual que el dataset: servir la última versión cargada durante el backoff
+            return cached["data"] if cached else None
 
-        drive_files = st.secrets.drive_files
-
-        # Verificar IDs de shapefiles
-        shapefile_ids = {
-            "municipios_shp": "tolima_municipios.shp",
-            "municipios_shx": "tolima_municipios.shx", 
-            "municipios_dbf": "tolima_municipios.dbf",
-            "municipios_prj": "tolima_municipios.prj",
-            "veredas_shp": "tolima_veredas.shp",
-            "veredas_shx": "tolima_veredas.shx",
-            "veredas_dbf": "tolima_veredas.dbf", 
-            "veredas_prj": "tolima_veredas.prj"
-        }
+        drive_files = self._get_file_refs()
 
         # Verificar qué archivos están configurados
-        available_files = {k: v for k, v in shapefile_ids.items() if k in drive_files}
+        available_files = {k: v for k, v in SHAPEFILE_FILES.items() if k in drive_files}
         
         if len(available_files) < 4:  # Mínimo para un shapefile completo
             logger.warning(f"⚠️ Insufficient shapefile IDs configured: {len(available_files)}/8")
             return None
 
+        # Un solo hilo descarga y procesa; los demás reutilizan su resultado
+        with self._geo_lock:
+            geo_version = self._get_shapefiles_version(drive_files, available_files)
+            if geo_version and self._geo_cache.get("version") == geo_version:
+                self._geo_cache["checked_at"] = time.time()
+                return self._geo_cache["data"]
+
+            snapshot_dir = self._get_snapshot_dir("geo_snapshots")
+            geo_data = None
+            if snapshot_dir and geo_version:
+                geo_data = load_geo_snapshot(snapshot_dir, geo_version)
+
+            if geo_data is None:
+                files = {key: (drive_files[key], filename) for key, filename in available_files.items()}
+                if show_progress:
+                    geo_data = self._load_shapefiles_with_progress(files)
+                else:
+                    geo_data = self._fetch_shapefiles(files)
+
+                if geo_data and snapshot_dir and geo_version:
+                    save_geo_snapshot(snapshot_dir, geo_version, geo_data)
+
+            if geo_data and geo_version:
+                self._geo_cache = {
+                    "version": geo_version,
+                    "data": geo_data,
+                    "checked_at": time.time(),
+                }
+            return geo_data
+
+    def _get_shapefiles_version(self, drive_files, available_files):
+        """Versión combinada de las partes del shapefile (None si alguna no responde)."""
+        versions = []
+        for key in sorted(available_files):
+            metadata = self._get_file_metadata(drive_files[key])
+            if not metadata:
+                return None
+            versions.append(f"{key}={metadata['version']}")
+        return "|".join(versions)
+
+    def _fetch_shapefiles(self, files, progress=None):
+        """
+        Descarga y procesa los shapefiles (sin UI).
+
+        Args:
+            files: dict {key: (referencia, filename)}
+            progress: callable(porcentaje, texto) opcional para reportar avance
+        """
+        report = progress or (lambda percent, text: None)
+
         try:
-            with st.container():
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                status_text.text("📥 Descargando archivos de mapas...")
-                
-                downloaded_files = {}
-                total_files = len(available_files)
-                
-                for i, (key, filename) in enumerate(available_files.items()):
-                    file_id = drive_files[key]
-                    downloaded_path = self._download_file(file_id, filename)
-                    
-                    if downloaded_path:
-                        downloaded_files[key] = downloaded_path
-                        progress = int((i + 1) / total_files * 70)
-                        progress_bar.progress(progress)
-                    else:
-                        logger.warning(f"⚠️ Failed to download: {filename}")
+            report(0, "📥 Descargando archivos de mapas...")
+
+            # Descargas concurrentes: el tiempo lo marca el archivo más lento
+            downloaded_files = self._download_files_parallel(
+                files,
+                progress_callback=lambda done, total: report(
+                    int(done / total * 70), "📥 Descargando archivos de mapas..."
+                ),
+            )
 
-                progress_bar.progress(80)
-                status_text.text("🗺️ Procesando mapas...")
+            report(80, "🗺️ Procesando mapas...")
 
-                # Procesar shapefiles descargados
-                geo_data = self._process_shapefiles(downloaded_files)
+            # Procesar shapefiles descargados
+            geo_data = self._process_shapefiles(downloaded_files)
 
-                progress_bar.progress(100)
-                progress_bar.empty()
-                status_text.empty()
+            report(100, "✅ Mapas cargados")
 
-                if geo_data:
-                    logger.info("✅ Shapefiles loaded successfully")
-                    return geo_data
-                else:
-                    logger.error("❌ Failed to process shapefiles")
-                    return None
+            if geo_data:
+                logger.info("✅ Shapefiles loaded successfully")
+                return geo_data
+            else:
+                logger.error("❌ Failed to process shapefiles")
+                return None
 
         except Exception as e:
             logger.error(f"❌ Shapefile loading error: {str(e)}")
             return None
 
+    def _load_shapefiles_with_progress(self, files):
+        """Carga los shapefiles mostrando barra de progreso en la sesión actual."""
+        with st.container():
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+
+            def report(percent, text):
+                progress_bar.progress(percent)
+                status_text.text(text)
+
+            geo_data = self._fetch_shapefiles(files, report)
+
+            progress_bar.empty()
+            status_text.empty()
+            return geo_data
+
     def load_cobertura_data(self):
         """
         Carga datos de cobertura desde Google Drive.
@@ -374,7 +908,7 @@ class ConsolidatedDataLoader:
             logger.warning("⚠️ Google Drive not available for cobertura")
             return None
 
-        drive_files = st.secrets.drive_files
+        drive_files = self._get_file_refs()
         
         # Verificar si existe el archivo de cobertura
         if "cobertura" not in drive_files:
@@ -387,7 +921,7 @@ class ConsolidatedDataLoader:
             # Descargar archivo de cobertura
             cobertura_path = self._download_file(
                 drive_files["cobertura"], 
-                "cobertura_data.xlsx"
+                SOURCE_FILES["cobertura"]
             )
 
             if not cobertura_path:
@@ -415,7 +949,7 @@ class ConsolidatedDataLoader:
             logger.warning("⚠️ Google Drive not available for logo")
             return None
 
-        drive_files = st.secrets.drive_files
+        drive_files = self._get_file_refs()
         
         # Verificar si existe el archivo de logo
         if "logo_gobernacion" not in drive_files:
@@ -428,7 +962,7 @@ class ConsolidatedDataLoader:
             # Descargar imagen de logo
             logo_path = self._download_file(
                 drive_files["logo_gobernacion"], 
-                "logo.png"
+                SOURCE_FILES["logo_gobernacion"]
             )
 
             if logo_path:
@@ -447,10 +981,10 @@ class ConsolidatedDataLoader:
         try:
             # Importar funciones de procesamiento existentes
             from utils.data_processor import (
-                excel_date_to_datetime,
                 process_complete_data_structure_authoritative,
                 process_veredas_dataframe_simple
             )
+            from utils.date_parser import convert_date_columns
             from config.settings import CASOS_COLUMNS_MAP, EPIZOOTIAS_COLUMNS_MAP
 
             # Limpiar datos básicos
@@ -472,16 +1006,9 @@ class ConsolidatedDataLoader:
                 columns={k: v for k, v in EPIZOOTIAS_COLUMNS_MAP.items() if k in epizootias_df.columns}
             )
 
-            # Procesar fechas
-            if "fecha_inicio_sintomas" in casos_df.columns:
-                casos_df["fecha_inicio_sintomas"] = casos_df["fecha_inicio_sintomas"].apply(
-                    excel_date_to_datetime
-                )
-
-            if "fecha_notificacion" in epizootias_df.columns:
-                epizootias_df["fecha_notificacion"] = epizootias_df["fecha_notificacion"].apply(
-                    excel_date_to_datetime
-                )
+            # Procesar fechas (única conversión del pipeline)
+            convert_date_columns(casos_df, ["fecha_inicio_sintomas"])
+            convert_date_columns(epizootias_df, ["fecha_notificacion"])
 
             # Filtrar epizootias (solo positivas + en estudio)
             if "descripcion" in epizootias_df.columns:
@@ -522,7 +1049,7 @@ class ConsolidatedDataLoader:
                 downloaded_files.get(f"municipios_{ext}") 
                 for ext in ["shx", "dbf", "prj"]
             ):
-                geo_data['municipios'] = gpd.read_file(municipios_shp)
+                geo_data['municipios'] = _to_wgs84(gpd.read_file(municipios_shp), "municipios")
                 logger.info(f"✅ Municipios processed: {len(geo_data['municipios'])}")
 
             # Procesar veredas
@@ -531,7 +1058,7 @@ class ConsolidatedDataLoader:
                 downloaded_files.get(f"veredas_{ext}") 
                 for ext in ["shx", "dbf", "prj"]
             ):
-                geo_data['veredas'] = gpd.read_file(veredas_shp)
+                geo_data['veredas'] = _to_wgs84(gpd.read_file(veredas_shp), "veredas")
                 logger.info(f"✅ Veredas processed: {len(geo_data['veredas'])}")
 
             return geo_data if geo_data else None
@@ -542,7 +1069,7 @@ class ConsolidatedDataLoader:
 
     def get_empty_data_structure(self):
         """Retorna estructura de datos vacía para casos de error."""
-        return {
+        return EpiDataset({
             "casos": pd.DataFrame(),
             "epizootias": pd.DataFrame(),
             "municipios_normalizados": [],
@@ -552,7 +1079,7 @@ class ConsolidatedDataLoader:
             "veredas_completas": pd.DataFrame(),
             "regiones": {},
             "data_source": "empty",
-        }
+        })
 
     def get_empty_geo_data(self):
         """Retorna estructura de geodatos vacía."""
@@ -608,11 +1135,19 @@ class ConsolidatedDataLoader:
             **4. Archivos adicionales opcionales:**
             - `cobertura_data.xlsx`: Datos de cobertura de vacunación
             - `logo.png`: Logo institucional para el dashboard
+            
+            **5. Orígenes alternativos (sin Google Drive):**
+            - `DASHBOARD_STORAGE_BACKEND=local` y `DASHBOARD_LOCAL_DATA_DIR=/ruta`:
+              archivos con los nombres anteriores en un directorio local
+            - `DASHBOARD_STORAGE_BACKEND=s3` y `DASHBOARD_S3_BUCKET` (opcional
+              `DASHBOARD_S3_PREFIX`, `DASHBOARD_S3_ENDPOINT_URL`): bucket S3/MinIO, requiere `boto3`
             """)
             
             # Estado actual del sistema
             st.markdown("### 🔍 Estado Actual del Sistema")
             
+            st.info(f"ℹ️ Origen de archivos: {self.backend.name}")
+            
             # Verificar Google libraries
             if GOOGLE_AVAILABLE:
                 st.success("✅ Google libraries disponibles")
@@ -661,6 +1196,255 @@ class ConsolidatedDataLoader:
                 st.error("❌ drive_files no configurado")
 
 
+class DatasetRefresher:
+    """
+    Hilo en segundo plano que consulta modifiedTime en Drive y reconstruye
+    el dataset fuera del camino de los requests. El nuevo dataset se
+    construye completo (doble buffer) y luego se intercambia atómicamente.
+    """
+
+    def __init__(self, loader, interval):
+        self.loader = loader
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._file_versions = {}
+        self.stats = {"checks": 0, "swaps": 0, "prefetches": 0, "errors": 0, "last_check": None}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="dataset_refresher", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"🔁 Refresco en segundo plano activo (cada {self.interval}s)")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        # El dataset recién cargado cuenta como verificado; luego solo los
+        # ciclos exitosos renuevan la confianza de los lectores
+        _dataset_cache.mark_background_check(2 * self.interval)
+        try:
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.refresh_once()
+                    _dataset_cache.mark_background_check(2 * self.interval)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"❌ Error en refresco en segundo plano: {str(e)}")
+        finally:
+            _dataset_cache.clear_background_check()
+
+    def refresh_once(self):
+        """Verifica versiones y actualiza lo que haya cambiado."""
+        self.stats["checks"] += 1
+        self.stats["last_check"] = datetime.now().isoformat(timespec="seconds")
+
+        drive_files = self.loader._get_file_refs()
+
+        # Dataset principal: construir completo y luego intercambiar
+        if "casos_excel" in drive_files:
+            file_id = drive_files["casos_excel"]
+            version = self.loader._get_file_version(file_id)
+            if version and version != _dataset_cache.get_version():
+                logger.info("🔄 Nueva versión de casos_excel, reconstruyendo en segundo plano")
+                rebuilt = _dataset_cache.rebuild(
+                    version,
+                    lambda: self.loader._build_excel_dataset(file_id, version, show_progress=False),
+                )
+                if rebuilt:
+                    self.stats["swaps"] += 1
+                    logger.info("✅ Dataset actualizado en segundo plano")
+
+        # Cobertura y shapefiles: dejar la nueva versión en el caché de descargas
+        prefetch = {"cobertura": SOURCE_FILES["cobertura"], **SHAPEFILE_FILES}
+        shapefiles_changed = False
+        for key, filename in prefetch.items():
+            if key not in drive_files:
+                continue
+            file_id = drive_files[key]
+            # Primera consulta: la base es la versión que ya usó el loader
+            previous = self._file_versions.get(key) or self.loader._get_cached_version(file_id)
+            metadata = self.loader._get_file_metadata(file_id, force=True)
+            if not metadata:
+                continue
+            if previous is None or previous == metadata["version"]:
+                # Sin cambios (o nunca cargado): solo registrar la versión
+                self._file_versions[key] = metadata["version"]
+                continue
+            if self.loader._download_file(file_id, filename, version=metadata["version"]):
+                self._file_versions[key] = metadata["version"]
+                shapefiles_changed |= key in SHAPEFILE_FILES
+                self.stats["prefetches"] += 1
+                logger.info(f"📥 Nueva versión precargada: {filename}")
+
+        # GeoDataFrames: reprocesar fuera del request; los lectores ven la versión anterior
+        if shapefiles_changed:
+            self.loader.load_shapefiles(show_progress=False, force_check=True)
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+def start_background_refresher(loader):
+    """Inicia (una sola vez por proceso) el refresco en segundo plano."""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = DatasetRefresher(loader, CACHE_CONFIG["refresh_interval"])
+        if not _refresher.is_running():
+            _refresher.start()
+    return _refresher
+
+
+class StartupLoader:
+    """
+    Carga inicial concurrente de casos, shapefiles, cobertura y logo.
+    Cada tarea arranca apenas terminan sus dependencias, así la primera página
+    queda lista cuando termina la más lenta y no tras la suma de todas.
+    Las tareas no usan la UI: calientan los cachés compartidos (dataset,
+    GeoDataFrames, descargas) que luego leen las vistas.
+    """
+
+    def __init__(self, tasks, max_workers=4):
+        """
+        Args:
+            tasks: dict {nombre: (callable, [dependencias])}; una tarea cuya
+                dependencia retornó un valor vacío se omite
+        """
+        self._tasks = tasks
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="startup"
+        )
+        self._lock = threading.Lock()
+        self._events = {name: threading.Event() for name in tasks}
+        self._results = {}
+        self._submitted = set()
+        self._started_at = None
+        self.stats = {}
+
+    def start(self):
+        self._started_at = time.time()
+        self._submit_ready()
+
+    def _submit_ready(self):
+        """Lanza las tareas con dependencias resueltas y omite las que no pueden correr."""
+        with self._lock:
+            changed = True
+            while changed:
+                changed = False
+                for name, (func, deps) in self._tasks.items():
+                    if name in self._submitted:
+                        continue
+                    if not all(self._events[dep].is_set() for dep in deps):
+                        continue
+
+                    self._submitted.add(name)
+                    changed = True
+                    if all(self._has_result(dep) for dep in deps):
+                        self._executor.submit(self._run, name, func)
+                    else:
+                        self._finish(name, None, "skipped", 0.0)
+
+            if len(self._submitted) == len(self._tasks):
+                self._executor.shutdown(wait=False)
+
+    def _has_result(self, name):
+        result = self._results.get(name)
+        if isinstance(result, (pd.DataFrame, gpd.GeoDataFrame)):
+            return not result.empty
+        return bool(result)
+
+    def _run(self, name, func):
+        start_time = time.time()
+        status = "ok"
+        try:
+            result = func()
+        except Exception as e:
+            logger.error(f"❌ Startup task '{name}' failed: {str(e)}")
+            result = None
+            status = "error"
+
+        self._finish(name, result, status, time.time() - start_time)
+        self._submit_ready()
+
+    def _finish(self, name, result, status, seconds):
+        self._results[name] = result
+        self.stats[name] = {
+            "status": status,
+            "seconds": round(seconds, 3),
+            "finished_after": round(time.time() - self._started_at, 3),
+        }
+        self._events[name].set()
+
+    def wait(self, name, timeout=None):
+        """
+        Espera a que termine la tarea `name`.
+
+        Returns:
+            Resultado de la tarea o None si no existe, falló o no terminó a tiempo
+        """
+        event = self._events.get(name)
+        if event is None or not event.wait(timeout):
+            return None
+        return self._results.get(name)
+
+    def is_done(self):
+        return all(event.is_set() for event in self._events.values())
+
+
+_startup_loader = None
+_startup_lock = threading.Lock()
+
+def start_startup_loading():
+    """
+    Lanza (una sola vez por proceso) la carga inicial concurrente.
+    Las llamadas normales de las vistas se unen a la carga en curso
+    en vez de repetirla.
+    """
+    global _startup_loader
+    with _startup_lock:
+        if _startup_loader is not None:
+            return _startup_loader
+
+        loader = get_data_loader()
+
+        def load_cobertura():
+            from utils.cobertura_processor import load_cobertura_data_cached
+            return load_cobertura_data_cached()
+
+        _startup_loader = StartupLoader(
+            {
+                "availability": (loader.check_availability, []),
+                "casos": (lambda: loader.load_excel_data(show_progress=False), ["availability"]),
+                "shapefiles": (lambda: loader.load_shapefiles(show_progress=False), ["availability"]),
+                "cobertura": (load_cobertura, ["availability"]),
+                "logo": (loader.load_logo_image, ["availability"]),
+            },
+            max_workers=DOWNLOAD_CONFIG["startup_workers"],
+        )
+        _startup_loader.start()
+        logger.info("🚀 Carga inicial concurrente iniciada")
+        return _startup_loader
+
+def wait_for_startup(name, timeout=None):
+    """
+    Espera la tarea de carga inicial `name` si se lanzó en este proceso.
+
+    Returns:
+        Resultado de la tarea o None
+    """
+    if _startup_loader is None:
+        return None
+    return _startup_loader.wait(name, timeout)
+
+
 # Instancia global del loader
 _data_loader_instance = None
 
@@ -754,6 +1538,25 @@ def load_logo_from_google_drive():
         logger.warning("⚠️ Failed to load logo")
         return None
 
+def get_dataset_cache_stats():
+    """
+    Retorna contadores del caché compartido de datos.
+    
+    Returns:
+        dict: hits, misses, rebuilds, versión y tiempos de construcción
+            (más disponibilidad, descargas y caché de filtros)
+    """
+    stats = _dataset_cache.get_stats()
+    stats["availability"] = _availability.get_stats()
+    stats["filters"] = get_filter_cache().get_stats()
+    if _data_loader_instance is not None:
+        stats["downloads"] = dict(_data_loader_instance._download_metrics)
+    if _startup_loader is not None:
+        stats["startup"] = dict(_startup_loader.stats)
+    if _refresher is not None:
+        stats["refresher"] = dict(_refresher.stats, running=_refresher.is_running())
+    return stats
+
 def check_data_availability():
     """
     Verifica si el sistema de datos está disponible.
@@ -764,6 +1567,26 @@ def check_data_availability():
     loader = get_data_loader()
     return loader.check_availability()
 
+def refresh_data_availability():
+    """
+    Descarta el estado de disponibilidad cacheado y lo verifica de nuevo
+    (ej. después de actualizar secrets).
+
+    Returns:
+        bool: True si está disponible
+    """
+    loader = get_data_loader()
+    return loader.check_availability(force=True)
+
+def get_availability_status():
+    """
+    Retorna el estado de disponibilidad compartido sin verificarlo.
+
+    Returns:
+        dict: disponible, motivo del último fallo, fallos consecutivos y próxima verificación
+    """
+    return _availability.get_stats()
+
 def show_data_setup_instructions():
     """Muestra instrucciones de configuración del sistema."""
     loader = get_data_loader()
@@ -819,7 +1642,7 @@ class GoogleDriveManager:
     def authenticate(self):
         return self.loader._authenticate()
     
-    def download_file(self, file_id, filename, timeout=30):
+    def download_file(self, file_id, filename, timeout=None):
         return self.loader._download_file(file_id, filename, timeout)
     
     def download_shapefiles(self):
@@ -0,0 +1,74 @@
+"""
+Datos sintéticos compartidos por las pruebas: casos y epizootias ya
+procesados (mismas columnas que produce data_processor), con veredas,
+condición final, descripción y fechas faltantes.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_processor import finalize_dataset
+
+MUNICIPIOS = ["IBAGUE", "PLANADAS", "HONDA", "CHAPARRAL"]
+VEREDAS = ["LA ESPERANZA", "EL SALADO", "SAN JUAN"]
+
+
+def _with_missing(rng, values, fraction):
+    """Copia de values con una fracción de posiciones en None."""
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < fraction] = None
+    return values
+
+
+def _dates(rng, n):
+    """Fechas de 2024-2025 con ~10% vacías."""
+    offsets = pd.to_timedelta(rng.integers(0, 400, n), "D")
+    return pd.to_datetime(_with_missing(rng, pd.Timestamp("2024-01-01") + offsets, 0.1))
+
+
+def make_frames(seed=0, n_casos=400, n_epizootias=300):
+    """Tablas de casos y epizootias con ~20-33% de valores faltantes."""
+    rng = np.random.default_rng(seed)
+
+    casos = pd.DataFrame(
+        {
+            "municipio": rng.choice(MUNICIPIOS, n_casos),
+            "vereda": _with_missing(rng, rng.choice(VEREDAS, n_casos), 0.2),
+            "condicion_final": _with_missing(
+                rng, rng.choice(["Vivo", "Fallecido"], n_casos), 0.33
+            ),
+            "sexo": rng.choice(["Masculino", "Femenino"], n_casos),
+            "edad": rng.integers(0, 90, n_casos).astype(float),
+            "fecha_inicio_sintomas": _dates(rng, n_casos),
+        }
+    )
+    epizootias = pd.DataFrame(
+        {
+            "municipio": rng.choice(MUNICIPIOS, n_epizootias),
+            "vereda": _with_missing(rng, rng.choice(VEREDAS, n_epizootias), 0.2),
+            "descripcion": _with_missing(
+                rng, rng.choice(["POSITIVO FA", "EN ESTUDIO", "NEGATIVO FA"], n_epizootias), 0.3
+            ),
+            "fecha_notificacion": _dates(rng, n_epizootias),
+        }
+    )
+    return casos, epizootias
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """EpiDataset finalizado (esquema, índices y cubo) sobre make_frames()."""
+    casos, epizootias = make_frames()
+    return finalize_dataset(
+        {
+            "casos": casos,
+            "epizootias": epizootias,
+            "veredas_completas": pd.DataFrame(
+                [(municipio, vereda) for municipio in MUNICIPIOS for vereda in VEREDAS],
+                columns=["municipi_1", "vereda_nor"],
+            ),
+            "municipios_normalizados": MUNICIPIOS,
+            "veredas_por_municipio": {municipio: VEREDAS for municipio in MUNICIPIOS},
+        }
+    )
@@ -0,0 +1,81 @@
+"""AvailabilityStatus: un solo probe concurrente, backoff y respaldo en caché."""
+
+import threading
+import time
+
+import data_loader
+from data_loader import AvailabilityStatus, ConsolidatedDataLoader, SharedDatasetCache
+
+
+def test_stats_do_not_wait_for_probe():
+    status = AvailabilityStatus()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_probe():
+        started.set()
+        release.wait(5)
+        return True, None
+
+    worker = threading.Thread(target=status.get, args=(slow_probe,))
+    worker.start()
+    assert started.wait(5)
+
+    began = time.perf_counter()
+    stats = status.get_stats()
+    assert time.perf_counter() - began < 0.5
+    assert stats["available"] is None
+
+    release.set()
+    worker.join(5)
+    assert status.get_stats()["available"] is True
+
+
+def test_concurrent_callers_share_one_probe():
+    status = AvailabilityStatus()
+    calls = []
+
+    def probe():
+        calls.append(1)
+        time.sleep(0.2)
+        return False, "test"
+
+    threads = [threading.Thread(target=status.get, args=(probe,)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert status.get_stats()["consecutive_failures"] == 1
+
+
+def test_backoff_doubles_until_max_and_resets_on_success():
+    status = AvailabilityStatus(ttl=300, backoff=10, max_backoff=25)
+    results = [(False, "test")] * 3 + [(True, None)]
+    probe = lambda: results.pop(0)
+
+    delays = []
+    for _ in range(3):
+        status.get(probe, force=True)
+        delays.append(status.get_stats()["next_check_in"])
+    assert [round(delay) for delay in delays] == [10, 20, 25]
+
+    # Dentro del backoff no se vuelve a consultar
+    probes = status.get_stats()["probes"]
+    assert status.get(probe) is False
+    assert status.get_stats()["probes"] == probes
+
+    assert status.get(probe, force=True) is True
+    assert status.get_stats()["consecutive_failures"] == 0
+
+
+def test_failed_probe_serves_warm_dataset(monkeypatch, dataset):
+    cache = SharedDatasetCache()
+    monkeypatch.setattr(data_loader, "_dataset_cache", cache)
+    loader = ConsolidatedDataLoader.__new__(ConsolidatedDataLoader)
+    monkeypatch.setattr(loader, "check_availability", lambda force=False: False)
+
+    assert loader.load_excel_data(show_progress=False) is None
+
+    cache.swap("v1", dataset)
+    assert loader.load_excel_data(show_progress=False) is dataset
@@ -0,0 +1,140 @@
+"""DatasetRefresher: reconstrucción bajo el lock del caché, precarga y respaldo."""
+
+import threading
+import time
+
+import pytest
+
+import data_loader
+from data_loader import SHAPEFILE_FILES, DatasetRefresher, SharedDatasetCache
+
+SHAPEFILE_KEY = next(iter(SHAPEFILE_FILES))
+
+
+class FakeLoader:
+    """Loader mínimo: versiones en memoria y registro de descargas."""
+
+    def __init__(self, versions, loaded=()):
+        self.versions = dict(versions)
+        self.loaded = {key: self.versions[key] for key in loaded}
+        self.builds = []
+        self.downloads = []
+        self.shapefile_loads = 0
+
+    def _get_file_refs(self):
+        return {key: f"id-{key}" for key in self.versions}
+
+    def _get_file_version(self, file_id):
+        return self.versions[file_id[3:]]
+
+    def _get_file_metadata(self, file_id, force=False):
+        return {"version": self.versions[file_id[3:]]}
+
+    def _get_cached_version(self, file_id):
+        return self.loaded.get(file_id[3:])
+
+    def _build_excel_dataset(self, file_id, version, show_progress=True):
+        self.builds.append(version)
+        return {"version": version}
+
+    def _download_file(self, file_id, filename, timeout=None, version=None):
+        self.downloads.append((file_id[3:], version))
+        return f"/tmp/{filename}"
+
+    def load_shapefiles(self, show_progress=True, force_check=False):
+        self.shapefile_loads += 1
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SharedDatasetCache()
+    monkeypatch.setattr(data_loader, "_dataset_cache", cache)
+    return cache
+
+
+def test_first_poll_reuses_loaded_versions(cache):
+    keys = ("casos_excel", "cobertura", SHAPEFILE_KEY)
+    loader = FakeLoader({key: "v1" for key in keys}, loaded=keys)
+    cache.swap("v1", {"version": "v1"})
+
+    refresher = DatasetRefresher(loader, interval=60)
+    refresher.refresh_once()
+
+    assert loader.builds == []
+    assert loader.downloads == []
+    assert loader.shapefile_loads == 0
+
+
+def test_changed_files_are_rebuilt_and_prefetched(cache):
+    keys = ("casos_excel", "cobertura", SHAPEFILE_KEY)
+    loader = FakeLoader({key: "v1" for key in keys}, loaded=keys)
+    cache.swap("v1", {"version": "v1"})
+    refresher = DatasetRefresher(loader, interval=60)
+    refresher.refresh_once()
+
+    loader.versions = {key: "v2" for key in keys}
+    refresher.refresh_once()
+
+    assert loader.builds == ["v2"]
+    assert cache.peek() == {"version": "v2"}
+    assert sorted(loader.downloads) == [("cobertura", "v2"), (SHAPEFILE_KEY, "v2")]
+    assert loader.shapefile_loads == 1
+    assert refresher.stats["swaps"] == 1
+    assert refresher.stats["prefetches"] == 2
+
+
+def test_unloaded_file_only_records_baseline(cache):
+    loader = FakeLoader({"cobertura": "v1"})
+    refresher = DatasetRefresher(loader, interval=60)
+    refresher.refresh_once()
+    assert loader.downloads == []
+
+    loader.versions["cobertura"] = "v2"
+    refresher.refresh_once()
+    assert loader.downloads == [("cobertura", "v2")]
+
+
+def test_rebuild_waits_for_build_lock_and_skips_active_version(cache):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"version": "v2"}
+
+    with cache._build_lock:
+        # Un lector construyó v2 mientras el refresco esperaba el lock
+        worker = threading.Thread(target=cache.rebuild, args=("v2", build))
+        worker.start()
+        time.sleep(0.1)
+        assert worker.is_alive()
+        cache.swap("v2", {"version": "v2"})
+    worker.join(5)
+
+    assert builds == []
+    assert cache.rebuild("v2", build) is False
+    assert cache.rebuild("v3", lambda: {"version": "v3"}) is True
+    assert cache.get_version() == "v3"
+
+
+def test_readers_fall_back_when_background_checks_stop(cache):
+    cache.swap("v1", {"version": "v1"})
+    cache.mark_background_check(ttl=0.1)
+    assert cache.is_background_managed()
+
+    time.sleep(0.15)
+    assert not cache.is_background_managed()
+
+    cache.mark_background_check(ttl=60)
+    cache.clear_background_check()
+    assert not cache.is_background_managed()
+
+
+def test_stopped_refresher_clears_background_check(cache):
+    refresher = DatasetRefresher(FakeLoader({}), interval=0.05)
+    refresher.start()
+    time.sleep(0.02)
+    assert cache.is_background_managed()
+
+    refresher.stop()
+    refresher._thread.join(5)
+    assert not cache.is_background_managed()
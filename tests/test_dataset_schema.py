@@ -0,0 +1,36 @@
+"""Esquema categórico: tipos reducidos sin perder valores."""
+
+import pandas as pd
+
+from utils.dataset_schema import apply_schema, downcast_numeric, to_category
+
+from conftest import MUNICIPIOS, make_frames
+
+
+def test_categories_keep_unknown_values():
+    values = pd.Series(["IBAGUE", None, "NUEVO", "HONDA"])
+    result = to_category(values, ["HONDA", "IBAGUE"])
+
+    assert list(result.cat.categories) == ["HONDA", "IBAGUE", "NUEVO"]
+    assert result.astype(object).where(result.notna(), None).tolist() == [
+        "IBAGUE", None, "NUEVO", "HONDA"
+    ]
+
+
+def test_downcast_numeric():
+    assert downcast_numeric(pd.Series([1, 2, 3])).dtype == "int8"
+    assert downcast_numeric(pd.Series([1.5, None])).dtype == "float32"
+
+
+def test_apply_schema_preserves_values():
+    casos, _ = make_frames(seed=1)
+    result = apply_schema(casos, "casos", {"municipios": MUNICIPIOS, "veredas": []})
+
+    for col in ("municipio", "vereda", "sexo", "condicion_final"):
+        assert isinstance(result[col].dtype, pd.CategoricalDtype)
+        pd.testing.assert_series_equal(
+            result[col].astype(object), casos[col].astype(object), check_names=False
+        )
+    assert (result["edad"] == casos["edad"]).all()
+    # La entrada no se modifica
+    assert not isinstance(casos["municipio"].dtype, pd.CategoricalDtype)
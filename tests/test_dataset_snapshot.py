@@ -0,0 +1,42 @@
+"""Snapshot Parquet y EpiDataset: el dataset sobrevive el viaje sin cambios."""
+
+import pickle
+
+import pandas as pd
+import pytest
+
+from utils.data_processor import finalize_dataset
+from utils.epi_dataset import DERIVED_KEYS, EpiDataset
+
+pytest.importorskip("pyarrow")
+
+from utils.dataset_snapshot import load_snapshot, save_snapshot  # noqa: E402
+
+
+def test_snapshot_round_trip(tmp_path, dataset):
+    assert save_snapshot(tmp_path, "checksum-1", dataset)
+    loaded = load_snapshot(tmp_path, "checksum-1")
+
+    assert not set(DERIVED_KEYS) & set(loaded)
+    for key in ("casos", "epizootias"):
+        pd.testing.assert_frame_equal(loaded[key], dataset[key])
+
+    restored = finalize_dataset(loaded)
+    assert restored.fingerprint == dataset.fingerprint
+    assert load_snapshot(tmp_path, "checksum-2") is None
+
+
+def test_epi_dataset_is_read_only_and_picklable(dataset):
+    with pytest.raises(TypeError):
+        dataset["casos"] = pd.DataFrame()
+
+    clone = pickle.loads(pickle.dumps(dataset))
+    assert isinstance(clone, EpiDataset)
+    assert clone == dataset and hash(clone) == hash(dataset)
+    assert clone["epi_cube"].total("casos") == len(dataset["casos"])
+
+
+def test_fingerprint_tracks_content(dataset):
+    changed = dataset.replace(casos=dataset["casos"].iloc[1:].reset_index(drop=True))
+    assert changed.fingerprint != dataset.fingerprint
+    assert dataset.replace().fingerprint == dataset.fingerprint
@@ -0,0 +1,39 @@
+"""DateIndex: rangos por búsqueda binaria iguales a la comparación de columnas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.date_index import DateIndex
+from utils.filter_engine import filter_positions
+
+START, END = pd.Timestamp("2024-03-01"), pd.Timestamp("2024-09-30")
+
+
+def _frames(dataset):
+    return {"casos": dataset["casos"], "epizootias": dataset["epizootias"]}
+
+
+@pytest.mark.parametrize(
+    "kind,column", [("casos", "fecha_inicio_sintomas"), ("epizootias", "fecha_notificacion")]
+)
+def test_date_index_range_mask_matches_comparison(dataset, kind, column):
+    index = dataset["date_index"]
+    dates = dataset[kind][column]
+
+    for start, end in [(START, END), ("2023-01-01", "2023-12-31"), ("2024-01-01", "2030-01-01")]:
+        expected = ((dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))).to_numpy()
+        np.testing.assert_array_equal(index.range_mask(kind, start, end), expected)
+
+    assert index.bounds(kind) == (dates.min(), dates.max())
+
+
+def test_date_index_is_ignored_for_other_tables(dataset):
+    # Un índice de otra tabla (otra longitud) no debe usarse
+    foreign = DateIndex({"casos": dataset["casos"].iloc[:10]})
+    filters = {"fecha": (START, END)}
+    with_foreign = filter_positions(_frames(dataset), filters, foreign)
+    without = filter_positions(_frames(dataset), filters)
+
+    for kind in without:
+        np.testing.assert_array_equal(with_foreign[kind], without[kind])
@@ -0,0 +1,59 @@
+"""PersistentDownloadCache: reanudación, validación de checksum y desalojo LRU."""
+
+import hashlib
+
+import pytest
+
+from utils.download_cache import PersistentDownloadCache
+
+CONTENT = bytes(range(256)) * 64
+MD5 = hashlib.md5(CONTENT).hexdigest()
+
+
+def test_interrupted_download_resumes_from_partial(tmp_path):
+    cache = PersistentDownloadCache(tmp_path)
+    offsets = []
+
+    def fail_midway(f, offset):
+        offsets.append(offset)
+        f.write(CONTENT[offset:1000])
+        raise TimeoutError("stalled")
+
+    with pytest.raises(TimeoutError):
+        cache.store_resumable("file", "v1", "datos.xlsx", fail_midway, md5_checksum=MD5)
+
+    def finish(f, offset):
+        offsets.append(offset)
+        f.write(CONTENT[offset:])
+
+    path = cache.store_resumable("file", "v1", "datos.xlsx", finish, md5_checksum=MD5)
+
+    assert offsets == [0, 1000]
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert cache.lookup("file", "v1", "datos.xlsx") == path
+    assert cache.lookup("file", "v2", "datos.xlsx") is None
+
+
+def test_checksum_mismatch_is_discarded(tmp_path):
+    cache = PersistentDownloadCache(tmp_path)
+
+    path = cache.store_resumable(
+        "file", "v1", "datos.xlsx", lambda f, offset: f.write(b"corrupto"), md5_checksum=MD5
+    )
+
+    assert path is None
+    assert cache.lookup("file", "v1", "datos.xlsx") is None
+    assert not list((tmp_path / "objects").glob(".partial_*"))
+
+
+def test_eviction_keeps_newest_within_budget(tmp_path):
+    cache = PersistentDownloadCache(tmp_path, max_bytes=len(CONTENT) + 10)
+    write = lambda f, offset: f.write(CONTENT[offset:])
+
+    cache.store_resumable("a", "v1", "a.bin", write)
+    cache.store_resumable("b", "v1", "b.bin", write)
+
+    assert cache.lookup("a", "v1", "a.bin") is None
+    assert cache.lookup("b", "v1", "b.bin") is not None
+    assert cache.get_stats()["evictions"] == 1
@@ -0,0 +1,51 @@
+"""El cubo debe dar las mismas métricas que las filas filtradas."""
+
+import pytest
+
+from utils.data_processor import calculate_basic_metrics, calculate_basic_metrics_from_cube
+from utils.filter_engine import apply_filters
+
+FILTERS = [
+    {},
+    {"municipio": "IBAGUE"},
+    {"municipio": "PLANADAS", "vereda": "EL SALADO"},
+    {"condicion_final": "Fallecido"},
+    {"descripcion": "POSITIVO FA"},
+    {"fecha": ("2024-03-01", "2024-09-30")},
+    {"municipio": ["HONDA", "CHAPARRAL"], "edad": (10, 50)},
+    {"municipio_vereda": (("IBAGUE", "SAN JUAN"), ("HONDA", "LA ESPERANZA"))},
+]
+
+
+def _frames(dataset):
+    return {"casos": dataset["casos"], "epizootias": dataset["epizootias"]}
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_metrics_match_rows(dataset, filters):
+    filtered = apply_filters(_frames(dataset), filters, dataset["date_index"])
+
+    expected = calculate_basic_metrics(filtered["casos"], filtered["epizootias"])
+    actual = calculate_basic_metrics_from_cube(dataset["epi_cube"], filters)
+
+    assert actual == expected
+
+
+def test_missing_keys_are_counted(dataset):
+    cube = dataset["epi_cube"]
+    casos, epizootias = dataset["casos"], dataset["epizootias"]
+
+    # Los faltantes existen y aun así cuentan en los totales agrupados
+    assert casos["vereda"].isna().any() and casos["condicion_final"].isna().any()
+    assert epizootias["descripcion"].isna().any()
+
+    by_vereda = cube.query("casos", {}, by=["vereda", "condicion_final"])
+    assert by_vereda["n"].sum() == len(casos)
+    by_descripcion = cube.query("epizootias", {}, by=["vereda", "descripcion"])
+    assert by_descripcion["n"].sum() == len(epizootias)
+
+
+def test_undated_rows_are_counted(dataset):
+    casos = dataset["casos"]
+    assert casos["fecha_inicio_sintomas"].isna().any()
+    assert dataset["epi_cube"].total("casos") == len(casos)
@@ -0,0 +1,40 @@
+"""Las entradas del caché de filtros se comparten sin que una sesión altere otra."""
+
+import numpy as np
+import pytest
+
+from components.filters import apply_all_filters_multiple
+from utils.filter_cache import FilterResultCache, filter_cache_key, get_filter_cache
+
+LOCATION = {"modo": "single", "municipio_display": "IBAGUE", "vereda_display": "Todas"}
+ADVANCED = {"condicion_final": "Todas", "sexo": "Todos", "edad_rango": None}
+
+
+def test_metrics_are_copied_per_call(dataset):
+    get_filter_cache().clear()
+    first = apply_all_filters_multiple(dataset, LOCATION, {}, ADVANCED)
+    first["metrics"]["total_casos"] = -1
+    first["metrics"].clear()
+
+    second = apply_all_filters_multiple(dataset, LOCATION, {}, ADVANCED)
+    assert second["metrics"]["total_casos"] == len(second["casos"])
+
+
+def test_cached_positions_are_read_only(dataset):
+    get_filter_cache().clear()
+    apply_all_filters_multiple(dataset, LOCATION, {}, ADVANCED)
+    key = filter_cache_key(dataset, {"municipio": "IBAGUE"})
+    entry = get_filter_cache().get_or_compute(key, lambda: pytest.fail("cache miss"))
+
+    with pytest.raises(ValueError):
+        entry["positions"]["casos"][0] = 0
+
+
+def test_lru_is_bounded_by_entries():
+    cache = FilterResultCache(max_bytes=10**9, max_entries=2)
+    entry = lambda: {"positions": {"casos": np.arange(3, dtype=np.int32)}, "metrics": {}}
+    for key in "abc":
+        cache.get_or_compute(key, entry)
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
@@ -0,0 +1,75 @@
+"""Motor de máscaras frente a filtros pandas directos."""
+
+import pandas as pd
+
+from utils.epi_cube import CUBE_SPECS
+from utils.filter_engine import apply_filters, explain_filters, filter_positions
+
+START, END = pd.Timestamp("2024-03-01"), pd.Timestamp("2024-09-30")
+
+
+def _frames(dataset):
+    return {"casos": dataset["casos"], "epizootias": dataset["epizootias"]}
+
+
+def test_filters_match_pandas(dataset):
+    filters = {
+        "municipio": ["IBAGUE", "HONDA"],
+        "condicion_final": "Fallecido",
+        "fecha": (START, END),
+        "edad": (10, 60),
+    }
+    result = apply_filters(_frames(dataset), filters, dataset["date_index"])
+
+    casos = dataset["casos"]
+    fechas = casos["fecha_inicio_sintomas"]
+    expected = casos[
+        casos["municipio"].isin(["IBAGUE", "HONDA"])
+        & (casos["condicion_final"] == "Fallecido")
+        & (fechas >= START)
+        & (fechas <= END)
+        & casos["edad"].between(10, 60)
+    ]
+    pd.testing.assert_frame_equal(result["casos"], expected)
+
+    # Las epizootias no tienen condicion_final ni edad: solo aplican municipio y fecha
+    epizootias = dataset["epizootias"]
+    fechas = epizootias["fecha_notificacion"]
+    expected = epizootias[
+        epizootias["municipio"].isin(["IBAGUE", "HONDA"]) & (fechas >= START) & (fechas <= END)
+    ]
+    pd.testing.assert_frame_equal(result["epizootias"], expected)
+
+
+def test_pair_filter_selects_only_listed_pairs(dataset):
+    pairs = (("IBAGUE", "SAN JUAN"), ("HONDA", "LA ESPERANZA"))
+    result = apply_filters(_frames(dataset), {"municipio_vereda": pairs})
+
+    for df in result.values():
+        assert len(df)
+        assert set(zip(df["municipio"], df["vereda"])) <= set(pairs)
+
+
+def test_explain_trace_ends_at_filtered_size(dataset):
+    filters = {"municipio": "IBAGUE", "fecha": (START, END)}
+    positions = filter_positions(_frames(dataset), filters, dataset["date_index"])
+    trace = explain_filters(_frames(dataset), filters, dataset["date_index"])
+
+    for kind, rows in positions.items():
+        stages = [row for row in trace if row["tabla"] == kind and "restantes" in row]
+        assert stages[0]["etapa"] == "base"
+        assert stages[-1]["restantes"] == len(rows)
+
+
+def test_explain_date_detail_counts_rows_reaching_date_stage(dataset):
+    filters = {"municipio": "IBAGUE", "fecha": (START, END)}
+    trace = explain_filters(_frames(dataset), filters, dataset["date_index"])
+
+    for kind, df in _frames(dataset).items():
+        dates = df.loc[df["municipio"] == "IBAGUE", CUBE_SPECS[kind]["date"]]
+        detail = next(
+            row for row in trace if row["tabla"] == kind and row["etapa"] == "fecha (detalle)"
+        )
+        assert detail["sin_fecha"] == dates.isna().sum()
+        assert detail["antes_rango"] == (dates < START).sum()
+        assert detail["despues_rango"] == (dates > END).sum()
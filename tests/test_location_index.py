@@ -0,0 +1,57 @@
+"""LocationIndex y pair_mask frente a comparaciones directas sobre las columnas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.location_index import location_rows, normalize_location, pair_mask
+
+from conftest import MUNICIPIOS, VEREDAS
+
+
+def _expected(df, municipio=None, vereda=None):
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in (("municipio", municipio), ("vereda", vereda)):
+        if value is not None:
+            mask &= df[col].astype(object).map(normalize_location).eq(normalize_location(value))
+    return df[mask]
+
+
+@pytest.mark.parametrize("kind", ["casos", "epizootias"])
+@pytest.mark.parametrize(
+    "municipio,vereda",
+    [
+        ("IBAGUE", None),
+        (" planadas ", None),
+        (None, "san juan"),
+        ("HONDA", "EL SALADO"),
+        ("NADA", None),
+    ],
+)
+def test_rows_match_column_scan(dataset, kind, municipio, vereda):
+    df = dataset[kind]
+    index = dataset["location_index"]
+
+    expected = _expected(df, municipio, vereda)
+    pd.testing.assert_frame_equal(location_rows(df, kind, municipio, vereda, index), expected)
+
+    # Subconjunto filtrado: conserva las etiquetas de la tabla completa
+    subset = df.iloc[::3]
+    pd.testing.assert_frame_equal(
+        location_rows(subset, kind, municipio, vereda, index),
+        _expected(subset, municipio, vereda),
+    )
+
+
+def test_pair_mask_categorical_matches_object(dataset):
+    casos = dataset["casos"]
+    pairs = [(MUNICIPIOS[0], VEREDAS[1]), (MUNICIPIOS[2], VEREDAS[0]), ("NADA", VEREDAS[0])]
+
+    categorical = pair_mask(casos["municipio"], casos["vereda"], pairs)
+    plain = pair_mask(casos["municipio"].astype(object), casos["vereda"].astype(object), pairs)
+
+    assert isinstance(casos["vereda"].dtype, pd.CategoricalDtype)
+    np.testing.assert_array_equal(categorical, plain)
+    assert categorical.any()
+    # Filas sin vereda nunca coinciden
+    assert not categorical[casos["vereda"].isna().to_numpy()].any()
@@ -0,0 +1,57 @@
+"""Contadores del mapa: el cubo y las filas filtradas deben coincidir."""
+
+import pandas as pd
+import pytest
+
+from config.colors import COLORS
+from vistas import mapas
+from vistas.mapas import count_by_location_key, count_by_location_key_from_cube, strip_name
+from utils.filter_engine import apply_filters
+
+FILTERS = [
+    {},
+    {"condicion_final": "Fallecido"},
+    {"fecha": ("2024-02-01", "2024-12-31")},
+    {"municipio": ["IBAGUE", "PLANADAS"], "descripcion": "EN ESTUDIO"},
+]
+
+
+@pytest.mark.parametrize(
+    "columns,normalize", [(("municipio",), None), (("municipio", "vereda"), strip_name)]
+)
+@pytest.mark.parametrize("filters", FILTERS)
+def test_cube_counts_match_rows(dataset, filters, columns, normalize):
+    frames = {"casos": dataset["casos"], "epizootias": dataset["epizootias"]}
+    filtered = apply_filters(frames, filters, dataset["date_index"])
+    options = {"columns": columns, **({"normalize": normalize} if normalize else {})}
+
+    expected = count_by_location_key(filtered["casos"], filtered["epizootias"], **options)
+    actual = count_by_location_key_from_cube(dataset["epi_cube"], filters, **options)
+
+    pd.testing.assert_frame_equal(
+        actual.sort_index(), expected.sort_index(), check_index_type=False
+    )
+
+
+def test_municipio_counts_include_rows_without_vereda(dataset):
+    counts = count_by_location_key_from_cube(dataset["epi_cube"], {})
+    casos = dataset["casos"]
+
+    assert counts["casos"].sum() == len(casos)
+    assert counts.loc["IBAGUE", "casos"] == (casos["municipio"] == "IBAGUE").sum()
+
+
+def test_vereda_error_fallback_fills_zero_counts(monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError("test")
+
+    monkeypatch.setattr(mapas, "prepare_vereda_data_epidemiological_simplified", fail)
+    veredas = pd.DataFrame({"vereda_nor": ["LA ESPERANZA", "EL SALADO"]}, index=[7, 3])
+
+    result = mapas.safe_data_preparation_with_debug(
+        pd.DataFrame(), pd.DataFrame(), veredas, "IBAGUE", COLORS, "Epidemiológico"
+    )
+
+    assert list(result.index) == [7, 3]
+    assert (result[["casos", "epizootias"]] == 0).all().all()
+    assert (result["descripcion_color"] == "Error en procesamiento").all()
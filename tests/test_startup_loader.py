@@ -0,0 +1,81 @@
+"""StartupLoader: dependencias, tareas omitidas y esperas acotadas."""
+
+import threading
+import time
+
+import data_loader
+from config.settings import DOWNLOAD_CONFIG
+from data_loader import StartupLoader
+from utils import cobertura_processor
+
+
+def test_tasks_start_after_their_dependencies():
+    order = []
+
+    def task(name, result=True):
+        def run():
+            order.append(name)
+            return result
+        return run
+
+    loader = StartupLoader(
+        {
+            "availability": (task("availability"), []),
+            "casos": (task("casos"), ["availability"]),
+            "mapas": (task("mapas"), ["availability", "casos"]),
+        }
+    )
+    loader.start()
+
+    assert loader.wait("mapas", timeout=5) is True
+    assert order == ["availability", "casos", "mapas"]
+    assert loader.is_done()
+
+
+def test_empty_or_failed_dependency_skips_dependents():
+    def fail():
+        raise RuntimeError("boom")
+
+    loader = StartupLoader(
+        {
+            "availability": (lambda: False, []),
+            "casos": (lambda: "datos", ["availability"]),
+            "logo": (fail, []),
+            "pie": (lambda: "ok", ["logo"]),
+        }
+    )
+    loader.start()
+
+    assert loader.wait("casos", timeout=5) is None
+    assert loader.wait("pie", timeout=5) is None
+    assert loader.stats["casos"]["status"] == "skipped"
+    assert loader.stats["logo"]["status"] == "error"
+    assert loader.stats["pie"]["status"] == "skipped"
+
+
+def test_wait_times_out_while_task_runs():
+    release = threading.Event()
+    loader = StartupLoader({"lenta": (lambda: release.wait(5), [])})
+    loader.start()
+
+    began = time.perf_counter()
+    assert loader.wait("lenta", timeout=0.1) is None
+    assert time.perf_counter() - began < 1
+    assert loader.wait("desconocida", timeout=0.1) is None
+
+    release.set()
+    assert loader.wait("lenta", timeout=5) is True
+
+
+def test_cobertura_falls_back_when_startup_stalls(monkeypatch):
+    release = threading.Event()
+    startup = StartupLoader({"cobertura": (lambda: release.wait(5), [])})
+    startup.start()
+    monkeypatch.setattr(data_loader, "_startup_loader", startup)
+    monkeypatch.setitem(DOWNLOAD_CONFIG, "startup_wait_timeout", 0.1)
+    monkeypatch.setattr(cobertura_processor, "load_cobertura_data_cached", lambda: "directo")
+
+    began = time.perf_counter()
+    assert cobertura_processor.load_and_process_cobertura_data() == "directo"
+    assert time.perf_counter() - began < 1
+    release.set()
@@ -0,0 +1,194 @@
+"""Backends de almacenamiento: referencias, metadatos y descargas reanudables."""
+
+import io
+import os
+import re
+from datetime import datetime, timezone
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from utils import storage_backends
+from utils.storage_backends import (
+    GoogleDriveBackend,
+    LocalDirectoryBackend,
+    S3Backend,
+    create_storage_backend,
+)
+
+CONTENT = bytes(range(256)) * 40
+
+
+class FakeDriveHttp:
+    """Responde peticiones Range como Drive (206) o ignorándolas (200)."""
+
+    def __init__(self, content, honor_range=True):
+        self.content = content
+        self.honor_range = honor_range
+        self.ranges = []
+
+    def request(self, uri, method, headers=None):
+        start, end = map(int, re.fullmatch(r"bytes=(\d+)-(\d+)", headers["range"]).groups())
+        self.ranges.append((start, end))
+        if not self.honor_range:
+            return httplib2.Response({"status": 200}), self.content
+        if start >= len(self.content):
+            return httplib2.Response({"status": 416}), b""
+        block = self.content[start : end + 1]
+        headers = {
+            "status": 206,
+            "content-range": f"bytes {start}-{start + len(block) - 1}/{len(self.content)}",
+        }
+        return httplib2.Response(headers), block
+
+
+class FakeDriveService:
+    def files(self):
+        return self
+
+    def get_media(self, fileId):
+        return type("Request", (), {"uri": f"https://drive.test/{fileId}?alt=media"})()
+
+
+def _drive_backend(monkeypatch, http):
+    backend = GoogleDriveBackend()
+    monkeypatch.setattr(backend, "_get_service", lambda: FakeDriveService())
+    monkeypatch.setattr(backend, "_get_download_http", lambda timeout: http)
+    return backend
+
+
+def test_drive_downloads_in_ranged_chunks(monkeypatch):
+    http = FakeDriveHttp(CONTENT)
+    backend = _drive_backend(monkeypatch, http)
+    out, progress = io.BytesIO(), []
+
+    backend.write_to("abc", out, chunk_size=4096, on_progress=progress.append)
+
+    assert out.getvalue() == CONTENT
+    assert http.ranges == [(0, 4095), (4096, 8191), (8192, 12287)]
+    assert progress == [4096, 8192, len(CONTENT)]
+
+
+def test_drive_resumes_from_offset(monkeypatch):
+    http = FakeDriveHttp(CONTENT)
+    backend = _drive_backend(monkeypatch, http)
+    out = io.BytesIO()
+
+    backend.write_to("abc", out, offset=5000, chunk_size=4096)
+
+    assert out.getvalue() == CONTENT[5000:]
+    assert http.ranges[0] == (5000, 9095)
+
+
+def test_drive_complete_partial_gets_416(monkeypatch):
+    http = FakeDriveHttp(CONTENT)
+    backend = _drive_backend(monkeypatch, http)
+    out = io.BytesIO()
+
+    backend.write_to("abc", out, offset=len(CONTENT), chunk_size=4096)
+
+    assert out.getvalue() == b""
+    assert http.ranges == [(len(CONTENT), len(CONTENT) + 4095)]
+
+
+def test_drive_without_range_support(monkeypatch):
+    # Desde el inicio, un 200 trae el archivo completo
+    out = io.BytesIO()
+    _drive_backend(monkeypatch, FakeDriveHttp(CONTENT, honor_range=False)).write_to(
+        "abc", out, chunk_size=4096
+    )
+    assert out.getvalue() == CONTENT
+
+    # Reanudando, un 200 repetiría el archivo desde el byte 0: no se escribe
+    out = io.BytesIO()
+    with pytest.raises(HttpError):
+        _drive_backend(monkeypatch, FakeDriveHttp(CONTENT, honor_range=False)).write_to(
+            "abc", out, offset=5000, chunk_size=4096
+        )
+    assert out.getvalue() == b""
+
+
+def test_local_backend_refs_metadata_and_resume(tmp_path):
+    (tmp_path / "casos.xlsx").write_bytes(CONTENT)
+    backend = LocalDirectoryBackend(tmp_path, {"casos_excel": "casos.xlsx", "logo": "logo.png"})
+
+    assert backend.check() == (True, None)
+    refs = backend.get_file_refs()
+    assert refs == {"casos_excel": str(tmp_path / "casos.xlsx")}
+
+    version = backend.get_metadata(refs["casos_excel"])["version"]
+    out = io.BytesIO()
+    backend.write_to(refs["casos_excel"], out, offset=100, chunk_size=1000)
+    assert out.getvalue() == CONTENT[100:]
+
+    (tmp_path / "casos.xlsx").write_bytes(CONTENT[:10])
+    os.utime(tmp_path / "casos.xlsx", ns=(0, 1))
+    assert backend.get_metadata(refs["casos_excel"])["version"] != version
+
+    assert LocalDirectoryBackend(tmp_path / "no_existe", {}).check() == (False, "local_dir")
+
+
+class FakeS3Client:
+    def __init__(self, etag):
+        self.etag = etag
+        self.ranges = []
+
+    def head_object(self, Bucket, Key):
+        return {
+            "ETag": f'"{self.etag}"',
+            "ContentLength": len(CONTENT),
+            "LastModified": datetime(2025, 1, 1, tzinfo=timezone.utc),
+        }
+
+    def get_object(self, Bucket, Key, Range):
+        self.ranges.append(Range)
+        start = int(Range[len("bytes=") : -1])
+        body = CONTENT[start:]
+        chunks = lambda chunk_size: (
+            body[i : i + chunk_size] for i in range(0, len(body), chunk_size)
+        )
+        return {"Body": type("Body", (), {"iter_chunks": staticmethod(chunks)})()}
+
+
+@pytest.mark.parametrize("etag,md5", [("d41d8cd9", "d41d8cd9"), ("d41d8cd9-3", None)])
+def test_s3_metadata_and_ranged_read(monkeypatch, etag, md5):
+    client = FakeS3Client(etag)
+    timeouts = []
+    backend = S3Backend("bucket", {"casos_excel": "casos.xlsx"}, prefix="/datos/")
+
+    def get_client(read_timeout=None):
+        timeouts.append(read_timeout)
+        return client
+
+    monkeypatch.setattr(backend, "_get_client", get_client)
+
+    assert backend.get_file_refs() == {"casos_excel": "datos/casos.xlsx"}
+    metadata = backend.get_metadata("datos/casos.xlsx")
+    assert metadata.get("md5Checksum") == md5
+    assert metadata["size"] == str(len(CONTENT))
+
+    out = io.BytesIO()
+    backend.write_to("datos/casos.xlsx", out, offset=4000, chunk_size=1024, timeout=30)
+    assert out.getvalue() == CONTENT[4000:]
+    assert client.ranges == ["bytes=4000-"]
+    assert timeouts[-1] == 30
+
+
+def test_s3_check_without_boto3(monkeypatch):
+    monkeypatch.setattr(storage_backends, "BOTO3_AVAILABLE", False)
+    assert S3Backend("bucket", {}).check() == (False, "boto3")
+
+
+@pytest.mark.parametrize(
+    "config,expected",
+    [
+        ({"backend": "local", "local_dir": "/tmp"}, LocalDirectoryBackend),
+        ({"backend": "S3", "s3_bucket": "bucket"}, S3Backend),
+        ({"backend": "drive"}, GoogleDriveBackend),
+        ({"backend": "ftp"}, GoogleDriveBackend),
+        ({}, GoogleDriveBackend),
+    ],
+)
+def test_create_storage_backend(config, expected):
+    assert type(create_storage_backend(config, {})) is expected
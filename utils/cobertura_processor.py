@@ -25,13 +25,51 @@ GRUPOS_EDAD = {
 
 # ===== FUNCIONES PRINCIPALES SIMPLIFICADAS =====
 
-@st.cache_data(ttl=3600)
 def load_and_process_cobertura_data():
+    """
+    Datos de cobertura procesados. Si la carga inicial concurrente los está
+    preparando, espera ese resultado en vez de repetir la descarga; si no
+    termina a tiempo, los carga directamente.
+    """
+    try:
+        from data_loader import wait_for_startup
+        from config.settings import DOWNLOAD_CONFIG
+        wait_for_startup("cobertura", timeout=DOWNLOAD_CONFIG["startup_wait_timeout"])
+    except ImportError:
+        pass
+
+    return load_cobertura_data_cached()
+
+def load_cobertura_data_cached():
+    """
+    Datos de cobertura de la versión actual del archivo en el origen.
+    El caché se indexa por versión: una versión nueva (p. ej. la que precarga
+    el refresco en segundo plano) se procesa en la siguiente lectura.
+    """
+    return _load_cobertura_data_version(_get_cobertura_version())
+
+def _get_cobertura_version():
+    """Versión del archivo de cobertura (metadatos con caché corto) o None."""
+    try:
+        from data_loader import get_data_loader
+
+        loader = get_data_loader()
+        file_id = loader._get_file_refs().get("cobertura")
+        if not file_id:
+            return None
+        metadata = loader._get_file_metadata(file_id)
+        return metadata["version"] if metadata else None
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo verificar versión de cobertura: {str(e)}")
+        return None
+
+@st.cache_data(ttl=3600, max_entries=2)
+def _load_cobertura_data_version(version):
     """✅ CORREGIDO: Función principal simplificada."""
     try:
         logger.info("🚀 Cargando datos de cobertura (simplificado)")
         
-        file_path = load_cobertura_from_google_drive_fixed()
+        file_path = load_cobertura_from_google_drive_fixed(version)
         if not file_path:
             logger.error("❌ No se pudo cargar archivo de cobertura")
             return None
@@ -46,24 +84,29 @@ def load_and_process_cobertura_data():
         logger.error(f"❌ Error en carga de cobertura: {str(e)}")
         return None
 
-def load_cobertura_from_google_drive_fixed():
+def load_cobertura_from_google_drive_fixed(version=None):
     """✅ CORREGIDO: Interfaz arreglada con ConsolidatedDataLoader."""
     try:
         from data_loader import get_data_loader
+        from config.settings import SOURCE_FILES
         
-        if not hasattr(st.secrets, "drive_files") or "cobertura" not in st.secrets.drive_files:
+        loader = get_data_loader()
+        file_refs = loader._get_file_refs()
+
+        if "cobertura" not in file_refs:
             logger.error("❌ ID de cobertura no encontrado en secrets")
             return None
-            
-        loader = get_data_loader()
         
         # ✅ CORREGIDO: Usar _authenticate() en lugar de authenticate()
         if not loader._authenticate():
             logger.error("❌ No se pudo autenticar Google Drive")
             return None
             
-        cobertura_file_id = st.secrets.drive_files["cobertura"]
-        temp_path = loader._download_file(cobertura_file_id, "Cobertura.xlsx")
+        cobertura_file_id = file_refs["cobertura"]
+        # Mismo nombre que la precarga del refresco: comparten entrada en el caché
+        temp_path = loader._download_file(
+            cobertura_file_id, SOURCE_FILES["cobertura"], version=version
+        )
         
         if temp_path:
             logger.info("✅ Archivo de cobertura descargado")
@@ -6,10 +6,19 @@ Los nombres ya coinciden exactamente, eliminado código de normalización innece
 import pandas as pd
 import numpy as np
 import logging
+from collections.abc import Mapping
 from datetime import datetime
 from pathlib import Path
 
 from utils.name_normalizer import normalize_name, validate_municipio_name
+from utils.excel_reader import read_workbook_sheets
+from utils.date_parser import convert_date_columns
+from utils.dataset_schema import enforce_dataset_schema
+from utils.location_index import attach_location_index, location_rows
+from utils.date_index import attach_date_index
+from utils.epi_cube import attach_epi_cube
+from utils.epi_dataset import EpiDataset
+from config.settings import VEREDAS_COLUMNS
 
 logger = logging.getLogger(__name__)
 
@@ -37,17 +46,8 @@ def excel_date_to_datetime(excel_date):
             if not excel_date or excel_date.lower() in ["nan", "none", "null"]:
                 return None
 
-            # ✅ FORMATO PRINCIPAL: DD/MM/YYYY
-            # Ejemplos: "22/07/2025", "05/04/2025", "31/12/2024"
-            try:
-                fecha_convertida = datetime.strptime(excel_date, "%d/%m/%Y")
-                logger.debug(f"✅ Fecha convertida DD/MM/YYYY: '{excel_date}' → {fecha_convertida}")
-                return fecha_convertida
-            except ValueError:
-                pass
-
-            # ✅ FORMATO ALTERNATIVO: D/M/YYYY (sin ceros iniciales)
-            # Ejemplos: "5/4/2025", "22/7/2025"
+            # ✅ FORMATO PRINCIPAL: DD/MM/YYYY (también D/M/YYYY sin ceros iniciales)
+            # Ejemplos: "22/07/2025", "05/04/2025", "5/4/2025"
             try:
                 fecha_convertida = datetime.strptime(excel_date, "%d/%m/%Y")
                 logger.debug(f"✅ Fecha convertida D/M/YYYY: '{excel_date}' → {fecha_convertida}")
@@ -249,18 +249,18 @@ def load_complete_veredas_list_authoritative(data_dir=None):
             try:
                 logger.info(f"📁 Intentando cargar desde: {path}")
 
-                # Verificar que la hoja "VEREDAS" existe
-                excel_file = pd.ExcelFile(path)
+                # Una sola apertura del libro, solo columnas de la hoja VEREDAS
+                sheets, available_sheets = read_workbook_sheets(
+                    path, {"VEREDAS": VEREDAS_COLUMNS}
+                )
 
-                if "VEREDAS" in excel_file.sheet_names:
-                    veredas_df = pd.read_excel(
-                        path, sheet_name="VEREDAS", engine="openpyxl"
-                    )
+                if "VEREDAS" in sheets:
+                    veredas_df = sheets["VEREDAS"]
                     logger.info(f"✅ Hoja VEREDAS cargada desde {path}")
                     break
                 else:
                     logger.warning(f"⚠️ Hoja 'VEREDAS' no encontrada en {path}")
-                    logger.info(f"📋 Hojas disponibles: {excel_file.sheet_names}")
+                    logger.info(f"📋 Hojas disponibles: {available_sheets}")
 
             except Exception as e:
                 logger.warning(f"⚠️ Error cargando {path}: {str(e)}")
@@ -305,31 +305,19 @@ def process_veredas_dataframe_simple(veredas_df):
     veredas_df["municipi_1"] = veredas_df["municipi_1"].str.strip()
     veredas_df["vereda_nor"] = veredas_df["vereda_nor"].str.strip()
 
-    # Crear estructuras de datos usando nombres exactos
-    veredas_por_municipio = {}
-    municipios_authoritativos = sorted(veredas_df["municipi_1"].unique())
-
-    for municipio in municipios_authoritativos:
-        veredas_municipio = veredas_df[veredas_df["municipi_1"] == municipio]
-        veredas_lista = sorted(veredas_municipio["vereda_nor"].unique())
-        veredas_por_municipio[municipio] = veredas_lista
+    # Estructuras jerárquicas en una sola pasada
+    jerarquia = build_location_hierarchy(
+        veredas_df, "municipi_1", "vereda_nor", region_col="region"
+    )
+    municipios_authoritativos = jerarquia["municipios"]
+    veredas_por_municipio = jerarquia["veredas_por_municipio"]
+    vereda_display_map = jerarquia["vereda_display_map"]
+    regiones = jerarquia["regiones"]
 
     # Crear mapeo display (nombres exactos = nombres display)
     municipio_display_map = {
         municipio: municipio for municipio in municipios_authoritativos
     }
-    vereda_display_map = {}
-
-    for _, row in veredas_df.iterrows():
-        municipio = row["municipi_1"]
-        vereda = row["vereda_nor"]
-        vereda_key = f"{municipio}|{vereda}"
-        vereda_display_map[vereda_key] = vereda
-
-    # Extraer regiones si están disponibles
-    regiones = {}
-    if "region" in veredas_df.columns:
-        regiones = get_regiones_from_dataframe_simple(veredas_df)
 
     logger.info(
         f"✅ HOJA VEREDAS procesada: {len(municipios_authoritativos)} municipios, {len(veredas_df)} veredas"
@@ -351,18 +339,66 @@ def get_regiones_from_dataframe_simple(veredas_df):
     if "region" not in veredas_df.columns:
         return {}
 
-    regiones = {}
-
-    for region in veredas_df["region"].dropna().unique():
-        municipios_region = veredas_df[veredas_df["region"] == region][
-            "municipi_1"
-        ].unique()
-        regiones[region] = sorted(municipios_region)
+    regiones = build_location_hierarchy(
+        veredas_df, "municipi_1", "vereda_nor", region_col="region"
+    )["regiones"]
 
     logger.info(f"🗺️ Regiones extraídas: {list(regiones.keys())}")
     return regiones
 
 
+def build_location_hierarchy(df, municipio_col, vereda_col, region_col=None):
+    """
+    Construye todas las búsquedas jerárquicas de ubicación con un solo
+    drop_duplicates/sort y un groupby por nivel (lineal en el catálogo).
+
+    Returns:
+        dict: municipios (ordenados), veredas_por_municipio {municipio: [veredas]},
+              vereda_display_map {"municipio|vereda": vereda} y
+              regiones {region: [municipios]} si existe region_col
+    """
+    municipios = df[municipio_col].dropna()
+    pares = (
+        df[[municipio_col, vereda_col]]
+        .dropna()
+        .drop_duplicates()
+        .sort_values([municipio_col, vereda_col])
+    )
+
+    veredas_por_municipio = {
+        municipio: veredas.tolist()
+        for municipio, veredas in pares.groupby(
+            municipio_col, sort=False, observed=True
+        )[vereda_col]
+    }
+    for municipio in municipios.unique():
+        veredas_por_municipio.setdefault(municipio, [])
+
+    hierarchy = {
+        "municipios": sorted(veredas_por_municipio),
+        "veredas_por_municipio": veredas_por_municipio,
+        "vereda_display_map": {
+            f"{municipio}|{vereda}": vereda
+            for municipio, vereda in zip(pares[municipio_col], pares[vereda_col])
+        },
+        "regiones": {},
+    }
+
+    if region_col and region_col in df.columns:
+        por_region = (
+            df[[region_col, municipio_col]]
+            .dropna()
+            .drop_duplicates()
+            .groupby(region_col, sort=False, observed=True)[municipio_col]
+        )
+        hierarchy["regiones"] = {
+            region: sorted(municipios_region.tolist())
+            for region, municipios_region in por_region
+        }
+
+    return hierarchy
+
+
 def create_emergency_fallback():
     """Fallback de emergencia si no se puede cargar hoja VEREDAS."""
     logger.error("🚨 USANDO FALLBACK DE EMERGENCIA")
@@ -537,13 +573,8 @@ def process_complete_data_structure_authoritative(
         "data_source": data_source,  # ✅ Esto será "hoja_veredas_simple" en lugar de "emergency_fallback"
     }
 
-    # Agregar funciones de manejo simplificadas
-    resultado["handle_empty_area"] = handle_empty_area_filter_simple
-    resultado["validate_location"] = (
-        lambda municipio, vereda: validate_location_exists_simple(
-            municipio, vereda, resultado
-        )
-    )
+    # Esquema, índices derivados y contenedor inmutable
+    resultado = finalize_dataset(resultado)
 
     logger.info(f"✅ Estructura SIMPLIFICADA completada con {data_source}")
     logger.info(
@@ -553,6 +584,26 @@ def process_complete_data_structure_authoritative(
     return resultado
 
 
+def finalize_dataset(resultado):
+    """
+    Aplica el esquema, construye las estructuras derivadas y congela el
+    resultado en un EpiDataset. Camino común para Excel y snapshot.
+    """
+    # Columnas categóricas y numéricas reducidas (config.DATASET_SCHEMA)
+    enforce_dataset_schema(resultado)
+
+    # Filas por municipio / vereda para búsquedas O(1) en las vistas
+    attach_location_index(resultado)
+
+    # Orden por fecha para resolver rangos con búsqueda binaria
+    attach_date_index(resultado)
+
+    # Conteos pre-agregados para tarjetas, tablas, mapas y series mensuales
+    attach_epi_cube(resultado)
+
+    return EpiDataset(resultado)
+
+
 def validate_data_simple(casos_df, epizootias_df, municipios_authoritativos):
     """Validación simplificada de datos."""
     reporte = {
@@ -595,47 +646,30 @@ def validate_data_simple(casos_df, epizootias_df, municipios_authoritativos):
 
 def get_unique_locations_simple(casos_df, epizootias_df):
     """Obtiene ubicaciones únicas."""
-    locations = {"municipios": set(), "veredas_por_municipio": {}}
-
-    # Obtener municipios únicos
-    if "municipio" in casos_df.columns:
-        municipios_casos = casos_df["municipio"].dropna().unique()
-        locations["municipios"].update(municipios_casos)
-
-    if "municipio" in epizootias_df.columns:
-        municipios_epizootias = epizootias_df["municipio"].dropna().unique()
-        locations["municipios"].update(municipios_epizootias)
-
-    locations["municipios"] = sorted(list(locations["municipios"]))
-
-    # Obtener veredas por municipio
-    for municipio in locations["municipios"]:
-        veredas = set()
-
-        if "vereda" in casos_df.columns:
-            veredas_casos = (
-                casos_df[casos_df["municipio"] == municipio]["vereda"].dropna().unique()
-            )
-            veredas.update(veredas_casos)
-
-        if "vereda" in epizootias_df.columns:
-            veredas_epi = (
-                epizootias_df[epizootias_df["municipio"] == municipio]["vereda"]
-                .dropna()
-                .unique()
-            )
-            veredas.update(veredas_epi)
+    frames = [
+        df.reindex(columns=["municipio", "vereda"]).astype(object)
+        for df in (casos_df, epizootias_df)
+        if "municipio" in df.columns
+    ]
+    if not frames:
+        return {"municipios": [], "veredas_por_municipio": {}}
 
-        locations["veredas_por_municipio"][municipio] = sorted(list(veredas))
+    jerarquia = build_location_hierarchy(
+        pd.concat(frames, ignore_index=True), "municipio", "vereda"
+    )
 
-    return locations
+    return {
+        "municipios": jerarquia["municipios"],
+        "veredas_por_municipio": jerarquia["veredas_por_municipio"],
+    }
 
 
 def handle_empty_area_filter_simple(
-    municipio=None, vereda=None, casos_df=None, epizootias_df=None
+    municipio=None, vereda=None, casos_df=None, epizootias_df=None, location_index=None
 ):
     """
     Maneja el filtrado de áreas sin datos.
+    Con location_index las filas del área se obtienen sin recorrer las tablas.
     """
     logger.info(f"🎯 Manejando filtro área sin datos: {municipio}, {vereda}")
 
@@ -645,42 +679,16 @@ def handle_empty_area_filter_simple(
     if epizootias_df is None:
         epizootias_df = pd.DataFrame()
 
-    # Aplicar filtros
-    casos_filtrados = casos_df.copy() if not casos_df.empty else pd.DataFrame()
-    epizootias_filtradas = (
-        epizootias_df.copy() if not epizootias_df.empty else pd.DataFrame()
-    )
-
-    # Filtrar por municipio si se especifica
-    if municipio and municipio != "Todos":
-        if not casos_filtrados.empty and "municipio" in casos_filtrados.columns:
-            casos_filtrados = casos_filtrados[casos_filtrados["municipio"] == municipio]
-        else:
-            casos_filtrados = pd.DataFrame()
-
-        if (
-            not epizootias_filtradas.empty
-            and "municipio" in epizootias_filtradas.columns
-        ):
-            epizootias_filtradas = epizootias_filtradas[
-                epizootias_filtradas["municipio"] == municipio
-            ]
-        else:
-            epizootias_filtradas = pd.DataFrame()
+    municipio_key = municipio if municipio and municipio != "Todos" else None
+    vereda_key = vereda if vereda and vereda != "Todas" else None
 
-    # Filtrar por vereda si se especifica
-    if vereda and vereda != "Todas":
-        if not casos_filtrados.empty and "vereda" in casos_filtrados.columns:
-            casos_filtrados = casos_filtrados[casos_filtrados["vereda"] == vereda]
-        else:
-            casos_filtrados = pd.DataFrame()
-
-        if not epizootias_filtradas.empty and "vereda" in epizootias_filtradas.columns:
-            epizootias_filtradas = epizootias_filtradas[
-                epizootias_filtradas["vereda"] == vereda
-            ]
-        else:
-            epizootias_filtradas = pd.DataFrame()
+    # Aplicar filtros
+    casos_filtrados = location_rows(
+        casos_df, "casos", municipio_key, vereda_key, location_index
+    ).copy()
+    epizootias_filtradas = location_rows(
+        epizootias_df, "epizootias", municipio_key, vereda_key, location_index
+    ).copy()
 
     # Crear métricas con ceros para áreas sin datos
     metrics_with_zeros = create_zero_metrics_for_area(municipio, vereda)
@@ -874,6 +882,69 @@ def calculate_basic_metrics(casos_df, epizootias_df, handle_empty=True):
 
     return metrics
 
+def calculate_basic_metrics_from_cube(cube, cube_filters, kinds=("casos", "epizootias")):
+    """
+    Mismas métricas que calculate_basic_metrics, leídas del cubo pre-agregado.
+
+    Args:
+        kinds: tablas a incluir; las demás se reportan en cero
+    """
+    casos = (
+        cube.query("casos", cube_filters, by=["municipio", "vereda", "condicion_final"])
+        if "casos" in kinds
+        else pd.DataFrame(columns=["municipio", "vereda", "condicion_final", "n", "fecha_max", "fila_max"])
+    )
+    epizootias = (
+        cube.query("epizootias", cube_filters, by=["municipio", "vereda", "descripcion"])
+        if "epizootias" in kinds
+        else pd.DataFrame(columns=["municipio", "vereda", "descripcion", "n", "fecha_max", "fila_max"])
+    )
+
+    total_casos = int(casos["n"].sum())
+    total_epizootias = int(epizootias["n"].sum())
+    if total_casos == 0 and total_epizootias == 0:
+        return create_zero_metrics_for_area(None, None)
+
+    fallecidos = int(casos.loc[casos["condicion_final"] == "Fallecido", "n"].sum())
+    vivos = int(casos.loc[casos["condicion_final"] == "Vivo", "n"].sum())
+    positivas_df = epizootias[epizootias["descripcion"] == "POSITIVO FA"]
+    positivos = int(positivas_df["n"].sum())
+    en_estudio = int(epizootias.loc[epizootias["descripcion"] == "EN ESTUDIO", "n"].sum())
+
+    metrics = {
+        "total_casos": total_casos,
+        "fallecidos": fallecidos,
+        "vivos": vivos,
+        "letalidad": (fallecidos / total_casos * 100) if total_casos > 0 else 0,
+        "supervivencia": (vivos / total_casos * 100) if total_casos > 0 else 0,
+        "total_epizootias": total_epizootias,
+        "epizootias_positivas": positivos,
+        "epizootias_en_estudio": en_estudio,
+        "positividad": (positivos / total_epizootias * 100) if total_epizootias > 0 else 0,
+        "en_estudio": (en_estudio / total_epizootias * 100) if total_epizootias > 0 else 0,
+        "municipios_con_casos": casos["municipio"].nunique(),
+        "municipios_con_epizootias": epizootias["municipio"].nunique(),
+    }
+
+    # El grupo con la fecha máxima da la ubicación del último registro; en
+    # orden de fila original, idxmax desempata igual que sobre las filas
+    def latest_frame(frame):
+        return frame.sort_values("fila_max").rename(columns={"fecha_max": "fecha"})
+
+    metrics["ultimo_caso"] = (
+        get_latest_case_info(latest_frame(casos), "fecha", ["vereda", "municipio"])
+        if total_casos
+        else {"existe": False, "ubicacion": "Sin casos registrados"}
+    )
+    metrics["ultima_epizootia_positiva"] = (
+        get_latest_case_info(latest_frame(positivas_df), "fecha", ["vereda", "municipio"])
+        if total_epizootias
+        else {"existe": False, "ubicacion": "Sin epizootias registradas"}
+    )
+
+    return metrics
+
+
 def get_latest_case_info(df, date_column, location_columns=None):
     """Obtiene información del caso más reciente."""
     if df.empty or date_column not in df.columns:
@@ -954,11 +1025,8 @@ def process_casos_dataframe(casos_df):
     """Procesa el dataframe de casos."""
     df_processed = casos_df.copy()
 
-    # Procesar fechas
-    if "fecha_inicio_sintomas" in df_processed.columns:
-        df_processed["fecha_inicio_sintomas"] = df_processed[
-            "fecha_inicio_sintomas"
-        ].apply(excel_date_to_datetime)
+    # Procesar fechas (no-op si ya se convirtieron al cargar el Excel)
+    convert_date_columns(df_processed, ["fecha_inicio_sintomas"])
 
     # Crear grupos de edad
     if "edad" in df_processed.columns:
@@ -983,11 +1051,8 @@ def process_epizootias_dataframe(epizootias_df):
     """Procesa el dataframe de epizootias."""
     df_processed = epizootias_df.copy()
 
-    # Procesar fechas
-    if "fecha_notificacion" in df_processed.columns:
-        df_processed["fecha_notificacion"] = df_processed["fecha_notificacion"].apply(
-            excel_date_to_datetime
-        )
+    # Procesar fechas (no-op si ya se convirtieron al cargar el Excel)
+    convert_date_columns(df_processed, ["fecha_notificacion"])
 
     # Limpiar descripción
     if "descripcion" in df_processed.columns:
@@ -1047,7 +1112,7 @@ def prepare_dataframe_for_display(df, date_columns=None):
 
 def debug_data_flow(data_original, data_filtered, filters, stage="unknown"):
     """Debug del flujo de datos."""
-    if isinstance(data_original, dict) and isinstance(data_filtered, dict):
+    if isinstance(data_original, Mapping) and isinstance(data_filtered, Mapping):
         casos_orig = len(data_original.get("casos", []))
         epi_orig = len(data_original.get("epizootias", []))
         casos_filt = len(data_filtered.get("casos", []))
@@ -0,0 +1,99 @@
+"""
+utils/dataset_schema.py - Esquema canónico de casos y epizootias
+Convierte las columnas declaradas en DATASET_SCHEMA a categóricas con
+categorías fijas (hoja VEREDAS + valores conocidos) y reduce los numéricos
+"""
+
+import logging
+
+import pandas as pd
+
+from config.settings import DATASET_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+
+def to_category(values, known):
+    """
+    Convierte una columna a categórica.
+
+    Las categorías son los valores conocidos, en su orden, seguidos de los
+    observados que no estén en la lista: ningún valor se pierde como NaN.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype) and set(known) <= set(
+        values.cat.categories
+    ):
+        return values
+
+    present = values.notna()
+    # Arrow (snapshots) no admite categorías de tipos mezclados
+    text = values.where(~present, values.astype(str))
+    known = list(dict.fromkeys(known))
+    known_set = set(known)
+    extra = sorted(v for v in text[present].unique() if v not in known_set)
+    return pd.Series(
+        pd.Categorical(text, categories=known + extra), index=values.index, name=values.name
+    )
+
+
+def downcast_numeric(values):
+    """Entero más pequeño si no hay vacíos ni decimales; float32 en otro caso."""
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.notna().all() and (numbers == numbers.round()).all():
+        return pd.to_numeric(numbers, downcast="integer")
+    return numbers.astype("float32")
+
+
+def apply_schema(df, kind, locations):
+    """
+    Aplica el esquema de `kind` ("casos" o "epizootias") a una copia de df.
+
+    Args:
+        locations: {"municipios": [...], "veredas": [...]} categorías de ubicación
+    """
+    schema = DATASET_SCHEMA.get(kind)
+    if schema is None or df is None or df.empty:
+        return df
+
+    df = df.copy()
+    for col, known in schema["categorical"].items():
+        if col not in df.columns:
+            continue
+        if isinstance(known, str):
+            known = locations.get(known, [])
+        df[col] = to_category(df[col], known)
+
+    for col in schema["numeric"]:
+        if col in df.columns:
+            df[col] = downcast_numeric(df[col])
+
+    return df
+
+
+def enforce_dataset_schema(data):
+    """
+    Aplica el esquema a los DataFrames de un dataset procesado, in place.
+    Las ubicaciones salen de sus propias listas de municipios y veredas.
+
+    Returns:
+        dict: el mismo dataset
+    """
+    veredas = sorted(
+        {vereda for lista in data.get("veredas_por_municipio", {}).values() for vereda in lista}
+    )
+    locations = {
+        "municipios": data.get("municipios_normalizados", []),
+        "veredas": veredas,
+    }
+
+    for kind in DATASET_SCHEMA:
+        frame = data.get(kind)
+        if isinstance(frame, pd.DataFrame):
+            before = frame.memory_usage(deep=True).sum()
+            data[kind] = apply_schema(frame, kind, locations)
+            after = data[kind].memory_usage(deep=True).sum()
+            logger.info(
+                f"🧱 Esquema {kind}: {before / 1024:.0f} KB → {after / 1024:.0f} KB"
+            )
+
+    return data
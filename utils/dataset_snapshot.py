@@ -0,0 +1,263 @@
+"""
+utils/dataset_snapshot.py - Snapshot columnar del dataset procesado
+Guarda la salida de process_complete_data_structure_authoritative en Parquet
+para no volver a parsear el Excel mientras el archivo fuente no cambie.
+Los shapefiles procesados se guardan igual, como GeoParquet.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.epi_dataset import DERIVED_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Importación opcional de pyarrow (motor Parquet)
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    logger.warning("⚠️ pyarrow no disponible - snapshots Parquet desactivados")
+
+# Incrementar cuando cambie el procesamiento para invalidar snapshots viejos
+SNAPSHOT_SCHEMA_VERSION = 4
+
+FRAME_KEYS = ["casos", "epizootias", "veredas_completas"]
+DATE_COLUMNS = {
+    "casos": ["fecha_inicio_sintomas"],
+    "epizootias": ["fecha_notificacion"],
+}
+GEO_KEYS = ["municipios", "veredas"]
+MAX_SNAPSHOTS = 3
+
+
+def snapshot_key(source_checksum):
+    """Clave del snapshot: checksum del Excel fuente + versión del esquema."""
+    raw = f"{SNAPSHOT_SCHEMA_VERSION}:{source_checksum}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _json_default(value):
+    """Convierte tipos numpy/pandas a tipos JSON nativos."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    if isinstance(value, (set, tuple, np.ndarray)):
+        return list(value)
+    raise TypeError(f"Tipo no serializable: {type(value)}")
+
+
+def _prepare_frame_for_parquet(df, date_columns):
+    """Asegura tipos estables: fechas como datetime64 y sin columnas object mixtas."""
+    df = df.copy()
+
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+        if inferred in ("mixed-integer-float", "integer", "floating"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        elif inferred in ("datetime", "datetime64", "date"):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif inferred.startswith("mixed"):
+            # Arrow no admite objetos de tipos mezclados en una misma columna
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+
+    # Columnas con nombres no-string (ej. encabezados numéricos en Excel)
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def save_snapshot(root, source_checksum, data):
+    """
+    Persiste el dataset procesado como Parquet + metadatos JSON.
+
+    Returns:
+        bool: True si se guardó el snapshot
+    """
+    if not PARQUET_AVAILABLE or not source_checksum or not data:
+        return False
+
+    root = Path(root)
+    final_dir = root / snapshot_key(source_checksum)
+    if final_dir.exists():
+        return True
+
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=root, prefix=".tmp_snapshot_"))
+
+    try:
+        for key in FRAME_KEYS:
+            frame = data.get(key)
+            if isinstance(frame, pd.DataFrame):
+                frame = _prepare_frame_for_parquet(frame, DATE_COLUMNS.get(key, []))
+                frame.to_parquet(tmp_dir / f"{key}.parquet", engine="pyarrow")
+
+        metadata = {
+            k: v
+            for k, v in data.items()
+            if k not in FRAME_KEYS and k not in DERIVED_KEYS
+        }
+        with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "schema_version": SNAPSHOT_SCHEMA_VERSION,
+                    "source_checksum": source_checksum,
+                    "data": metadata,
+                },
+                f,
+                default=_json_default,
+                ensure_ascii=False,
+            )
+
+        os.replace(tmp_dir, final_dir)
+        logger.info(f"💾 Snapshot guardado: {final_dir.name}")
+        _prune_snapshots(root, keep=final_dir.name)
+        return True
+
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo guardar snapshot: {str(e)}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+
+def load_snapshot(root, source_checksum):
+    """
+    Carga el snapshot del checksum dado.
+
+    Returns:
+        dict: Campos del dataset (sin estructuras derivadas) o None si no existe
+    """
+    if not PARQUET_AVAILABLE or not source_checksum:
+        return None
+
+    snapshot_dir = Path(root) / snapshot_key(source_checksum)
+    meta_path = snapshot_dir / "meta.json"
+    if not meta_path.exists():
+        return None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("schema_version") != SNAPSHOT_SCHEMA_VERSION:
+            return None
+
+        data = meta["data"]
+        for key in FRAME_KEYS:
+            frame_path = snapshot_dir / f"{key}.parquet"
+            data[key] = (
+                pd.read_parquet(frame_path, engine="pyarrow")
+                if frame_path.exists()
+                else pd.DataFrame()
+            )
+
+        logger.info(
+            f"⚡ Snapshot cargado: {len(data['casos'])} casos, {len(data['epizootias'])} epizootias"
+        )
+        return data
+
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot inválido, se ignora: {str(e)}")
+        return None
+
+
+def _prune_snapshots(root, keep):
+    """Conserva solo los snapshots más recientes."""
+    snapshots = sorted(
+        (p for p in Path(root).iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in snapshots[MAX_SNAPSHOTS:]:
+        if old.name != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def save_geo_snapshot(root, source_version, geo_data):
+    """
+    Persiste los GeoDataFrames de shapefiles como GeoParquet.
+
+    Returns:
+        bool: True si se guardó el snapshot
+    """
+    if not PARQUET_AVAILABLE or not source_version or not geo_data:
+        return False
+
+    root = Path(root)
+    final_dir = root / snapshot_key(source_version)
+    if final_dir.exists():
+        return True
+
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=root, prefix=".tmp_snapshot_"))
+
+    try:
+        for key in GEO_KEYS:
+            gdf = geo_data.get(key)
+            if gdf is not None and not gdf.empty:
+                gdf.to_parquet(tmp_dir / f"{key}.parquet")
+
+        with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"schema_version": SNAPSHOT_SCHEMA_VERSION, "source_version": source_version},
+                f,
+            )
+
+        os.replace(tmp_dir, final_dir)
+        logger.info(f"💾 Snapshot geográfico guardado: {final_dir.name}")
+        _prune_snapshots(root, keep=final_dir.name)
+        return True
+
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo guardar snapshot geográfico: {str(e)}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+
+def load_geo_snapshot(root, source_version):
+    """
+    Carga los GeoDataFrames del snapshot de la versión dada.
+
+    Returns:
+        dict: {'municipios': GeoDataFrame, 'veredas': GeoDataFrame} o None si no existe
+    """
+    if not PARQUET_AVAILABLE or not source_version:
+        return None
+
+    snapshot_dir = Path(root) / snapshot_key(source_version)
+    if not (snapshot_dir / "meta.json").exists():
+        return None
+
+    try:
+        import geopandas as gpd
+
+        geo_data = {}
+        for key in GEO_KEYS:
+            frame_path = snapshot_dir / f"{key}.parquet"
+            if frame_path.exists():
+                geo_data[key] = gpd.read_parquet(frame_path)
+
+        if not geo_data:
+            return None
+
+        logger.info(f"⚡ Snapshot geográfico cargado: {', '.join(geo_data)}")
+        return geo_data
+
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot geográfico inválido, se ignora: {str(e)}")
+        return None
@@ -0,0 +1,105 @@
+"""
+utils/date_index.py - Índice ordenado por fecha
+Permutación de filas de casos/epizootias ordenada por su fecha principal:
+un rango de fechas se resuelve con dos búsquedas binarias a un tramo
+contiguo de posiciones, y los límites de fechas quedan precalculados.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMNS = {
+    "casos": "fecha_inicio_sintomas",
+    "epizootias": "fecha_notificacion",
+}
+
+
+class _SortedDates:
+    """Fechas no vacías de una tabla en orden, con su posición de fila."""
+
+    def __init__(self, dates):
+        values = pd.to_datetime(dates, errors="coerce").to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(~np.isnat(values))
+        order = np.argsort(values[valid], kind="stable")
+        self.length = len(values)
+        self.order = valid[order].astype(np.int32)
+        self.dates = values[self.order]
+
+    def slice(self, start, end):
+        """Posiciones (orden por fecha) con start <= fecha <= end."""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), "ns"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), "ns"), side="right")
+        return self.order[lo:hi]
+
+    def bounds(self):
+        """(fecha mínima, fecha máxima) o (None, None) si no hay fechas."""
+        if not len(self.dates):
+            return None, None
+        return pd.Timestamp(self.dates[0]), pd.Timestamp(self.dates[-1])
+
+
+class DateIndex:
+    """
+    Permutaciones ordenadas por fecha de cada tabla.
+
+    Las posiciones son de la tabla completa (RangeIndex, ver
+    utils.location_index), igual que las del motor de filtros.
+    """
+
+    def __init__(self, frames):
+        self._tables = {
+            kind: _SortedDates(df[DATE_COLUMNS[kind]])
+            for kind, df in frames.items()
+            if DATE_COLUMNS.get(kind) in df.columns
+        }
+
+    def covers(self, kind, df):
+        """True si el índice corresponde a esta tabla completa."""
+        table = self._tables.get(kind)
+        return table is not None and table.length == len(df)
+
+    def range_mask(self, kind, start, end):
+        """Máscara booleana del rango inclusivo (filas sin fecha quedan fuera)."""
+        table = self._tables[kind]
+        mask = np.zeros(table.length, dtype=bool)
+        mask[table.slice(start, end)] = True
+        return mask
+
+    def bounds(self, kind=None):
+        """Fechas mínima y máxima de una tabla, o de todas si kind es None."""
+        if kind is not None:
+            table = self._tables.get(kind)
+            return table.bounds() if table is not None else (None, None)
+
+        pairs = [table.bounds() for table in self._tables.values()]
+        mins = [lo for lo, _ in pairs if lo is not None]
+        maxs = [hi for _, hi in pairs if hi is not None]
+        return (min(mins) if mins else None, max(maxs) if maxs else None)
+
+    def get_stats(self):
+        """Filas con fecha por tabla."""
+        return {
+            kind: {"rows": table.length, "dated": len(table.order)}
+            for kind, table in self._tables.items()
+        }
+
+
+def attach_date_index(data):
+    """
+    Construye data["date_index"] a partir de casos y epizootias.
+
+    Returns:
+        dict: el mismo dataset
+    """
+    frames = {
+        kind: data[kind]
+        for kind in DATE_COLUMNS
+        if isinstance(data.get(kind), pd.DataFrame)
+    }
+    data["date_index"] = DateIndex(frames)
+    logger.info(f"📅 Índice de fechas: {data['date_index'].get_stats()}")
+    return data
@@ -0,0 +1,175 @@
+"""
+utils/date_parser.py - Conversión vectorizada de fechas del Excel
+Convierte columnas completas (serial de Excel, DD/MM/YYYY y formatos legacy)
+y registra por fila qué formato se reconoció con un código int8
+"""
+
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Códigos de formato por fila (columna "<fecha>_fmt")
+FORMAT_UNRECOGNIZED = -1
+FORMAT_EMPTY = 0
+FORMAT_DATETIME = 1
+FORMAT_DMY = 2
+FORMAT_EXCEL_SERIAL = 3
+FORMAT_ISO = 4
+FORMAT_DMY_DASH = 5
+FORMAT_DMY_DOT = 6
+
+DATE_FORMAT_LABELS = {
+    FORMAT_UNRECOGNIZED: "no reconocido",
+    FORMAT_EMPTY: "vacío",
+    FORMAT_DATETIME: "fecha",
+    FORMAT_DMY: "DD/MM/YYYY",
+    FORMAT_EXCEL_SERIAL: "serial Excel",
+    FORMAT_ISO: "YYYY-MM-DD (legacy)",
+    FORMAT_DMY_DASH: "DD-MM-YYYY (legacy)",
+    FORMAT_DMY_DOT: "DD.MM.YYYY (legacy)",
+}
+
+# Orden de prueba para textos: formato principal y luego los de migración
+STRING_FORMATS = [
+    ("%d/%m/%Y", FORMAT_DMY),
+    ("%Y-%m-%d", FORMAT_ISO),
+    ("%d-%m-%Y", FORMAT_DMY_DASH),
+    ("%d.%m.%Y", FORMAT_DMY_DOT),
+]
+LEGACY_CODES = {FORMAT_ISO, FORMAT_DMY_DASH, FORMAT_DMY_DOT}
+
+FORMAT_COLUMN_SUFFIX = "_fmt"
+EXCEL_EPOCH = "1899-12-30"
+MAX_EXCEL_SERIAL = 100000
+NULL_STRINGS = ["", "nan", "none", "null", "nat"]
+
+_NUMBER_TYPES = (int, float, np.integer, np.floating)
+
+
+def parse_date_column(values):
+    """
+    Convierte una columna de fechas mixtas en una sola pasada por formato.
+
+    Args:
+        values: Series con datetime, números seriales de Excel o textos
+
+    Returns:
+        tuple: (Series datetime64, Series int8 con el código de formato por fila)
+    """
+    values = pd.Series(values)
+    index = values.index
+    codes = np.full(len(values), FORMAT_EMPTY, dtype=np.int8)
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        codes[values.notna().to_numpy()] = FORMAT_DATETIME
+        return values.astype("datetime64[ns]"), pd.Series(codes, index=index)
+
+    # Trabajo posicional: el índice puede venir repetido o desordenado
+    values = values.reset_index(drop=True)
+    parsed = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ns]")
+
+    present = values.notna().to_numpy()
+    kinds = values.map(type)
+    is_datetime = kinds.map(lambda t: issubclass(t, datetime)).to_numpy(dtype=bool) & present
+    is_string = (kinds == str).to_numpy(dtype=bool) & present
+    is_number = (
+        kinds.map(lambda t: issubclass(t, _NUMBER_TYPES) and t is not bool).to_numpy(dtype=bool)
+        & present
+        & ~is_datetime
+    )
+
+    # Fechas ya convertidas por openpyxl
+    if is_datetime.any():
+        parsed[is_datetime] = pd.to_datetime(values[is_datetime], errors="coerce").to_numpy(
+            dtype="datetime64[ns]"
+        )
+        codes[is_datetime] = FORMAT_DATETIME
+
+    # Seriales de Excel (días desde 1899-12-30)
+    if is_number.any():
+        positions = np.flatnonzero(is_number)
+        serials = pd.to_numeric(values[is_number], errors="coerce").to_numpy(dtype=float)
+        valid = (serials >= 0) & (serials <= MAX_EXCEL_SERIAL)
+        codes[positions[~valid]] = FORMAT_UNRECOGNIZED
+        if valid.any():
+            parsed[positions[valid]] = pd.to_datetime(
+                serials[valid], origin=EXCEL_EPOCH, unit="D"
+            ).to_numpy(dtype="datetime64[ns]")
+            codes[positions[valid]] = FORMAT_EXCEL_SERIAL
+
+    # Textos: cada formato se aplica a toda la columna pendiente
+    if is_string.any():
+        positions = np.flatnonzero(is_string)
+        texts = values[is_string].astype(str).str.strip().reset_index(drop=True)
+        pending = ~texts.str.lower().isin(NULL_STRINGS).to_numpy(dtype=bool)
+
+        for fmt, code in STRING_FORMATS:
+            if not pending.any():
+                break
+            converted = pd.to_datetime(texts[pending], format=fmt, errors="coerce")
+            matched = converted.notna().to_numpy(dtype=bool)
+            if matched.any():
+                target = np.flatnonzero(pending)[matched]
+                parsed[positions[target]] = converted[matched].to_numpy(dtype="datetime64[ns]")
+                codes[positions[target]] = code
+                pending[target] = False
+
+        codes[positions[pending]] = FORMAT_UNRECOGNIZED
+
+    other = present & ~is_datetime & ~is_number & ~is_string
+    codes[other] = FORMAT_UNRECOGNIZED
+
+    codes = pd.Series(codes, index=index)
+    _log_format_summary(values.set_axis(index), codes, values.name)
+    return pd.Series(parsed, index=index, name=values.name), codes
+
+
+def _log_format_summary(values, codes, column):
+    """Un solo mensaje por columna en lugar de uno por fila."""
+    legacy = codes.isin(list(LEGACY_CODES))
+    if legacy.any():
+        logger.warning(
+            f"⚠️ {int(legacy.sum())} fechas en formato legacy en '{column}' "
+            f"(ej. '{values[legacy.to_numpy()].iloc[0]}'), considera cambiar a DD/MM/YYYY"
+        )
+
+    unrecognized = codes == FORMAT_UNRECOGNIZED
+    if unrecognized.any():
+        examples = ", ".join(f"'{v}'" for v in values[unrecognized.to_numpy()].head(3))
+        logger.error(
+            f"❌ {int(unrecognized.sum())} fechas no reconocidas en '{column}' "
+            f"({examples}). Formato esperado: DD/MM/YYYY"
+        )
+
+
+def convert_date_columns(df, columns):
+    """
+    Convierte in place las columnas de fecha presentes y agrega "<col>_fmt".
+    Si la columna ya es datetime64 con su código de formato, no se reprocesa.
+
+    Returns:
+        DataFrame: el mismo df
+    """
+    for col in columns:
+        if col not in df.columns:
+            continue
+        fmt_col = f"{col}{FORMAT_COLUMN_SUFFIX}"
+        if fmt_col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        df[col], df[fmt_col] = parse_date_column(df[col])
+    return df
+
+
+def format_code_summary(codes):
+    """
+    Conteo de filas por formato reconocido.
+
+    Returns:
+        dict: {etiqueta de formato: filas}
+    """
+    counts = pd.Series(codes).value_counts()
+    return {DATE_FORMAT_LABELS.get(int(code), str(code)): int(n) for code, n in counts.items()}
@@ -0,0 +1,269 @@
+"""
+utils/download_cache.py - Caché persistente de descargas
+Archivos direccionados por contenido, indexados por file_id + versión de Drive
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+# Segundos sin actividad tras los cuales una descarga parcial se descarta
+PARTIAL_MAX_AGE = 24 * 3600
+
+
+def _file_md5(path, block_size=1024 * 1024):
+    """md5 de un archivo en disco (mismo algoritmo que md5Checksum de Drive)."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PersistentDownloadCache:
+    """
+    Caché en disco que sobrevive reinicios del proceso.
+
+    Estructura:
+        <root>/manifest.json        índice {file_id@version: metadatos}
+        <root>/objects/<digest>     contenido (md5 de Drive cuando existe)
+        <root>/files/<filename>     enlace con el nombre original (shapefiles)
+    """
+
+    def __init__(self, root, max_bytes=500 * 1024 * 1024):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.files_dir = self.root / "files"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._partial_locks = {}
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+
+        self._manifest = self._read_manifest()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    # ===== MANIFEST =====
+
+    def _read_manifest(self):
+        """Lee el manifest; si está corrupto, inicia uno vacío."""
+        manifest_path = self.root / MANIFEST_NAME
+        if not manifest_path.exists():
+            return {"entries": {}}
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            manifest.setdefault("entries", {})
+            return manifest
+        except Exception as e:
+            logger.warning(f"⚠️ Manifest de caché inválido, se reinicia: {str(e)}")
+            return {"entries": {}}
+
+    def _write_manifest(self):
+        """Escribe el manifest de forma atómica."""
+        self._atomic_write_text(
+            self.root / MANIFEST_NAME, json.dumps(self._manifest, indent=2)
+        )
+
+    def _atomic_write_text(self, path, text):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # ===== CLAVES =====
+
+    @staticmethod
+    def make_key(file_id, version):
+        return f"{file_id}@{version}"
+
+    @staticmethod
+    def _digest_for(file_id, version, md5_checksum=None):
+        """Nombre del blob: md5 de Drive si existe, si no hash de la clave."""
+        if md5_checksum:
+            return md5_checksum
+        return hashlib.sha256(f"{file_id}@{version}".encode("utf-8")).hexdigest()
+
+    # ===== API =====
+
+    def lookup(self, file_id, version, filename):
+        """
+        Busca un archivo en caché.
+
+        Returns:
+            str: Path con el nombre original o None si no está
+        """
+        key = self.make_key(file_id, version)
+        with self._lock:
+            entry = self._manifest["entries"].get(key)
+            if not entry:
+                self._stats["misses"] += 1
+                return None
+
+            blob_path = self.objects_dir / entry["blob"]
+            if not blob_path.exists() or blob_path.stat().st_size != entry["size"]:
+                logger.warning(f"⚠️ Blob de caché inválido, se descarta: {filename}")
+                del self._manifest["entries"][key]
+                self._write_manifest()
+                self._stats["misses"] += 1
+                return None
+
+            # Persistir el acceso solo periódicamente para no escribir en cada hit
+            now = time.time()
+            if now - entry["last_access"] > 60:
+                entry["last_access"] = now
+                self._write_manifest()
+            self._stats["hits"] += 1
+
+        return self._materialize(blob_path, filename)
+
+    def store_resumable(self, file_id, version, filename, write_content, md5_checksum=None):
+        """
+        Guarda un archivo en caché conservando lo descargado si se interrumpe.
+        Un nuevo intento de la misma versión continúa desde el byte donde quedó.
+
+        Args:
+            write_content: callable(file_obj, offset) que escribe desde `offset`
+            md5_checksum: checksum de Drive; si existe se valida el archivo completo
+
+        Returns:
+            str: Path con el nombre original o None si falla la escritura
+        """
+        digest = self._digest_for(file_id, version, md5_checksum)
+        partial_path = self.objects_dir / f".partial_{digest}"
+
+        # Dos hilos no pueden escribir el mismo parcial a la vez
+        with self._lock:
+            partial_lock = self._partial_locks.setdefault(digest, threading.Lock())
+
+        with partial_lock:
+            # Otro hilo pudo completar la misma descarga mientras esperábamos
+            if self.make_key(file_id, version) in self._manifest["entries"]:
+                cached = self.lookup(file_id, version, filename)
+                if cached:
+                    return cached
+
+            self._cleanup_stale_partials()
+
+            offset = partial_path.stat().st_size if partial_path.exists() else 0
+            if offset:
+                logger.info(f"⏯️ Resuming {filename} from byte {offset}")
+
+            # Ante un error el parcial se conserva para el siguiente intento
+            with open(partial_path, "ab") as f:
+                write_content(f, offset)
+
+            if md5_checksum and _file_md5(partial_path) != md5_checksum:
+                logger.warning(f"⚠️ Checksum mismatch, discarding partial download: {filename}")
+                partial_path.unlink()
+                return None
+
+            return self._commit(file_id, version, filename, digest, partial_path)
+
+    def _commit(self, file_id, version, filename, digest, tmp_path):
+        """Mueve el contenido descargado al blob final y lo registra en el manifest."""
+        blob_path = self.objects_dir / digest
+
+        size = os.path.getsize(tmp_path)
+        if size == 0:
+            logger.error(f"❌ Empty file: {filename}")
+            os.remove(tmp_path)
+            return None
+
+        os.replace(tmp_path, blob_path)
+
+        key = self.make_key(file_id, version)
+        now = time.time()
+        with self._lock:
+            self._manifest["entries"][key] = {
+                "file_id": file_id,
+                "version": version,
+                "filename": filename,
+                "blob": digest,
+                "size": size,
+                "created": now,
+                "last_access": now,
+            }
+            self._evict(keep_key=key)
+            self._write_manifest()
+
+        return self._materialize(blob_path, filename)
+
+    def _cleanup_stale_partials(self):
+        """Elimina descargas parciales abandonadas (versiones que ya no se piden)."""
+        cutoff = time.time() - PARTIAL_MAX_AGE
+        for partial in self.objects_dir.glob(".partial_*"):
+            try:
+                if partial.stat().st_mtime < cutoff:
+                    partial.unlink()
+            except OSError:
+                pass
+
+    def _materialize(self, blob_path, filename):
+        """Expone el blob con su nombre original mediante enlace (o copia)."""
+        target = self.files_dir / filename
+        tmp_target = self.files_dir / f".{filename}.{threading.get_ident()}.tmp"
+        try:
+            if tmp_target.exists():
+                tmp_target.unlink()
+            try:
+                os.link(blob_path, tmp_target)
+            except OSError:
+                shutil.copyfile(blob_path, tmp_target)
+            os.replace(tmp_target, target)
+            return str(target)
+        except Exception as e:
+            logger.error(f"❌ Error exponiendo archivo de caché {filename}: {str(e)}")
+            if tmp_target.exists():
+                tmp_target.unlink()
+            return None
+
+    def _evict(self, keep_key=None):
+        """Elimina entradas menos usadas hasta respetar max_bytes (LRU)."""
+        entries = self._manifest["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        if total <= self.max_bytes:
+            return
+
+        for key, entry in sorted(entries.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep_key:
+                continue
+
+            del entries[key]
+            total -= entry["size"]
+            self._stats["evictions"] += 1
+
+            # Un blob puede estar referenciado por varias versiones con el mismo md5
+            if not any(e["blob"] == entry["blob"] for e in entries.values()):
+                blob_path = self.objects_dir / entry["blob"]
+                if blob_path.exists():
+                    blob_path.unlink()
+            logger.info(f"🧹 Cache eviction: {entry['filename']} ({entry['version']})")
+
+    def get_stats(self):
+        """Retorna contadores y tamaño ocupado."""
+        with self._lock:
+            entries = self._manifest["entries"]
+            return {
+                **self._stats,
+                "entries": len(entries),
+                "total_bytes": sum(entry["size"] for entry in entries.values()),
+                "max_bytes": self.max_bytes,
+            }
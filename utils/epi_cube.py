@@ -0,0 +1,296 @@
+"""
+utils/epi_cube.py - Cubo epidemiológico pre-agregado
+Conteos y fechas mínima/máxima por celda (municipio × vereda × mes × atributos)
+para casos y epizootias; se construye una vez por versión del dataset y
+responde cortes y agregaciones bajo los filtros activos sin recorrer filas.
+"""
+
+import logging
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from utils.location_index import pair_mask
+
+logger = logging.getLogger(__name__)
+
+# Dimensiones de cada tabla y columnas filtrables por rango.
+# "fecha" es el nombre lógico del rango de fechas en ambas tablas.
+CUBE_SPECS = {
+    "casos": {
+        "dims": ["municipio", "vereda", "mes", "condicion_final", "sexo", "grupo_edad"],
+        "date": "fecha_inicio_sintomas",
+        "ranges": {"fecha": "fecha_inicio_sintomas", "edad": "edad"},
+    },
+    "epizootias": {
+        "dims": ["municipio", "vereda", "mes", "descripcion"],
+        "date": "fecha_notificacion",
+        "ranges": {"fecha": "fecha_notificacion"},
+    },
+}
+
+# Filtro de selección múltiple: conjunto de pares (municipio, vereda)
+PAIR_FILTER = "municipio_vereda"
+
+RESULT_COLUMNS = ["n", "fecha_min", "fecha_max", "fila_max"]
+
+
+def _month_start(dates):
+    """Primer día del mes de cada fecha (NaT se conserva)."""
+    values = pd.to_datetime(dates, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    return values.astype("datetime64[M]").astype("datetime64[ns]")
+
+
+def _range_values(values):
+    """Valores crudos de una columna de rango como array numpy comparable."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype="datetime64[ns]")
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+
+
+def _range_bound(value, sample):
+    """Convierte un límite de filtro al tipo del array de la columna."""
+    if sample.dtype.kind == "M":
+        return np.datetime64(pd.Timestamp(value), "ns")
+    return float(value)
+
+
+class _CubeTable:
+    """Celdas de una tabla más el orden de filas por celda (estilo CSR)."""
+
+    def __init__(self, df, spec):
+        self.date_col = spec["date"]
+        dates = (
+            df[self.date_col]
+            if self.date_col in df.columns
+            else pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+        )
+
+        # Dimensiones ausentes en la fuente quedan vacías y sus filtros no aplican
+        self.missing = {dim for dim in spec["dims"] if dim != "mes" and dim not in df.columns}
+        work = pd.DataFrame(
+            {
+                dim: df[dim] if dim in df.columns else pd.Series(np.nan, index=df.index)
+                for dim in spec["dims"]
+                if dim != "mes"
+            },
+            index=df.index,
+        )
+        work["mes"] = _month_start(dates)
+        self.dims = list(work.columns)
+
+        grouped = work.groupby(self.dims, observed=True, dropna=False, sort=False)
+        cell_ids = grouped.ngroup().to_numpy()
+        n_cells = int(cell_ids.max()) + 1 if len(cell_ids) else 0
+
+        # Filas de cada celda contiguas: order[offsets[c]:offsets[c + 1]]
+        self.order = np.argsort(cell_ids, kind="stable").astype(np.int32)
+        self.counts = np.bincount(cell_ids, minlength=n_cells).astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)]).astype(np.int64)
+
+        first_rows = self.order[self.offsets[:-1]]
+        self.cells = work.iloc[first_rows].reset_index(drop=True)
+
+        # Mínimo, máximo y no nulos por celda de cada columna de rango
+        self.ranges = {}
+        for key, col in spec["ranges"].items():
+            if col not in df.columns:
+                continue
+            raw = _range_values(df[col])
+            stats = pd.Series(raw).groupby(cell_ids).agg(["min", "max", "count"])
+            self.ranges[key] = {
+                "raw": raw,
+                "min": stats["min"].to_numpy(),
+                "max": stats["max"].to_numpy(),
+                "valid": stats["count"].to_numpy(),
+            }
+
+        self.dates = _range_values(dates)
+        date_stats = pd.Series(self.dates).groupby(cell_ids).agg(["min", "max"])
+        self.date_min = date_stats["min"].to_numpy(dtype="datetime64[ns]")
+        self.date_max = date_stats["max"].to_numpy(dtype="datetime64[ns]")
+
+        # Primera fila (orden original) con la fecha máxima de la celda: desempate
+        # igual a idxmax sobre las filas
+        at_max = self.dates == self.date_max[cell_ids]
+        self.row_max = np.full(n_cells, -1, dtype=np.int64)
+        first_at_max = pd.Series(np.flatnonzero(at_max)).groupby(cell_ids[at_max]).min()
+        self.row_max[first_at_max.index.to_numpy()] = first_at_max.to_numpy()
+
+    def select(self, filters):
+        """
+        Aplica los filtros a las celdas.
+
+        Returns:
+            tuple: (n, fecha_min, fecha_max, fila_max) por celda tras el filtro
+        """
+        n_cells = len(self.cells)
+        mask = np.ones(n_cells, dtype=bool)
+
+        # Igualdad / pertenencia sobre dimensiones (filtros ajenos se ignoran)
+        for key, value in filters.items():
+            if (
+                value is None
+                or key in self.ranges
+                or key in self.missing
+                or key not in self.cells.columns
+            ):
+                continue
+            values = list(value) if isinstance(value, (list, set, frozenset)) else [value]
+            mask &= self.cells[key].isin(values).to_numpy(dtype=bool)
+
+        pairs = filters.get(PAIR_FILTER)
+        if pairs is not None and not {"municipio", "vereda"} & self.missing:
+            mask &= pair_mask(self.cells["municipio"], self.cells["vereda"], pairs)
+
+        # Rangos: celdas enteramente dentro, enteramente fuera o parciales
+        active = []
+        inside = mask.copy()
+        outside = ~mask
+        for key, stats in self.ranges.items():
+            bounds = filters.get(key)
+            if bounds is None:
+                continue
+            lo = _range_bound(bounds[0], stats["raw"])
+            hi = _range_bound(bounds[1], stats["raw"])
+            active.append((stats["raw"], lo, hi))
+            inside &= (stats["valid"] == self.counts) & (stats["min"] >= lo) & (stats["max"] <= hi)
+            outside |= (stats["valid"] == 0) | (stats["max"] < lo) | (stats["min"] > hi)
+
+        n = np.where(inside, self.counts, 0)
+        date_min = np.where(inside, self.date_min, np.datetime64("NaT"))
+        date_max = np.where(inside, self.date_max, np.datetime64("NaT"))
+        row_max = np.where(inside, self.row_max, -1)
+
+        # Solo las celdas parciales se resuelven con sus filas
+        for cell in np.flatnonzero(~inside & ~outside):
+            rows = self.order[self.offsets[cell]:self.offsets[cell + 1]]
+            keep = np.ones(len(rows), dtype=bool)
+            for raw, lo, hi in active:
+                values = raw[rows]
+                keep &= (values >= lo) & (values <= hi)
+            n[cell] = int(keep.sum())
+            kept_rows = rows[keep]
+            kept_dates = self.dates[kept_rows]
+            dated = ~np.isnat(kept_dates)
+            if dated.any():
+                date_min[cell] = kept_dates[dated].min()
+                date_max[cell] = kept_dates[dated].max()
+                row_max[cell] = kept_rows[kept_dates == date_max[cell]].min()
+
+        return n, date_min, date_max, row_max
+
+
+class EpiCube:
+    """
+    Cubo de conteos por celda para casos y epizootias.
+
+    Los filtros son un dict plano con nombres lógicos: dimensiones por
+    igualdad (valor o lista), rangos inclusivos "fecha"/"edad" como tuplas y
+    pares (municipio, vereda) de la selección múltiple en PAIR_FILTER.
+    Cada tabla ignora los filtros que no le aplican (ej. sexo en epizootias).
+    """
+
+    def __init__(self, frames):
+        self._tables = {
+            kind: _CubeTable(df, CUBE_SPECS[kind])
+            for kind, df in frames.items()
+            if kind in CUBE_SPECS
+        }
+
+    def query(self, kind, filters=None, by=()):
+        """
+        Agrega las celdas filtradas por las columnas `by`.
+
+        Returns:
+            DataFrame: columnas `by` + n, fecha_min, fecha_max, fila_max
+            (solo grupos con n > 0). fila_max es la primera fila de la tabla
+            con la fecha máxima del grupo (-1 si no hay fechas).
+        """
+        by = list(by)
+        table = self._tables.get(kind)
+        if table is None or table.cells.empty:
+            return pd.DataFrame(columns=by + RESULT_COLUMNS)
+
+        n, date_min, date_max, row_max = table.select(filters or {})
+        result = table.cells[by].assign(
+            n=n, fecha_min=date_min, fecha_max=date_max, fila_max=row_max
+        )
+        result = result[result["n"] > 0]
+
+        # Fecha máxima más reciente primero y, entre empates, la fila más temprana
+        latest = result.sort_values(
+            ["fecha_max", "fila_max"], ascending=[False, True], na_position="last"
+        )
+
+        if not by:
+            return pd.DataFrame(
+                {
+                    "n": [int(result["n"].sum())],
+                    "fecha_min": [result["fecha_min"].min()],
+                    "fecha_max": [result["fecha_max"].max()],
+                    "fila_max": [int(latest["fila_max"].iloc[0]) if len(latest) else -1],
+                }
+            )
+
+        grouped = (
+            result.groupby(by, observed=True, dropna=False, sort=False)
+            .agg(n=("n", "sum"), fecha_min=("fecha_min", "min"), fecha_max=("fecha_max", "max"))
+            .reset_index()
+        )
+        first_rows = latest.drop_duplicates(by).set_index(by)["fila_max"]
+        grouped["fila_max"] = first_rows.reindex(
+            pd.MultiIndex.from_frame(grouped[by]) if len(by) > 1 else grouped[by[0]]
+        ).to_numpy()
+        return grouped
+
+    def total(self, kind, filters=None, **where):
+        """Número de filas que cumplen los filtros (más igualdades extra)."""
+        result = self.query(kind, {**(filters or {}), **where})
+        return int(result["n"].iloc[0]) if not result.empty else 0
+
+    def counts_by(self, kind, column, filters=None):
+        """{valor: filas} de una dimensión bajo los filtros."""
+        result = self.query(kind, filters, by=[column])
+        return dict(zip(result[column], result["n"].astype(int)))
+
+    def get_stats(self):
+        """Celdas por tabla."""
+        return {
+            kind: {"rows": int(table.counts.sum()), "cells": len(table.cells)}
+            for kind, table in self._tables.items()
+        }
+
+
+def attach_epi_cube(data):
+    """
+    Construye data["epi_cube"] a partir de casos y epizootias.
+
+    Returns:
+        dict: el mismo dataset
+    """
+    frames = {
+        kind: data[kind]
+        for kind in CUBE_SPECS
+        if isinstance(data.get(kind), pd.DataFrame)
+    }
+    data["epi_cube"] = EpiCube(frames)
+    logger.info(f"🧊 Cubo epidemiológico: {data['epi_cube'].get_stats()}")
+    return data
+
+
+def get_cube(data):
+    """
+    Cubo y filtros vigentes del dict de datos (filtrado).
+
+    Returns:
+        tuple: (EpiCube, dict de filtros) o (None, None) si no hay cubo
+    """
+    if not isinstance(data, Mapping):
+        return None, None
+    cube = data.get("epi_cube")
+    cube_filters = data.get("cube_filters")
+    if cube is None or cube_filters is None:
+        return None, None
+    return cube, cube_filters
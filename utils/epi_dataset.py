@@ -0,0 +1,156 @@
+"""
+utils/epi_dataset.py - Contenedor inmutable del dataset procesado
+Reemplaza el dict con funciones embebidas: solo datos (DataFrames, listas,
+mapas e índices derivados) más métodos, de modo que se puede picklear,
+hashear, cachear y compartir entre procesos.
+"""
+
+import json
+import hashlib
+import logging
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Estructuras reconstruibles a partir de los datos: no entran en la huella
+DERIVED_KEYS = ["location_index", "date_index", "epi_cube"]
+
+
+def _fingerprint_default(value):
+    """Serialización determinista de tipos no JSON para la huella."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(map(str, value))
+    if isinstance(value, (tuple, np.ndarray)):
+        return list(value)
+    return repr(value)
+
+
+def _frame_digest(df):
+    """Hash del contenido de un DataFrame (columnas, tipos y valores)."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    digest.update(json.dumps([str(t) for t in df.dtypes]).encode("utf-8"))
+    if len(df):
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class EpiDataset(Mapping):
+    """
+    Dataset de casos y epizootias, de solo lectura.
+
+    Se accede como un dict (data["casos"], data.get("regiones", {})) para no
+    cambiar las vistas; no admite asignación. Los DataFrames se comparten sin
+    copiar y deben tratarse como de solo lectura.
+    """
+
+    __slots__ = ("_fields", "_fingerprint")
+
+    def __init__(self, fields):
+        self._fields = dict(fields)
+        self._fingerprint = None
+
+    # ===== Mapping =====
+
+    def __getitem__(self, key):
+        return self._fields[key]
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return (
+            f"EpiDataset(casos={len(self.casos)}, epizootias={len(self.epizootias)}, "
+            f"fingerprint={self.fingerprint[:12]})"
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, EpiDataset):
+            return NotImplemented
+        return self.fingerprint == other.fingerprint
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    # ===== Pickle (sin __dict__ por __slots__) =====
+
+    def __getstate__(self):
+        return {"fields": self._fields, "fingerprint": self._fingerprint}
+
+    def __setstate__(self, state):
+        self._fields = state["fields"]
+        self._fingerprint = state["fingerprint"]
+
+    # ===== Accesos =====
+
+    @property
+    def casos(self):
+        return self._fields.get("casos", pd.DataFrame())
+
+    @property
+    def epizootias(self):
+        return self._fields.get("epizootias", pd.DataFrame())
+
+    @property
+    def fingerprint(self):
+        """
+        Huella estable del contenido (sha256 hex).
+        Igual para el mismo dataset en cualquier proceso; ignora las
+        estructuras derivadas.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            metadata = {}
+            for key in sorted(self._fields):
+                value = self._fields[key]
+                if key in DERIVED_KEYS:
+                    continue
+                if isinstance(value, pd.DataFrame):
+                    digest.update(f"{key}:{_frame_digest(value)}".encode("utf-8"))
+                else:
+                    metadata[key] = value
+            digest.update(
+                json.dumps(
+                    metadata, sort_keys=True, default=_fingerprint_default, ensure_ascii=False
+                ).encode("utf-8")
+            )
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def replace(self, **changes):
+        """Nuevo dataset con campos reemplazados (el original no cambia)."""
+        return EpiDataset({**self._fields, **changes})
+
+    def to_dict(self):
+        """Copia superficial de los campos como dict."""
+        return dict(self._fields)
+
+    # ===== Operaciones (antes funciones embebidas en el dict) =====
+
+    def handle_empty_area(self, municipio=None, vereda=None):
+        """Filas y metadatos de un área, incluso si no tiene datos."""
+        from utils.data_processor import handle_empty_area_filter_simple
+
+        return handle_empty_area_filter_simple(
+            municipio=municipio,
+            vereda=vereda,
+            casos_df=self.casos,
+            epizootias_df=self.epizootias,
+            location_index=self._fields.get("location_index"),
+        )
+
+    def validate_location(self, municipio, vereda):
+        """Verifica que municipio y vereda existan en el dataset."""
+        from utils.data_processor import validate_location_exists_simple
+
+        return validate_location_exists_simple(municipio, vereda, self)
@@ -0,0 +1,85 @@
+"""
+utils/excel_reader.py - Lector de libros Excel en una sola pasada
+Abre el archivo una vez (modo streaming de openpyxl) y extrae solo
+las hojas y columnas requeridas
+"""
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    logger.warning("⚠️ openpyxl no disponible")
+
+
+def read_workbook_sheets(path, sheet_columns):
+    """
+    Lee varias hojas de un libro Excel abriéndolo una sola vez.
+
+    Args:
+        path: Ruta al archivo .xlsx
+        sheet_columns: dict {nombre_hoja: lista de columnas o None para todas}
+
+    Returns:
+        tuple: (dict {nombre_hoja: DataFrame}, lista de hojas disponibles).
+        Las hojas solicitadas que no existen no aparecen en el dict.
+    """
+    if not OPENPYXL_AVAILABLE:
+        raise ImportError("openpyxl es requerido para leer archivos Excel")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+
+    try:
+        available_sheets = list(workbook.sheetnames)
+        sheets = {}
+
+        for sheet_name, columns in sheet_columns.items():
+            if sheet_name not in available_sheets:
+                continue
+
+            sheets[sheet_name] = _read_sheet(workbook[sheet_name], columns)
+            logger.info(f"✅ {sheet_name} loaded: {len(sheets[sheet_name])} records")
+
+        return sheets, available_sheets
+
+    finally:
+        workbook.close()
+
+
+def _read_sheet(worksheet, columns=None):
+    """Convierte una hoja en DataFrame conservando solo las columnas pedidas."""
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+
+    if header is None:
+        return pd.DataFrame(columns=columns or [])
+
+    header_names = [str(h).strip() if h is not None else None for h in header]
+
+    if columns is None:
+        selected = [(i, name) for i, name in enumerate(header_names) if name]
+    else:
+        wanted = set(columns)
+        selected = [(i, name) for i, name in enumerate(header_names) if name in wanted]
+
+        missing = wanted - {name for _, name in selected}
+        if missing:
+            logger.warning(f"⚠️ Columnas no encontradas en {worksheet.title}: {sorted(missing)}")
+
+    indices = [i for i, _ in selected]
+    names = [name for _, name in selected]
+
+    records = []
+    for row in rows:
+        values = tuple(row[i] if i < len(row) else None for i in indices)
+        # En modo streaming las filas vacías al final de la hoja sí se recorren
+        if any(v is not None and v != "" for v in values):
+            records.append(values)
+
+    return pd.DataFrame.from_records(records, columns=names, coerce_float=True)
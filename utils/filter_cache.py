@@ -0,0 +1,135 @@
+"""
+utils/filter_cache.py - Caché LRU compartido de resultados de filtrado
+Guarda, por (versión del dataset, filtros canónicos), las posiciones de fila
+filtradas de casos/epizootias y sus métricas; lo comparten todas las sesiones
+del proceso y se acota por memoria.
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from config.settings import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Costo fijo estimado por entrada (dict de métricas, claves, tuplas)
+ENTRY_OVERHEAD_BYTES = 4096
+
+
+def _canonical_value(value):
+    """Valor de filtro hashable y con orden estable."""
+    if isinstance(value, (list, set, frozenset)):
+        return tuple(sorted(_canonical_value(v) for v in value))
+    if isinstance(value, tuple):
+        return tuple(_canonical_value(v) for v in value)
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def filter_cache_key(data, filters):
+    """
+    Clave del caché o None si el dataset no tiene huella (dict suelto).
+
+    Incluye el día: las métricas traen días transcurridos desde el último evento.
+    """
+    fingerprint = getattr(data, "fingerprint", None)
+    if fingerprint is None:
+        return None
+    canonical = tuple(sorted((key, _canonical_value(v)) for key, v in filters.items()))
+    return (fingerprint, date.today().isoformat(), canonical)
+
+
+def _entry_size(entry):
+    """Bytes aproximados de una entrada (arrays de posiciones + overhead)."""
+    return ENTRY_OVERHEAD_BYTES + sum(
+        positions.nbytes for positions in entry["positions"].values()
+    )
+
+
+class FilterResultCache:
+    """
+    LRU thread-safe acotado por bytes y por número de entradas.
+    Cada entrada: {"positions": {tabla: int32}, "metrics": dict}.
+    """
+
+    def __init__(self, max_bytes, max_entries):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_or_compute(self, key, compute):
+        """
+        Entrada de `key`, calculándola con `compute()` si no está.
+        Sin clave (None) calcula sin guardar.
+        """
+        if key is None:
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+            self._stats["misses"] += 1
+
+        # Fuera del lock: dos sesiones pueden calcular la misma clave a la vez,
+        # el resultado es idéntico y gana la última
+        entry = compute()
+        size = _entry_size(entry)
+        if size > self._max_bytes:
+            return entry
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _entry_size(previous)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._entries and (
+                self._bytes > self._max_bytes or len(self._entries) > self._max_entries
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _entry_size(evicted)
+                self._stats["evictions"] += 1
+        return entry
+
+    def clear(self):
+        """Descarta todas las entradas."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """Contadores, tasa de aciertos y ocupación."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+
+# Caché compartido entre reruns y sesiones del mismo proceso
+_filter_cache = FilterResultCache(
+    CACHE_CONFIG["filter_cache_max_bytes"], CACHE_CONFIG["filter_cache_max_entries"]
+)
+
+
+def get_filter_cache():
+    """Instancia compartida del caché de filtros."""
+    return _filter_cache
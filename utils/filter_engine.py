@@ -0,0 +1,185 @@
+"""
+utils/filter_engine.py - Motor de filtros por máscaras
+Evalúa todos los criterios como máscaras booleanas sobre las tablas base
+(sin copias intermedias) y materializa un único subconjunto por tabla.
+Usa el mismo dict plano de filtros que el cubo (utils.epi_cube).
+"""
+
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.epi_cube import CUBE_SPECS, PAIR_FILTER
+from utils.location_index import pair_mask
+
+logger = logging.getLogger(__name__)
+
+
+def _criteria(kind):
+    """Columnas por igualdad y por rango que admite cada tabla."""
+    spec = CUBE_SPECS[kind]
+    equality = [dim for dim in spec["dims"] if dim != "mes"]
+    return equality, spec["ranges"]
+
+
+def _equality_mask(values, target):
+    """Máscara de igualdad (valor) o pertenencia (lista/conjunto)."""
+    if isinstance(target, (list, tuple, set, frozenset)):
+        return values.isin(list(target)).to_numpy(dtype=bool)
+    return (values == target).to_numpy(dtype=bool)
+
+
+def _range_mask(values, bounds):
+    """Máscara de rango inclusivo; los vacíos quedan fuera."""
+    lo, hi = bounds
+    if pd.api.types.is_datetime64_any_dtype(values):
+        lo, hi = pd.Timestamp(lo), pd.Timestamp(hi)
+    return ((values >= lo) & (values <= hi)).to_numpy(dtype=bool)
+
+
+def _criterion_masks(df, kind, filters, date_index=None):
+    """
+    Genera (criterio, máscara) para cada filtro que aplica a la tabla `kind`.
+
+    Los criterios sobre columnas ausentes se ignoran, igual que en el cubo.
+    Con date_index (utils.date_index) el rango de fechas sale de un tramo
+    del orden por fecha en lugar de comparar la columna completa.
+    """
+    equality, ranges = _criteria(kind)
+
+    for key in equality:
+        target = filters.get(key)
+        if target is None or key not in df.columns:
+            continue
+        yield key, _equality_mask(df[key], target)
+
+    pairs = filters.get(PAIR_FILTER)
+    if pairs is not None and {"municipio", "vereda"} <= set(df.columns):
+        yield PAIR_FILTER, pair_mask(df["municipio"], df["vereda"], pairs)
+
+    for key, col in ranges.items():
+        bounds = filters.get(key)
+        if bounds is None or col not in df.columns:
+            continue
+        if key == "fecha" and date_index is not None and date_index.covers(kind, df):
+            yield key, date_index.range_mask(kind, *bounds)
+        else:
+            yield key, _range_mask(df[col], bounds)
+
+
+def build_mask(df, kind, filters, date_index=None):
+    """
+    Combina los criterios de `filters` que aplican a la tabla `kind`.
+
+    Returns:
+        np.ndarray: máscara booleana
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for _, criterion in _criterion_masks(df, kind, filters, date_index):
+        mask &= criterion
+    return mask
+
+
+def filter_positions(frames, filters, date_index=None):
+    """
+    Posiciones de fila que cumplen los filtros en cada tabla.
+
+    Args:
+        frames: {"casos": df, "epizootias": df} tablas base (no se modifican)
+        filters: dict plano de filtros (components.filters.build_cube_filters)
+        date_index: DateIndex de las mismas tablas (opcional)
+
+    Returns:
+        dict: {tabla: np.ndarray int32 ordenado}
+    """
+    result = {}
+    for kind, df in frames.items():
+        if kind not in CUBE_SPECS or df is None or df.empty:
+            result[kind] = np.arange(0 if df is None else len(df), dtype=np.int32)
+            continue
+        mask = build_mask(df, kind, filters, date_index)
+        result[kind] = np.flatnonzero(mask).astype(np.int32)
+    return result
+
+
+def explain_filters(frames, filters, date_index=None):
+    """
+    Traza por etapa del filtrado (modo explicación; fuera del camino normal).
+
+    Returns:
+        list: una fila por (tabla, etapa) con filas que cumplen el criterio
+        por sí solo, filas restantes acumuladas y milisegundos de la etapa.
+        Las tablas con rango de fechas agregan una etapa "fecha (detalle)":
+        de las filas que llegan a la etapa de fecha, cuántas no tienen fecha
+        o quedan antes/después del rango, y las fechas restantes.
+    """
+    trace = []
+    for kind, df in frames.items():
+        if kind not in CUBE_SPECS or df is None:
+            continue
+
+        mask = np.ones(len(df), dtype=bool)
+        before_fecha = mask
+        trace.append(
+            {"tabla": kind, "etapa": "base", "cumplen": len(df), "restantes": len(df), "ms": 0.0}
+        )
+
+        stages = _criterion_masks(df, kind, filters, date_index) if not df.empty else iter(())
+        while True:
+            started = time.perf_counter()
+            stage = next(stages, None)
+            elapsed = (time.perf_counter() - started) * 1000
+            if stage is None:
+                break
+            key, criterion = stage
+            if key == "fecha":
+                before_fecha = mask.copy()
+            mask &= criterion
+            trace.append(
+                {
+                    "tabla": kind,
+                    "etapa": key,
+                    "cumplen": int(criterion.sum()),
+                    "restantes": int(mask.sum()),
+                    "ms": round(elapsed, 3),
+                }
+            )
+
+        date_col = CUBE_SPECS[kind]["date"]
+        bounds = filters.get("fecha")
+        if bounds is not None and date_col in df.columns and not df.empty:
+            dates = df[date_col][before_fecha]
+            remaining = df[date_col][mask].dropna()
+            trace.append(
+                {
+                    "tabla": kind,
+                    "etapa": "fecha (detalle)",
+                    "sin_fecha": int(dates.isna().sum()),
+                    "antes_rango": int((dates < pd.Timestamp(bounds[0])).sum()),
+                    "despues_rango": int((dates > pd.Timestamp(bounds[1])).sum()),
+                    "fecha_min": remaining.min() if len(remaining) else None,
+                    "fecha_max": remaining.max() if len(remaining) else None,
+                }
+            )
+
+    return trace
+
+
+def take_positions(frames, positions):
+    """Materializa cada tabla en sus posiciones (una sola selección por tabla)."""
+    return {
+        kind: df if df is None or df.empty else df.iloc[positions[kind]]
+        for kind, df in frames.items()
+    }
+
+
+def apply_filters(frames, filters, date_index=None):
+    """
+    Filtra cada tabla con una sola selección.
+
+    Returns:
+        dict: {tabla: DataFrame filtrado}
+    """
+    return take_positions(frames, filter_positions(frames, filters, date_index))
@@ -0,0 +1,198 @@
+"""
+utils/location_index.py - Índice de filas por ubicación
+Mapea municipio, vereda y (municipio, vereda) a posiciones de fila de casos y
+epizootias; se construye una vez al cargar el dataset y viaja en el dict de datos
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEXED_FRAMES = ["casos", "epizootias"]
+EMPTY_POSITIONS = np.empty(0, dtype=np.int32)
+
+
+def normalize_location(name):
+    """Clave de búsqueda: mayúsculas sin espacios externos (igual que las vistas)."""
+    return str(name).upper().strip() if pd.notna(name) else ""
+
+
+def normalize_location_series(values, normalize=normalize_location):
+    """
+    `normalize` (por defecto normalize_location) sobre una columna completa.
+    En categóricas se normalizan solo las categorías y se expanden por código.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = np.array(
+            [normalize(c) for c in values.cat.categories] + [normalize(None)], dtype=object
+        )
+        # Código -1 (vacío) cae en la última posición
+        return pd.Series(categories[values.cat.codes.to_numpy()], index=values.index)
+    return values.map(normalize)
+
+
+def _group_positions(df, columns):
+    """{clave normalizada: posiciones int32 ordenadas} a partir de un solo groupby."""
+    if df.empty or any(col not in df.columns for col in columns):
+        return {}
+
+    by = columns if len(columns) > 1 else columns[0]
+    groups = {}
+    for key, positions in df.groupby(by, observed=True, sort=False).indices.items():
+        if len(columns) > 1:
+            key = tuple(normalize_location(k) for k in key)
+        else:
+            key = normalize_location(key)
+        groups.setdefault(key, []).append(positions)
+
+    # Nombres que solo difieren en mayúsculas/espacios comparten clave
+    return {
+        key: np.sort(np.concatenate(parts)).astype(np.int32)
+        for key, parts in groups.items()
+    }
+
+
+class LocationIndex:
+    """
+    Posiciones de fila por ubicación para cada tabla indexada.
+
+    Los DataFrames indexados tienen RangeIndex, así que la posición de una
+    fila es también su etiqueta: el índice sirve para los subconjuntos
+    filtrados de esas mismas tablas (conservan las etiquetas originales).
+    """
+
+    def __init__(self, frames):
+        self._lengths = {}
+        self._tables = {}
+        for kind, df in frames.items():
+            self._lengths[kind] = len(df)
+            self._tables[kind] = {
+                "municipio": _group_positions(df, ["municipio"]),
+                "vereda": _group_positions(df, ["vereda"]),
+                "par": _group_positions(df, ["municipio", "vereda"]),
+            }
+
+    def positions(self, kind, municipio=None, vereda=None):
+        """
+        Posiciones de las filas de una ubicación en la tabla completa.
+
+        Returns:
+            np.ndarray: int32 ordenado (vacío si no hay filas)
+        """
+        table = self._tables.get(kind)
+        if table is None:
+            return EMPTY_POSITIONS
+
+        if municipio is not None and vereda is not None:
+            key = (normalize_location(municipio), normalize_location(vereda))
+            return table["par"].get(key, EMPTY_POSITIONS)
+        if municipio is not None:
+            return table["municipio"].get(normalize_location(municipio), EMPTY_POSITIONS)
+        if vereda is not None:
+            return table["vereda"].get(normalize_location(vereda), EMPTY_POSITIONS)
+        return np.arange(self._lengths[kind], dtype=np.int32)
+
+    def rows(self, df, kind, municipio=None, vereda=None):
+        """
+        Filas de `df` (tabla completa o filtrada) en la ubicación dada.
+        Para la tabla completa es un iloc directo; para un subconjunto se
+        resuelven solo las posiciones de la ubicación contra su índice.
+        """
+        positions = self.positions(kind, municipio, vereda)
+        if not len(positions) or df.empty:
+            return df.iloc[0:0]
+
+        if len(df) == self._lengths.get(kind) and isinstance(df.index, pd.RangeIndex):
+            return df.iloc[positions]
+
+        found = df.index.get_indexer(positions)
+        return df.iloc[found[found >= 0]]
+
+    def get_stats(self):
+        """Tamaño del índice por tabla."""
+        return {
+            kind: {
+                "rows": self._lengths[kind],
+                "municipios": len(table["municipio"]),
+                "veredas": len(table["par"]),
+            }
+            for kind, table in self._tables.items()
+        }
+
+
+def attach_location_index(data):
+    """
+    Deja casos/epizootias con RangeIndex y agrega data["location_index"].
+
+    Returns:
+        dict: el mismo dataset
+    """
+    frames = {}
+    for kind in INDEXED_FRAMES:
+        df = data.get(kind)
+        if not isinstance(df, pd.DataFrame):
+            continue
+        if not df.index.equals(pd.RangeIndex(len(df))):
+            df = df.reset_index(drop=True)
+            data[kind] = df
+        frames[kind] = df
+
+    data["location_index"] = LocationIndex(frames)
+    logger.info(f"🗂️ Índice de ubicaciones: {data['location_index'].get_stats()}")
+    return data
+
+
+def location_rows(df, kind, municipio=None, vereda=None, location_index=None):
+    """
+    Filas de `df` en la ubicación dada, por el índice si está disponible.
+    Sin índice (estructuras vacías o de fallback) recorre las columnas.
+    """
+    if df is None:
+        return pd.DataFrame()
+    if df.empty:
+        return df
+
+    if location_index is not None:
+        return location_index.rows(df, kind, municipio, vereda)
+
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in (("municipio", municipio), ("vereda", vereda)):
+        if value is None:
+            continue
+        if col not in df.columns:
+            return df.iloc[0:0]
+        normalized = df[col].astype(str).str.upper().str.strip()
+        mask &= (normalized == normalize_location(value)).to_numpy(dtype=bool)
+    return df[mask]
+
+
+def pair_mask(municipios, veredas, pairs):
+    """
+    Máscara de filas cuyo par (municipio, vereda) está en `pairs`.
+
+    Con columnas categóricas compara códigos enteros (un solo np.isin);
+    en otro caso usa un MultiIndex.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return np.zeros(len(municipios), dtype=bool)
+
+    if isinstance(municipios.dtype, pd.CategoricalDtype) and isinstance(
+        veredas.dtype, pd.CategoricalDtype
+    ):
+        municipio_codes = municipios.cat.categories.get_indexer([m for m, _ in pairs])
+        vereda_codes = veredas.cat.categories.get_indexer([v for _, v in pairs])
+        known = (municipio_codes >= 0) & (vereda_codes >= 0)
+        width = len(veredas.cat.categories)
+        targets = municipio_codes[known].astype(np.int64) * width + vereda_codes[known]
+
+        row_municipios = municipios.cat.codes.to_numpy(dtype=np.int64)
+        row_veredas = veredas.cat.codes.to_numpy(dtype=np.int64)
+        keys = row_municipios * width + row_veredas
+        # Código -1 = vacío: nunca coincide
+        return np.isin(keys, targets) & (row_municipios >= 0) & (row_veredas >= 0)
+
+    return pd.MultiIndex.from_arrays([municipios, veredas]).isin(pairs)
@@ -0,0 +1,385 @@
+"""
+utils/storage_backends.py - Orígenes de archivos del dashboard
+Google Drive (por defecto), directorio local y almacenamiento compatible con S3,
+todos con la misma interfaz indexada por clave lógica (casos_excel, cobertura, ...)
+"""
+
+import os
+import logging
+import threading
+from pathlib import Path
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Importaciones opcionales de Google
+try:
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    import google_auth_httplib2
+    import httplib2
+    GOOGLE_AVAILABLE = True
+except ImportError:
+    GOOGLE_AVAILABLE = False
+    logger.warning("⚠️ Google Drive libraries no disponibles")
+
+# Importación opcional de boto3 (S3 / MinIO)
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+
+class StorageBackend:
+    """
+    Interfaz de un origen de archivos.
+
+    Cada archivo se identifica por una clave lógica (ver SOURCE_FILES) que el
+    backend traduce a una referencia propia (file_id de Drive, ruta, clave S3).
+    """
+
+    name = "base"
+
+    def get_file_refs(self):
+        """Retorna {clave_lógica: referencia} de los archivos configurados."""
+        raise NotImplementedError
+
+    def authenticate(self):
+        """Prepara el acceso al origen. Retorna True si quedó disponible."""
+        return True
+
+    def check(self):
+        """
+        Verifica configuración y conectividad.
+
+        Returns:
+            tuple: (disponible, motivo)
+        """
+        return (True, None) if self.authenticate() else (False, "authentication")
+
+    def get_metadata(self, ref):
+        """
+        Metadatos livianos de un archivo, sin descargarlo.
+
+        Returns:
+            dict: al menos "version" y "size"; "md5Checksum" si el origen lo conoce
+        """
+        raise NotImplementedError
+
+    def write_to(
+        self, ref, f, offset=0, chunk_size=8 * 1024 * 1024, on_progress=None, timeout=None
+    ):
+        """
+        Escribe en `f` el contenido del archivo a partir de `offset`.
+
+        Args:
+            on_progress: callable(bytes_recibidos_totales) invocado tras cada bloque
+            timeout: segundos máximos bloqueado en una lectura de red; al
+                vencer se lanza una excepción (None = sin límite)
+        """
+        raise NotImplementedError
+
+
+class GoogleDriveBackend(StorageBackend):
+    """Archivos de Google Drive configurados en st.secrets.drive_files."""
+
+    name = "drive"
+
+    def __init__(self):
+        self.service = None
+        self._credentials = None
+        self._authenticated = False
+        self._thread_local = threading.local()
+
+    def get_file_refs(self):
+        if not hasattr(st.secrets, "drive_files"):
+            return {}
+        return dict(st.secrets.drive_files)
+
+    def authenticate(self):
+        """Autenticación con Google Drive."""
+        if self._authenticated and self.service:
+            return True
+
+        try:
+            if not GOOGLE_AVAILABLE:
+                logger.error("❌ Google libraries not available")
+                return False
+
+            if not hasattr(st.secrets, "gcp_service_account"):
+                logger.error("❌ gcp_service_account not found in secrets")
+                return False
+
+            gcp_config = st.secrets["gcp_service_account"]
+            required_fields = ["type", "project_id", "private_key", "client_email"]
+
+            if not all(field in gcp_config for field in required_fields):
+                logger.error(f"❌ Missing required fields in gcp_service_account")
+                return False
+
+            # Crear credenciales
+            credentials = service_account.Credentials.from_service_account_info(
+                gcp_config,
+                scopes=["https://www.googleapis.com/auth/drive.readonly"]
+            )
+
+            self.service = build("drive", "v3", credentials=credentials)
+
+            # Test de conectividad
+            self.service.files().list(pageSize=1).execute()
+
+            self._credentials = credentials
+            self._thread_local.service = self.service
+            self._authenticated = True
+            logger.info("✅ Google Drive authenticated successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Authentication error: {str(e)}")
+            if "invalid_grant" in str(e).lower():
+                logger.error("💡 TIP: Check system time synchronization")
+            return False
+
+    def check(self):
+        if not GOOGLE_AVAILABLE:
+            logger.warning("⚠️ Google libraries not available")
+            return False, "google_libraries"
+
+        if not hasattr(st.secrets, "gcp_service_account"):
+            logger.warning("⚠️ gcp_service_account not found")
+            return False, "gcp_service_account"
+
+        if not hasattr(st.secrets, "drive_files"):
+            logger.warning("⚠️ drive_files not found")
+            return False, "drive_files"
+
+        return super().check()
+
+    def _get_service(self):
+        """
+        Retorna un cliente de Drive propio del hilo actual.
+        httplib2 no es thread-safe, así que cada hilo (sesiones, descargas
+        paralelas) usa su propia instancia con las mismas credenciales.
+        """
+        service = getattr(self._thread_local, "service", None)
+        if service is None:
+            service = build(
+                "drive", "v3", credentials=self._credentials, cache_discovery=False
+            )
+            self._thread_local.service = service
+        return service
+
+    def get_metadata(self, ref):
+        if not self.authenticate():
+            return None
+
+        metadata = self._get_service().files().get(
+            fileId=ref, fields="id,name,size,modifiedTime,md5Checksum"
+        ).execute()
+        metadata["version"] = (
+            f"{metadata.get('modifiedTime', '')}:{metadata.get('md5Checksum', '')}"
+        )
+        return metadata
+
+    def _get_download_http(self, timeout):
+        """
+        Cliente HTTP autorizado propio del hilo con timeout de socket, para
+        que una lectura bloqueada aborte en lugar de colgar la descarga.
+        """
+        clients = getattr(self._thread_local, "download_http", None)
+        if clients is None:
+            clients = self._thread_local.download_http = {}
+        if timeout not in clients:
+            clients[timeout] = google_auth_httplib2.AuthorizedHttp(
+                self._credentials, http=httplib2.Http(timeout=timeout)
+            )
+        return clients[timeout]
+
+    def write_to(
+        self, ref, f, offset=0, chunk_size=8 * 1024 * 1024, on_progress=None, timeout=None
+    ):
+        # URL de descarga (alt=media); cada bloque se pide con una cabecera Range
+        uri = self._get_service().files().get_media(fileId=ref).uri
+        http = self._get_download_http(timeout)
+
+        received = offset
+        while True:
+            response, content = http.request(
+                uri, "GET", headers={"range": f"bytes={received}-{received + chunk_size - 1}"}
+            )
+            if response.status == 416:
+                # Rango fuera del archivo: el parcial ya estaba completo
+                break
+            if response.status == 200 and received > 0:
+                raise HttpError(response, b"Range not honored", uri=uri)
+            if response.status not in (200, 206):
+                raise HttpError(response, content, uri=uri)
+
+            f.write(content)
+            received += len(content)
+            if on_progress:
+                on_progress(received)
+
+            # "content-range: bytes 0-1023/4096"; sin cabecera (200) llegó todo
+            total = response.get("content-range", "").rpartition("/")[2]
+            if response.status == 200 or not content or not total.isdigit():
+                break
+            if received >= int(total):
+                break
+
+
+class LocalDirectoryBackend(StorageBackend):
+    """
+    Archivos en un directorio local (espejo on-prem o datos de benchmark).
+    Cada clave lógica se busca con su nombre de archivo en SOURCE_FILES.
+    """
+
+    name = "local"
+
+    def __init__(self, root, files):
+        self.root = Path(root)
+        self.files = files
+
+    def get_file_refs(self):
+        refs = {}
+        for key, filename in self.files.items():
+            path = self.root / filename
+            if path.is_file():
+                refs[key] = str(path)
+        return refs
+
+    def check(self):
+        if not self.root.is_dir():
+            logger.warning(f"⚠️ Local data directory not found: {self.root}")
+            return False, "local_dir"
+        return True, None
+
+    def get_metadata(self, ref):
+        stat = os.stat(ref)
+        return {
+            "name": os.path.basename(ref),
+            "size": str(stat.st_size),
+            "version": f"{stat.st_mtime_ns}:{stat.st_size}",
+        }
+
+    def write_to(
+        self, ref, f, offset=0, chunk_size=8 * 1024 * 1024, on_progress=None, timeout=None
+    ):
+        received = offset
+        with open(ref, "rb") as source:
+            source.seek(offset)
+            for block in iter(lambda: source.read(chunk_size), b""):
+                f.write(block)
+                received += len(block)
+                if on_progress:
+                    on_progress(received)
+
+
+class S3Backend(StorageBackend):
+    """
+    Archivos en un bucket S3 o compatible (MinIO, Ceph). Las credenciales
+    se toman de la cadena estándar de boto3 (variables AWS_*, perfil, rol).
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket, files, prefix="", endpoint_url=None):
+        self.bucket = bucket
+        self.files = files
+        self.prefix = prefix.strip("/")
+        self.endpoint_url = endpoint_url or None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self, read_timeout=None):
+        """
+        Cliente por timeout de lectura. Los clientes de boto3 son thread-safe
+        (uno por timeout para todo el proceso), pero su creación no lo es.
+        """
+        with self._lock:
+            client = self._clients.get(read_timeout)
+            if client is None:
+                config = BotoConfig(read_timeout=read_timeout) if read_timeout else None
+                client = boto3.client("s3", endpoint_url=self.endpoint_url, config=config)
+                self._clients[read_timeout] = client
+            return client
+
+    def _object_key(self, filename):
+        return f"{self.prefix}/{filename}" if self.prefix else filename
+
+    def get_file_refs(self):
+        return {key: self._object_key(filename) for key, filename in self.files.items()}
+
+    def authenticate(self):
+        try:
+            self._get_client().head_bucket(Bucket=self.bucket)
+            return True
+        except Exception as e:
+            logger.error(f"❌ S3 bucket not accessible {self.bucket}: {str(e)}")
+            return False
+
+    def check(self):
+        if not BOTO3_AVAILABLE:
+            logger.warning("⚠️ boto3 not available")
+            return False, "boto3"
+        if not self.bucket:
+            logger.warning("⚠️ S3 bucket not configured")
+            return False, "s3_bucket"
+        return super().check()
+
+    def get_metadata(self, ref):
+        head = self._get_client().head_object(Bucket=self.bucket, Key=ref)
+        etag = head.get("ETag", "").strip('"')
+        metadata = {
+            "name": os.path.basename(ref),
+            "size": str(head.get("ContentLength", 0)),
+            "version": f"{head['LastModified'].isoformat()}:{etag}",
+        }
+        # El ETag solo es md5 del contenido en subidas de una sola parte
+        if etag and "-" not in etag:
+            metadata["md5Checksum"] = etag
+        return metadata
+
+    def write_to(
+        self, ref, f, offset=0, chunk_size=8 * 1024 * 1024, on_progress=None, timeout=None
+    ):
+        # read_timeout también aplica a cada lectura del cuerpo (iter_chunks)
+        response = self._get_client(read_timeout=timeout).get_object(
+            Bucket=self.bucket, Key=ref, Range=f"bytes={offset}-"
+        )
+        received = offset
+        for block in response["Body"].iter_chunks(chunk_size=chunk_size):
+            f.write(block)
+            received += len(block)
+            if on_progress:
+                on_progress(received)
+
+
+def create_storage_backend(config, files):
+    """
+    Crea el backend configurado en STORAGE_CONFIG["backend"].
+
+    Args:
+        config: STORAGE_CONFIG
+        files: SOURCE_FILES {clave_lógica: nombre de archivo}
+    """
+    backend = (config.get("backend") or "drive").lower()
+
+    if backend == "local":
+        return LocalDirectoryBackend(config["local_dir"], files)
+
+    if backend == "s3":
+        return S3Backend(
+            config.get("s3_bucket"),
+            files,
+            prefix=config.get("s3_prefix", ""),
+            endpoint_url=config.get("s3_endpoint_url"),
+        )
+
+    if backend != "drive":
+        logger.warning(f"⚠️ Unknown storage backend '{backend}', using Google Drive")
+    return GoogleDriveBackend()
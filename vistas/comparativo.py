@@ -9,6 +9,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import logging
 
+from utils.epi_cube import get_cube
+
 logger = logging.getLogger(__name__)
 
 def show(data_filtered, filters, colors):
@@ -35,7 +37,9 @@ def show(data_filtered, filters, colors):
         return
 
     # Crear análisis temporal
-    temporal_data = create_temporal_analysis(casos_filtrados, epizootias_filtradas)
+    temporal_data = create_temporal_analysis(
+        casos_filtrados, epizootias_filtradas, data_filtered
+    )
 
     if temporal_data.empty:
         st.info("No hay suficientes datos temporales para el análisis con los filtros aplicados.")
@@ -50,9 +54,14 @@ def show(data_filtered, filters, colors):
     st.markdown("---")
     show_additional_charts(temporal_data, colors, filters)
 
-def create_temporal_analysis(casos_filtrados, epizootias_filtradas):
+def create_temporal_analysis(casos_filtrados, epizootias_filtradas, data_filtered=None):
     """Crea análisis temporal optimizado."""
     logger.info(f"Creando análisis temporal: {len(casos_filtrados)} casos, {len(epizootias_filtradas)} epizootias")
+
+    # Serie mensual directamente desde el cubo pre-agregado
+    cube, cube_filters = get_cube(data_filtered)
+    if cube is not None:
+        return create_temporal_analysis_from_cube(cube, cube_filters)
     
     # Obtener fechas
     fechas_casos = casos_filtrados["fecha_inicio_sintomas"].dropna().tolist() if "fecha_inicio_sintomas" in casos_filtrados.columns else []
@@ -112,6 +121,46 @@ def create_temporal_analysis(casos_filtrados, epizootias_filtradas):
 
     return pd.DataFrame(temporal_data)
 
+def create_temporal_analysis_from_cube(cube, cube_filters):
+    """Misma serie mensual que create_temporal_analysis, leída del cubo."""
+    casos = cube.query("casos", cube_filters, by=["mes", "condicion_final"])
+    epizootias = cube.query("epizootias", cube_filters, by=["mes", "descripcion"])
+
+    meses = pd.concat([casos["mes"], epizootias["mes"]]).dropna()
+    if meses.empty:
+        return pd.DataFrame()
+
+    periodos = pd.date_range(start=meses.min(), end=meses.max(), freq="MS")
+
+    def por_mes(frame, mask=None):
+        if mask is not None:
+            frame = frame[mask]
+        return frame.groupby("mes", observed=True)["n"].sum().reindex(periodos, fill_value=0).astype(int).to_numpy()
+
+    casos_mes = por_mes(casos)
+    epizootias_mes = por_mes(epizootias)
+
+    temporal_data = pd.DataFrame(
+        {
+            "periodo": periodos,
+            "año_mes": periodos.strftime("%Y-%m"),
+            "casos": casos_mes,
+            "fallecidos": por_mes(casos, casos["condicion_final"] == "Fallecido"),
+            "epizootias": epizootias_mes,
+            "epizootias_positivas": por_mes(
+                epizootias, epizootias["descripcion"] == "POSITIVO FA"
+            ),
+            "epizootias_en_estudio": por_mes(
+                epizootias, epizootias["descripcion"] == "EN ESTUDIO"
+            ),
+            "actividad_total": casos_mes + epizootias_mes,
+        }
+    )
+    temporal_data["categoria_actividad"] = [
+        get_activity_level(c, e) for c, e in zip(casos_mes, epizootias_mes)
+    ]
+    return temporal_data
+
 def get_activity_level(casos, epizootias):
     """Categoriza nivel de actividad."""
     total = casos + epizootias
@@ -4,8 +4,10 @@ Vista de mapas
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 from utils.cobertura_processor import (
     get_cobertura_for_municipio,
@@ -15,8 +17,15 @@ from utils.cobertura_processor import (
 
 from utils.data_processor import (
     calculate_basic_metrics, 
+    calculate_basic_metrics_from_cube,
     verify_filtered_data_usage
 )
+from utils.location_index import (
+    location_rows,
+    normalize_location,
+    normalize_location_series,
+)
+from utils.epi_cube import get_cube
 
 logger = logging.getLogger(__name__)
 
@@ -305,8 +314,8 @@ def create_optimized_layout_50_25_25(
         create_afectacion_card_simplified(casos, epizootias, filters, colors, data_filtered)
         
     with col_tarjetas2:
-        create_casos_card_optimized(casos, filters, colors)
-        create_epizootias_card_optimized(epizootias, filters, colors)
+        create_casos_card_optimized(casos, filters, colors, data_filtered)
+        create_epizootias_card_optimized(epizootias, filters, colors, data_filtered)
 
 def create_map_system_simplified(
     casos, epizootias, geo_data, filters, colors, data_filtered
@@ -648,62 +657,35 @@ def add_vereda_highlighted_to_map(
     if vereda_gdf.empty:
         return
 
-    vereda_col = get_vereda_column(vereda_gdf)
-
-    for idx, row in vereda_gdf.iterrows():
-        try:
-            vereda_name = safe_get_feature_name(row, vereda_col) or "VEREDA DESCONOCIDA"
-            color = row.get("color", colors["primary"])
-
-            # Estilo especial para vereda objetivo
-            if is_target:
-                style_function = lambda x, color=color: {
-                    "fillColor": color,
-                    "color": colors["primary"],
-                    "weight": 4,  # Borde más grueso
-                    "fillOpacity": 0.8,  # Más opaco
-                    "opacity": 1,
-                    "dashArray": "5,5",  # Línea punteada para destacar
-                }
-
-                # Tooltip especial para vereda objetivo
-                tooltip_text = f"""
-                <div style="font-family: Arial; padding: 12px; max-width: 250px; text-align: center;">
-                    <b style="color: {colors['primary']}; font-size: 1.2em;">🎯 {vereda_name}</b><br>
-                    <div style="background: {colors['secondary']}; color: white; padding: 6px; border-radius: 4px; margin: 8px 0;">
-                        <strong>VEREDA SELECCIONADA</strong>
-                    </div>
-                    <div style="margin: 8px 0; padding: 6px; background: #f8f9fa; border-radius: 4px;">
-                        🦠 Casos: {row.get('casos', 0)}<br>
-                        🐒 Epizootias: {row.get('epizootias', 0)}<br>
-                    </div>
-                    <div style="color: {colors['info']}; font-size: 0.9em;">
-                        {row.get('descripcion_color', 'Sin clasificar')}
-                    </div>
-                </div>
-                """
-            else:
-                style_function = lambda x, color=color: {
-                    "fillColor": color,
-                    "color": colors["accent"],
-                    "weight": 1.5,
-                    "fillOpacity": 0.6,
-                    "opacity": 0.8,
-                }
-                tooltip_text = create_vereda_tooltip_simplified(
-                    vereda_name, row, colors, modo_mapa
-                )
-
-            folium.GeoJson(
-                row["geometry"],
-                style_function=style_function,
-                tooltip=folium.Tooltip(tooltip_text, sticky=True),
-            ).add_to(folium_map)
-
-        except Exception as e:
-            logger.warning(
-                f"⚠️ Error agregando vereda resaltada {vereda_name}: {str(e)}"
-            )
+    if is_target:
+        # Borde grueso y punteado para destacar la vereda objetivo
+        style = {
+            "color": colors["primary"],
+            "weight": 4,
+            "fillOpacity": 0.8,
+            "opacity": 1,
+            "dashArray": "5,5",
+        }
+        titulo = "🎯 Vereda seleccionada"
+    else:
+        style = {
+            "color": colors["accent"],
+            "weight": 1.5,
+            "fillOpacity": 0.6,
+            "opacity": 0.8,
+        }
+        titulo = "🏘️ Vereda"
+
+    add_features_layer(
+        folium_map,
+        vereda_gdf,
+        get_vereda_column(vereda_gdf),
+        get_tooltip_fields("vereda", modo_mapa),
+        style=style,
+        default_color=colors["primary"],
+        titulo=titulo,
+        fallback_name="VEREDA DESCONOCIDA",
+    )
 
 
 def add_veredas_context_to_map(folium_map, veredas_contexto, colors, modo_mapa):
@@ -711,41 +693,21 @@ def add_veredas_context_to_map(folium_map, veredas_contexto, colors, modo_mapa):
     if veredas_contexto.empty:
         return
 
-    vereda_col = get_vereda_column(veredas_contexto)
-
-    for idx, row in veredas_contexto.iterrows():
-        try:
-            vereda_name = safe_get_feature_name(row, vereda_col) or "VEREDA CONTEXTO"
-            color = row.get("color", colors["info"])
-
-            # Estilo más transparente para contexto
-            style_function = lambda x, color=color: {
-                "fillColor": color,
-                "color": "#888888",
-                "weight": 1,
-                "fillOpacity": 0.3,  # Muy transparente
-                "opacity": 0.5,
-            }
-
-            # Tooltip simple para contexto
-            tooltip_text = f"""
-            <div style="font-family: Arial; padding: 8px; max-width: 180px;">
-                <b style="color: {colors['accent']};">🏘️ {vereda_name}</b><br>
-                <div style="font-size: 0.85em; margin: 4px 0;">
-                    🦠 {row.get('casos', 0)} • 🐒 {row.get('epizootias', 0)}
-                </div>
-                <i style="color: #666; font-size: 0.75em;">👆 Clic para seleccionar</i>
-            </div>
-            """
-
-            folium.GeoJson(
-                row["geometry"],
-                style_function=style_function,
-                tooltip=folium.Tooltip(tooltip_text, sticky=True),
-            ).add_to(folium_map)
-
-        except Exception as e:
-            logger.warning(f"⚠️ Error agregando vereda de contexto: {str(e)}")
+    add_features_layer(
+        folium_map,
+        veredas_contexto,
+        get_vereda_column(veredas_contexto),
+        get_tooltip_fields("contexto", modo_mapa),
+        style={
+            "color": "#888888",
+            "weight": 1,
+            "fillOpacity": 0.3,  # Muy transparente
+            "opacity": 0.5,
+        },
+        default_color=colors["info"],
+        titulo="🏘️ Vereda (clic para seleccionar)",
+        fallback_name="VEREDA CONTEXTO",
+    )
 
 
 def show_vereda_detailed_info(
@@ -842,7 +804,7 @@ def create_departmental_map_simplified(
 
     if modo_mapa == "Epidemiológico":
         municipios_data = prepare_municipal_data_epidemiological_simplified(
-            casos, epizootias, municipios, colors
+            casos, epizootias, municipios, colors, data_filtered
         )
     else:
         municipios_data = prepare_municipal_data_coverage_simplified(
@@ -1085,110 +1047,27 @@ def prepare_multiple_veredas_epidemiological(
     casos, epizootias, veredas_filtradas, municipios_seleccionados, colors
 ):
     """Prepara datos epidemiológicos para múltiples veredas."""
-    veredas_data = veredas_filtradas.copy()
     color_scheme = get_color_scheme_epidemiological(colors)
 
-    vereda_col = get_vereda_column(veredas_data)
-    municipio_col = get_municipio_column(veredas_data)
+    vereda_col = get_vereda_column(veredas_filtradas)
+    municipio_col = get_municipio_column(veredas_filtradas)
 
     if not vereda_col or not municipio_col:
-        return veredas_data
-
-    # Procesar cada vereda individualmente
-    for idx, row in veredas_data.iterrows():
-        try:
-            vereda_name = safe_get_feature_name(row, vereda_col)
-            municipio_name = safe_get_feature_name(row, municipio_col)
-
-            if not vereda_name or not municipio_name:
-                continue
-
-            # Mapear nombre de municipio del shapefile a datos
-            municipio_en_datos = get_mapped_municipio(municipio_name)
-
-            # Filtrar casos y epizootias para esta vereda específica
-            casos_vereda = pd.DataFrame()
-            epi_vereda = pd.DataFrame()
-
-            if (
-                not casos.empty
-                and "vereda" in casos.columns
-                and "municipio" in casos.columns
-            ):
-                mask_casos = (
-                    casos["vereda"].astype(str).str.strip() == str(vereda_name).strip()
-                ) & (
-                    casos["municipio"].astype(str).str.strip()
-                    == str(municipio_en_datos).strip()
-                )
-                casos_vereda = casos[mask_casos]
-
-            if (
-                not epizootias.empty
-                and "vereda" in epizootias.columns
-                and "municipio" in epizootias.columns
-            ):
-                mask_epi = (
-                    epizootias["vereda"].astype(str).str.strip()
-                    == str(vereda_name).strip()
-                ) & (
-                    epizootias["municipio"].astype(str).str.strip()
-                    == str(municipio_en_datos).strip()
-                )
-                epi_vereda = epizootias[mask_epi]
-
-            # Calcular métricas
-            casos_count = len(casos_vereda)
-            epizootias_count = len(epi_vereda)
-            fallecidos_count = (
-                len(casos_vereda[casos_vereda["condicion_final"] == "Fallecido"])
-                if not casos_vereda.empty and "condicion_final" in casos_vereda.columns
-                else 0
-            )
-            positivas_count = (
-                len(epi_vereda[epi_vereda["descripcion"] == "POSITIVO FA"])
-                if not epi_vereda.empty and "descripcion" in epi_vereda.columns
-                else 0
-            )
-            en_estudio_count = (
-                len(epi_vereda[epi_vereda["descripcion"] == "EN ESTUDIO"])
-                if not epi_vereda.empty and "descripcion" in epi_vereda.columns
-                else 0
-            )
-
-            # Determinar color
-            color, descripcion = determine_feature_color_epidemiological(
-                casos_count,
-                epizootias_count,
-                fallecidos_count,
-                positivas_count,
-                en_estudio_count,
-                color_scheme,
-            )
-
-            # Asignar valores
-            veredas_data.loc[idx, "color"] = color
-            veredas_data.loc[idx, "descripcion_color"] = descripcion
-            veredas_data.loc[idx, "casos"] = casos_count
-            veredas_data.loc[idx, "fallecidos"] = fallecidos_count
-            veredas_data.loc[idx, "epizootias"] = epizootias_count
-            veredas_data.loc[idx, "positivas"] = positivas_count
-            veredas_data.loc[idx, "en_estudio"] = en_estudio_count
-
-        except Exception as e:
-            logger.warning(
-                f"⚠️ Error procesando vereda múltiple en fila {idx}: {str(e)}"
-            )
-            # Valores por defecto
-            veredas_data.loc[idx, "color"] = color_scheme.get("sin_datos", "#E5E7EB")
-            veredas_data.loc[idx, "descripcion_color"] = "Sin datos"
-            veredas_data.loc[idx, "casos"] = 0
-            veredas_data.loc[idx, "fallecidos"] = 0
-            veredas_data.loc[idx, "epizootias"] = 0
-            veredas_data.loc[idx, "positivas"] = 0
-            veredas_data.loc[idx, "en_estudio"] = 0
+        return veredas_filtradas.copy()
+
+    # Municipio del shapefile → nombre en datos, una vez por municipio distinto
+    municipios_shapefile = veredas_filtradas[municipio_col].map(strip_name)
+    municipios_datos = municipios_shapefile.map(
+        {
+            nombre: strip_name(get_mapped_municipio(nombre)) if nombre else ""
+            for nombre in municipios_shapefile.unique()
+        }
+    )
 
-    return veredas_data
+    veredas_data = join_vereda_counts(
+        veredas_filtradas, vereda_col, municipios_datos, casos, epizootias
+    )
+    return assign_epidemiological_colors(veredas_data, color_scheme)
 
 
 def show_veredas_mapping_info(veredas_seleccionadas, veredas_gdf):
@@ -1815,15 +1694,15 @@ def safe_data_preparation_with_debug(
     except Exception as e:
         logger.error(f"❌ Error en preparación segura: {str(e)}")
 
-        # Retornar datos básicos con colores por defecto
-        veredas_basic = veredas_municipio.copy()
+        # Retornar datos básicos: contadores en cero y colores por defecto
+        columnas = [col for grupo in MUNICIPIO_COUNT_GROUPS.values() for col in grupo]
+        sin_conteos = pd.DataFrame(columns=columnas, dtype=np.int64)
+        veredas_basic = join_location_counts(
+            veredas_municipio, [""] * len(veredas_municipio), sin_conteos
+        )
         color_scheme = get_color_scheme_epidemiological(colors)
-
-        for idx, row in veredas_basic.iterrows():
-            veredas_basic.loc[idx, "color"] = color_scheme.get("sin_datos", "#E5E7EB")
-            veredas_basic.loc[idx, "descripcion_color"] = "Error en procesamiento"
-            veredas_basic.loc[idx, "casos"] = 0
-            veredas_basic.loc[idx, "epizootias"] = 0
+        veredas_basic["color"] = color_scheme.get("sin_datos", "#E5E7EB")
+        veredas_basic["descripcion_color"] = "Error en procesamiento"
 
         return veredas_basic
 
@@ -1831,245 +1710,259 @@ def safe_data_preparation_with_debug(
 
 
 def prepare_municipal_data_epidemiological_simplified(
-    casos, epizootias, municipios, colors
+    casos, epizootias, municipios, colors, data_filtered=None
 ):
-    """Prepara datos municipales."""
-    municipios = municipios.copy()
+    """
+    Prepara datos municipales: contadores por municipio (un groupby por
+    tabla, o el cubo), unidos al shapefile por clave y coloreados por tabla
+    de reglas.
+    """
+    cube, cube_filters = get_cube(data_filtered)
     color_scheme = get_color_scheme_epidemiological(colors)
 
-    contadores_municipios = {}
-
     # Obtener nombres de municipios del shapefile
     municipio_col = get_municipio_column(municipios)
 
     if not municipio_col:
         logger.error("❌ No se encontró columna de municipios en shapefile")
-        return municipios
+        return municipios.copy()
 
-    # Obtener lista de municipios únicos de manera segura
-    try:
-        municipios_unicos = municipios[municipio_col].dropna().unique()
-        municipios_unicos = [str(m).strip() for m in municipios_unicos if pd.notna(m)]
-        logger.info(f"📍 Procesando {len(municipios_unicos)} municipios únicos")
-    except Exception as e:
-        logger.error(f"❌ Error obteniendo municipios únicos: {str(e)}")
-        return municipios
+    if cube is not None:
+        # Contadores desde el cubo pre-agregado
+        counts = count_by_location_key_from_cube(cube, cube_filters)
+    else:
+        counts = count_by_location_key(casos, epizootias)
+    counts = counts.drop(index="", errors="ignore")
 
-    # Procesar casos
-    if not casos.empty and "municipio" in casos.columns:
-        for shapefile_municipio in municipios_unicos:
-            try:
-                casos_mun = find_casos_for_shapefile_municipio(
-                    casos, shapefile_municipio
-                )
-                fallecidos_mun = pd.DataFrame()
+    municipios_data = join_municipio_counts(municipios, municipio_col, counts)
+    assign_epidemiological_colors(municipios_data, color_scheme)
+
+    logger.info(
+        f"✅ Datos municipales epidemiológicos preparados: {len(municipios_data)} municipios"
+    )
+    return municipios_data
 
-                if not casos_mun.empty and "condicion_final" in casos_mun.columns:
-                    fallecidos_mun = casos_mun[
-                        casos_mun["condicion_final"] == "Fallecido"
-                    ]
 
-                contadores_municipios[shapefile_municipio] = {
-                    "casos": int(len(casos_mun)),  # Convertir a int explícitamente
-                    "fallecidos": int(len(fallecidos_mun)),
-                }
-            except Exception as e:
-                logger.warning(
-                    f"⚠️ Error procesando casos para {shapefile_municipio}: {str(e)}"
-                )
-                contadores_municipios[shapefile_municipio] = {
-                    "casos": 0,
-                    "fallecidos": 0,
-                }
-
-    # Procesar epizootias
-    if not epizootias.empty and "municipio" in epizootias.columns:
-        for shapefile_municipio in municipios_unicos:
-            try:
-                if shapefile_municipio not in contadores_municipios:
-                    contadores_municipios[shapefile_municipio] = {
-                        "casos": 0,
-                        "fallecidos": 0,
-                    }
+# Contadores por municipio que muestran los mapas, agrupados por tabla
+MUNICIPIO_COUNT_GROUPS = {
+    "casos": ["casos", "fallecidos"],
+    "epizootias": ["epizootias", "positivas", "en_estudio"],
+}
 
-                epi_mun = find_epizootias_for_shapefile_municipio(
-                    epizootias, shapefile_municipio
-                )
-                positivas_mun = pd.DataFrame()
-                en_estudio_mun = pd.DataFrame()
+# Reglas de color: (hay casos, hay epizootias) → (clave del esquema, descripción)
+EPIDEMIOLOGICAL_COLOR_RULES = [
+    (True, True, "casos_y_epizootias", "🔴 Casos + Epizootias"),
+    (True, False, "solo_casos", "🟠 Solo casos"),
+    (False, True, "solo_epizootias", "🟡 Solo epizootias"),
+]
 
-                if not epi_mun.empty and "descripcion" in epi_mun.columns:
-                    positivas_mun = epi_mun[epi_mun["descripcion"] == "POSITIVO FA"]
-                    en_estudio_mun = epi_mun[epi_mun["descripcion"] == "EN ESTUDIO"]
 
-                contadores_municipios[shapefile_municipio].update(
-                    {
-                        "epizootias": int(len(epi_mun)),
-                        "positivas": int(len(positivas_mun)),
-                        "en_estudio": int(len(en_estudio_mun)),
-                    }
-                )
-            except Exception as e:
-                logger.warning(
-                    f"⚠️ Error procesando epizootias para {shapefile_municipio}: {str(e)}"
-                )
-                if shapefile_municipio in contadores_municipios:
-                    contadores_municipios[shapefile_municipio].update(
-                        {
-                            "epizootias": 0,
-                            "positivas": 0,
-                            "en_estudio": 0,
-                        }
-                    )
+def strip_name(name):
+    """Clave de vereda: texto sin espacios externos (coincidencia sensible a mayúsculas)."""
+    return str(name).strip() if pd.notna(name) else ""
 
-    # Aplicar colores
-    municipios_data = municipios.copy()
 
-    for idx, row in municipios_data.iterrows():
-        try:
-            # Obtener nombre de manera segura
-            shapefile_municipio = safe_get_feature_name(row, municipio_col)
+def _sum_by_keys(claves, **columnas):
+    """Suma columnas numéricas por clave de ubicación (un groupby)."""
+    frame = pd.DataFrame(
+        {
+            **{f"clave_{i}": clave.to_numpy() for i, clave in enumerate(claves)},
+            **{col: np.asarray(values, dtype=np.int64) for col, values in columnas.items()},
+        }
+    )
+    by = [f"clave_{i}" for i in range(len(claves))]
+    return frame.groupby(by if len(by) > 1 else by[0], sort=False, observed=True).sum()
+
+
+def _combine_location_counts(partes, columns):
+    """Une los contadores de cada tabla; ubicaciones sin filas quedan en cero."""
+    nombres = [col for grupo in MUNICIPIO_COUNT_GROUPS.values() for col in grupo]
+    if not partes:
+        index = (
+            pd.MultiIndex.from_tuples([], names=list(columns))
+            if len(columns) > 1
+            else pd.Index([], dtype=object)
+        )
+        return pd.DataFrame(index=index, columns=nombres, dtype=np.int64)
+    return pd.concat(partes, axis=1).reindex(columns=nombres).fillna(0).astype(np.int64)
 
-            if not shapefile_municipio:
-                logger.warning(f"⚠️ No se pudo obtener nombre para fila {idx}")
-                continue
 
-            # Obtener contadores de manera segura
-            contadores = contadores_municipios.get(
-                shapefile_municipio,
-                {
-                    "casos": 0,
-                    "fallecidos": 0,
-                    "epizootias": 0,
-                    "positivas": 0,
-                    "en_estudio": 0,
-                },
-            )
+def count_by_location_key(
+    casos, epizootias, columns=("municipio",), normalize=normalize_location
+):
+    """
+    Contadores por ubicación desde las filas filtradas: un groupby por tabla.
 
-            # Asegurar que todos los valores sean enteros
-            casos_count = int(contadores.get("casos", 0))
-            epizootias_count = int(contadores.get("epizootias", 0))
-            fallecidos_count = int(contadores.get("fallecidos", 0))
-            positivas_count = int(contadores.get("positivas", 0))
-            en_estudio_count = int(contadores.get("en_estudio", 0))
-
-            color, descripcion = determine_feature_color_epidemiological(
-                casos_count,
-                epizootias_count,
-                fallecidos_count,
-                positivas_count,
-                en_estudio_count,
-                color_scheme,
-            )
+    Args:
+        columns: columnas de la clave, ej. ("municipio",) o ("municipio", "vereda")
+        normalize: normalización de cada parte de la clave (una vez por categoría)
 
-            # Asignar valores de manera segura
-            municipios_data.loc[idx, "color"] = color
-            municipios_data.loc[idx, "descripcion_color"] = descripcion
-            municipios_data.loc[idx, "casos"] = casos_count
-            municipios_data.loc[idx, "fallecidos"] = fallecidos_count
-            municipios_data.loc[idx, "epizootias"] = epizootias_count
-            municipios_data.loc[idx, "positivas"] = positivas_count
-            municipios_data.loc[idx, "en_estudio"] = en_estudio_count
+    Returns:
+        DataFrame: índice = clave (MultiIndex si hay varias columnas),
+        columnas de MUNICIPIO_COUNT_GROUPS
+    """
+    columns = list(columns)
 
-        except Exception as e:
-            logger.error(f"❌ Error procesando fila {idx}: {str(e)}")
-            # Asignar valores por defecto en caso de error
-            municipios_data.loc[idx, "color"] = color_scheme["sin_datos"]
-            municipios_data.loc[idx, "descripcion_color"] = "Error en procesamiento"
-            municipios_data.loc[idx, "casos"] = 0
-            municipios_data.loc[idx, "fallecidos"] = 0
-            municipios_data.loc[idx, "epizootias"] = 0
-            municipios_data.loc[idx, "positivas"] = 0
-            municipios_data.loc[idx, "en_estudio"] = 0
-
-    logger.info("✅ Datos municipales epidemiológicos preparados CORREGIDOS")
-    return municipios_data
+    def claves(df):
+        return [normalize_location_series(df[col], normalize) for col in columns]
 
+    partes = []
+    if not casos.empty and set(columns) <= set(casos.columns):
+        fallecidos = (
+            casos["condicion_final"] == "Fallecido"
+            if "condicion_final" in casos.columns
+            else np.zeros(len(casos))
+        )
+        partes.append(
+            _sum_by_keys(claves(casos), casos=np.ones(len(casos)), fallecidos=fallecidos)
+        )
 
-def find_casos_for_shapefile_municipio(casos, shapefile_municipio):
-    """Encuentra casos para municipio del shapefile - CORREGIDO con mapeo bidireccional."""
-    if casos.empty or "municipio" not in casos.columns:
-        return pd.DataFrame()
+    if not epizootias.empty and set(columns) <= set(epizootias.columns):
+        descripcion = (
+            epizootias["descripcion"]
+            if "descripcion" in epizootias.columns
+            else pd.Series("", index=epizootias.index)
+        )
+        partes.append(
+            _sum_by_keys(
+                claves(epizootias),
+                epizootias=np.ones(len(epizootias)),
+                positivas=descripcion == "POSITIVO FA",
+                en_estudio=descripcion == "EN ESTUDIO",
+            )
+        )
 
-    try:
-        shapefile_municipio = str(shapefile_municipio).strip()
+    return _combine_location_counts(partes, columns)
 
-        # 1. Buscar coincidencia directa
-        mask_directa = casos["municipio"].astype(str).str.strip() == shapefile_municipio
-        casos_directos = casos[mask_directa]
 
-        if not casos_directos.empty:
-            logger.debug(
-                f"✅ Casos encontrados por coincidencia directa: {shapefile_municipio}"
+def count_by_location_key_from_cube(
+    cube, cube_filters, columns=("municipio",), normalize=normalize_location
+):
+    """Mismos contadores que count_by_location_key, leídos del cubo."""
+    columns = list(columns)
+    casos = cube.query("casos", cube_filters, by=columns + ["condicion_final"])
+    epizootias = cube.query("epizootias", cube_filters, by=columns + ["descripcion"])
+
+    def claves(df):
+        return [normalize_location_series(df[col], normalize) for col in columns]
+
+    partes = []
+    if not casos.empty:
+        partes.append(
+            _sum_by_keys(
+                claves(casos),
+                casos=casos["n"],
+                fallecidos=casos["n"].where(casos["condicion_final"] == "Fallecido", 0),
             )
-            return casos_directos
-
-        # 2. Buscar usando mapeo (shapefile → datos)
-        mapped_municipio = get_mapped_municipio(
-            shapefile_municipio, "shapefile_to_data"
         )
-        if mapped_municipio != shapefile_municipio:
-            mask_mapeada = (
-                casos["municipio"].astype(str).str.strip() == mapped_municipio
+    if not epizootias.empty:
+        partes.append(
+            _sum_by_keys(
+                claves(epizootias),
+                epizootias=epizootias["n"],
+                positivas=epizootias["n"].where(epizootias["descripcion"] == "POSITIVO FA", 0),
+                en_estudio=epizootias["n"].where(epizootias["descripcion"] == "EN ESTUDIO", 0),
             )
-            casos_mapeados = casos[mask_mapeada]
+        )
 
-            if not casos_mapeados.empty:
-                logger.debug(
-                    f"✅ Casos encontrados por mapeo: {shapefile_municipio} → {mapped_municipio}"
-                )
-                return casos_mapeados
+    return _combine_location_counts(partes, columns)
 
-        return pd.DataFrame()
 
-    except Exception as e:
-        logger.warning(f"⚠️ Error buscando casos para {shapefile_municipio}: {str(e)}")
-        return pd.DataFrame()
+def _lookup_counts(counts, claves, columnas):
+    """Contadores de `columnas` para cada clave (ceros si no existe)."""
+    if isinstance(counts.index, pd.MultiIndex):
+        claves = pd.MultiIndex.from_tuples(claves, names=counts.index.names)
+    return counts[columnas].reindex(claves).fillna(0).to_numpy(dtype=np.int64)
 
 
-def find_epizootias_for_shapefile_municipio(epizootias, shapefile_municipio):
-    """Encuentra epizootias para municipio del shapefile - CORREGIDO con mapeo bidireccional."""
-    if epizootias.empty or "municipio" not in epizootias.columns:
-        return pd.DataFrame()
+def join_location_counts(features, claves, counts):
+    """
+    Copia de las features con los contadores de cada clave
+    (tuplas si el índice de counts tiene varias columnas).
+    """
+    features_data = features.copy()
+    for columnas in MUNICIPIO_COUNT_GROUPS.values():
+        valores = _lookup_counts(counts, claves, columnas)
+        for i, col in enumerate(columnas):
+            features_data[col] = valores[:, i]
+    return features_data
 
-    try:
-        shapefile_municipio = str(shapefile_municipio).strip()
 
-        # 1. Buscar coincidencia directa
-        mask_directa = (
-            epizootias["municipio"].astype(str).str.strip() == shapefile_municipio
-        )
-        epi_directos = epizootias[mask_directa]
+def join_vereda_counts(veredas, vereda_col, municipios_datos, casos, epizootias):
+    """
+    Copia de la capa de veredas con los contadores unidos por
+    (municipio en datos, vereda). Los nombres solo se limpian de espacios,
+    por lo que la coincidencia distingue mayúsculas.
 
-        if not epi_directos.empty:
-            logger.debug(
-                f"✅ Epizootias encontradas por coincidencia directa: {shapefile_municipio}"
-            )
-            return epi_directos
+    Args:
+        municipios_datos: municipio (nombre en datos) de cada polígono
+    """
+    counts = count_by_location_key(
+        casos, epizootias, columns=("municipio", "vereda"), normalize=strip_name
+    )
+    # Filas sin municipio o sin vereda no se asignan a ningún polígono
+    completas = (counts.index.get_level_values(0) != "") & (
+        counts.index.get_level_values(1) != ""
+    )
+    claves = list(zip(municipios_datos, veredas[vereda_col].map(strip_name)))
+    return join_location_counts(veredas, claves, counts[completas])
 
-        # 2. Buscar usando mapeo (shapefile → datos)
-        mapped_municipio = get_mapped_municipio(
-            shapefile_municipio, "shapefile_to_data"
-        )
-        if mapped_municipio != shapefile_municipio:
-            mask_mapeada = (
-                epizootias["municipio"].astype(str).str.strip() == mapped_municipio
-            )
-            epi_mapeados = epizootias[mask_mapeada]
 
-            if not epi_mapeados.empty:
-                logger.debug(
-                    f"✅ Epizootias encontradas por mapeo: {shapefile_municipio} → {mapped_municipio}"
-                )
-                return epi_mapeados
+@lru_cache(maxsize=16)
+def _shapefile_municipio_keys(nombres):
+    """
+    Claves de unión de los nombres del shapefile: directa y mapeada
+    (MUNICIPIO_MAPPING), ambas normalizadas. Se calculan una vez por capa.
+    """
+    directas = [normalize_location(nombre) for nombre in nombres]
+    mapeadas = [
+        normalize_location(get_mapped_municipio(nombre, "shapefile_to_data"))
+        for nombre in nombres
+    ]
+    return directas, mapeadas
 
-        return pd.DataFrame()
 
-    except Exception as e:
-        logger.warning(
-            f"⚠️ Error buscando epizootias para {shapefile_municipio}: {str(e)}"
-        )
-        return pd.DataFrame()
+def join_municipio_counts(municipios, municipio_col, counts):
+    """
+    Copia del shapefile con los contadores unidos por municipio.
+
+    Por tabla se usa la coincidencia directa del nombre si tiene filas y,
+    si no, el nombre mapeado (shapefile → datos).
+    """
+    municipios_data = municipios.copy()
+    nombres = tuple(strip_name(nombre) for nombre in municipios_data[municipio_col])
+    directas, mapeadas = _shapefile_municipio_keys(nombres)
+
+    for columnas in MUNICIPIO_COUNT_GROUPS.values():
+        directo = _lookup_counts(counts, directas, columnas)
+        mapeado = _lookup_counts(counts, mapeadas, columnas)
+        valores = np.where((directo[:, 0] > 0)[:, None], directo, mapeado)
+        for i, col in enumerate(columnas):
+            municipios_data[col] = valores[:, i]
+
+    return municipios_data
+
+
+def assign_epidemiological_colors(features, color_scheme):
+    """Columnas color y descripcion_color según EPIDEMIOLOGICAL_COLOR_RULES (in place)."""
+    hay_casos = features["casos"].to_numpy() > 0
+    hay_epizootias = features["epizootias"].to_numpy() > 0
+
+    condiciones = [
+        (hay_casos == casos) & (hay_epizootias == epizootias)
+        for casos, epizootias, _, _ in EPIDEMIOLOGICAL_COLOR_RULES
+    ]
+    features["color"] = np.select(
+        condiciones,
+        [color_scheme[clave] for _, _, clave, _ in EPIDEMIOLOGICAL_COLOR_RULES],
+        default=color_scheme["sin_datos"],
+    )
+    features["descripcion_color"] = np.select(
+        condiciones,
+        [descripcion for *_, descripcion in EPIDEMIOLOGICAL_COLOR_RULES],
+        default="⚪ Sin casos",
+    )
+    return features
 
 
 def find_veredas_for_municipio_simplified(veredas_gdf, municipio_selected):
@@ -2319,204 +2212,19 @@ def prepare_vereda_data_epidemiological_simplified(
         )
         casos = pd.DataFrame()
 
-    veredas_gdf = veredas_gdf.copy()
     color_scheme = get_color_scheme_epidemiological(colors)
 
     vereda_col = get_vereda_column(veredas_gdf)
-    contadores_veredas = {}
-
     if not vereda_col:
         logger.error("❌ No se encontró columna de veredas en shapefile")
-        return veredas_gdf
-
-    # Obtener lista de veredas únicas
-    try:
-        veredas_unicas = veredas_gdf[vereda_col].dropna().unique()
-        veredas_unicas = [str(v).strip() for v in veredas_unicas if pd.notna(v)]
-        logger.info(
-            f"🏘️ Procesando {len(veredas_unicas)} veredas únicas para {municipio_selected}"
-        )
-    except Exception as e:
-        logger.error(f"❌ Error obteniendo veredas únicas: {str(e)}")
-        return veredas_gdf
-
-    # Procesar casos por vereda
-    if not casos.empty and "vereda" in casos.columns and "municipio" in casos.columns:
-        try:
-            casos_municipio = casos[
-                casos["municipio"].astype(str).str.strip()
-                == str(municipio_selected).strip()
-            ]
-            logger.info(
-                f"📊 Casos del municipio {municipio_selected}: {len(casos_municipio)}"
-            )
-
-            for vereda_shapefile in veredas_unicas:
-                try:
-                    casos_ver = casos_municipio[
-                        casos_municipio["vereda"].astype(str).str.strip()
-                        == str(vereda_shapefile).strip()
-                    ]
-                    fallecidos_ver = pd.DataFrame()
-
-                    if not casos_ver.empty and "condicion_final" in casos_ver.columns:
-                        fallecidos_ver = casos_ver[
-                            casos_ver["condicion_final"] == "Fallecido"
-                        ]
-
-                    contadores_veredas[vereda_shapefile] = {
-                        "casos": int(len(casos_ver)),
-                        "fallecidos": int(len(fallecidos_ver)),
-                    }
-                except Exception as e:
-                    logger.warning(
-                        f"⚠️ Error procesando casos para vereda {vereda_shapefile}: {str(e)}"
-                    )
-                    contadores_veredas[vereda_shapefile] = {"casos": 0, "fallecidos": 0}
-        except Exception as e:
-            logger.error(f"❌ Error general procesando casos por vereda: {str(e)}")
-            # Inicializar contadores vacíos para todas las veredas
-            for vereda_shapefile in veredas_unicas:
-                contadores_veredas[vereda_shapefile] = {"casos": 0, "fallecidos": 0}
-
-    # Procesar epizootias por vereda
-    if (
-        not epizootias.empty
-        and "vereda" in epizootias.columns
-        and "municipio" in epizootias.columns
-    ):
-        try:
-            epi_municipio = epizootias[
-                epizootias["municipio"].astype(str).str.strip()
-                == str(municipio_selected).strip()
-            ]
-            logger.info(
-                f"🐒 Epizootias del municipio {municipio_selected}: {len(epi_municipio)}"
-            )
-
-            for vereda_shapefile in veredas_unicas:
-                try:
-                    if vereda_shapefile not in contadores_veredas:
-                        contadores_veredas[vereda_shapefile] = {
-                            "casos": 0,
-                            "fallecidos": 0,
-                        }
-
-                    epi_ver = epi_municipio[
-                        epi_municipio["vereda"].astype(str).str.strip()
-                        == str(vereda_shapefile).strip()
-                    ]
-                    positivas_ver = pd.DataFrame()
-                    en_estudio_ver = pd.DataFrame()
-
-                    if not epi_ver.empty and "descripcion" in epi_ver.columns:
-                        positivas_ver = epi_ver[epi_ver["descripcion"] == "POSITIVO FA"]
-                        en_estudio_ver = epi_ver[epi_ver["descripcion"] == "EN ESTUDIO"]
-
-                    contadores_veredas[vereda_shapefile].update(
-                        {
-                            "epizootias": int(len(epi_ver)),
-                            "positivas": int(len(positivas_ver)),
-                            "en_estudio": int(len(en_estudio_ver)),
-                        }
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"⚠️ Error procesando epizootias para vereda {vereda_shapefile}: {str(e)}"
-                    )
-                    if vereda_shapefile in contadores_veredas:
-                        contadores_veredas[vereda_shapefile].update(
-                            {
-                                "epizootias": 0,
-                                "positivas": 0,
-                                "en_estudio": 0,
-                            }
-                        )
-        except Exception as e:
-            logger.error(f"❌ Error general procesando epizootias por vereda: {str(e)}")
-            # Asegurar que todas las veredas tengan contadores de epizootias
-            for vereda_shapefile in veredas_unicas:
-                if vereda_shapefile not in contadores_veredas:
-                    contadores_veredas[vereda_shapefile] = {"casos": 0, "fallecidos": 0}
-                contadores_veredas[vereda_shapefile].update(
-                    {
-                        "epizootias": 0,
-                        "positivas": 0,
-                        "en_estudio": 0,
-                    }
-                )
-    else:
-        logger.info(f"📊 Sin epizootias para procesar en {municipio_selected}")
-        # Asegurar que todas las veredas tengan contadores de epizootias en 0
-        for vereda_shapefile in veredas_unicas:
-            if vereda_shapefile not in contadores_veredas:
-                contadores_veredas[vereda_shapefile] = {"casos": 0, "fallecidos": 0}
-            contadores_veredas[vereda_shapefile].update(
-                {
-                    "epizootias": 0,
-                    "positivas": 0,
-                    "en_estudio": 0,
-                }
-            )
-
-    # Aplicar colores
-    veredas_data = veredas_gdf.copy()
-
-    for idx, row in veredas_data.iterrows():
-        try:
-            vereda_shapefile = safe_get_feature_name(row, vereda_col)
-
-            if not vereda_shapefile:
-                logger.warning(f"⚠️ No se pudo obtener nombre de vereda para fila {idx}")
-                continue
-
-            # Obtener contadores de manera segura con valores por defecto
-            contadores = contadores_veredas.get(
-                vereda_shapefile,
-                {
-                    "casos": 0,
-                    "fallecidos": 0,
-                    "epizootias": 0,
-                    "positivas": 0,
-                    "en_estudio": 0,
-                },
-            )
-
-            # Asegurar que todos los valores sean enteros
-            casos_count = int(contadores.get("casos", 0))
-            epizootias_count = int(contadores.get("epizootias", 0))
-            fallecidos_count = int(contadores.get("fallecidos", 0))
-            positivas_count = int(contadores.get("positivas", 0))
-            en_estudio_count = int(contadores.get("en_estudio", 0))
-
-            color, descripcion = determine_feature_color_epidemiological(
-                casos_count,
-                epizootias_count,
-                fallecidos_count,
-                positivas_count,
-                en_estudio_count,
-                color_scheme,
-            )
+        return veredas_gdf.copy()
 
-            # Asignar valores de manera segura
-            veredas_data.loc[idx, "color"] = color
-            veredas_data.loc[idx, "descripcion_color"] = descripcion
-            veredas_data.loc[idx, "casos"] = casos_count
-            veredas_data.loc[idx, "fallecidos"] = fallecidos_count
-            veredas_data.loc[idx, "epizootias"] = epizootias_count
-            veredas_data.loc[idx, "positivas"] = positivas_count
-            veredas_data.loc[idx, "en_estudio"] = en_estudio_count
-
-        except Exception as e:
-            logger.error(f"❌ Error procesando vereda en fila {idx}: {str(e)}")
-            # Asignar valores por defecto en caso de error
-            veredas_data.loc[idx, "color"] = color_scheme.get("sin_datos", "#E5E7EB")
-            veredas_data.loc[idx, "descripcion_color"] = "Error en procesamiento"
-            veredas_data.loc[idx, "casos"] = 0
-            veredas_data.loc[idx, "fallecidos"] = 0
-            veredas_data.loc[idx, "epizootias"] = 0
-            veredas_data.loc[idx, "positivas"] = 0
-            veredas_data.loc[idx, "en_estudio"] = 0
+    # Todas las veredas de la capa pertenecen al municipio seleccionado
+    municipios_datos = np.full(len(veredas_gdf), strip_name(municipio_selected), dtype=object)
+    veredas_data = join_vereda_counts(
+        veredas_gdf, vereda_col, municipios_datos, casos, epizootias
+    )
+    assign_epidemiological_colors(veredas_data, color_scheme)
 
     logger.info(
         f"✅ Datos de veredas preparados para {municipio_selected}: {len(veredas_data)} veredas"
@@ -3226,7 +2934,11 @@ def calculate_afectacion_multiple(casos, epizootias, filters, data_original):
         logger.info("🏘️ Modo: veredas específicas seleccionadas")
         
         return calculate_afectacion_veredas_especificas(
-            casos, epizootias, veredas_seleccionadas, municipios_seleccionados
+            casos,
+            epizootias,
+            veredas_seleccionadas,
+            municipios_seleccionados,
+            data_original.get("location_index"),
         )
 
     # ===== CASO 2: SOLO MUNICIPIOS SELECCIONADOS =====
@@ -3265,15 +2977,19 @@ def calculate_afectacion_municipios_multiples(casos, epizootias, municipios_sele
     veredas_con_casos = set()
     veredas_con_epizootias = set()
 
-    # Casos: solo en municipios seleccionados
+    location_index = data_original.get("location_index")
+
+    # Casos: solo en municipios seleccionados (filas desde el índice de ubicaciones)
     if not casos.empty and "vereda" in casos.columns and "municipio" in casos.columns:
-        casos_filtrados = casos[casos["municipio"].isin(municipios_seleccionados)]
-        veredas_con_casos = set(casos_filtrados["vereda"].dropna())
+        for municipio in municipios_seleccionados:
+            casos_municipio = location_rows(casos, "casos", municipio, location_index=location_index)
+            veredas_con_casos.update(casos_municipio["vereda"].dropna())
 
     # Epizootias: solo en municipios seleccionados  
     if not epizootias.empty and "vereda" in epizootias.columns and "municipio" in epizootias.columns:
-        epi_filtrados = epizootias[epizootias["municipio"].isin(municipios_seleccionados)]
-        veredas_con_epizootias = set(epi_filtrados["vereda"].dropna())
+        for municipio in municipios_seleccionados:
+            epi_municipio = location_rows(epizootias, "epizootias", municipio, location_index=location_index)
+            veredas_con_epizootias.update(epi_municipio["vereda"].dropna())
 
     veredas_con_ambos = veredas_con_casos.intersection(veredas_con_epizootias)
     veredas_afectadas = veredas_con_casos.union(veredas_con_epizootias)
@@ -3353,46 +3069,31 @@ def debug_afectacion_multiple(casos, epizootias, filters, data_original):
     
     logger.info("🔍 === FIN DEBUG ===")
 
-def calculate_afectacion_veredas_especificas(casos, epizootias, veredas_seleccionadas, municipios_seleccionados):
+def calculate_afectacion_veredas_especificas(
+    casos, epizootias, veredas_seleccionadas, municipios_seleccionados, location_index=None
+):
     """Calcula afectación para veredas específicamente seleccionadas."""
-    
-    def normalize_name(name):
-        return str(name).upper().strip() if pd.notna(name) else ""
 
-    total_veredas_seleccionadas = len(veredas_seleccionadas)
-    veredas_con_casos = set()
-    veredas_con_epizootias = set()
-
-    # Para cada vereda seleccionada, verificar si tiene casos/epizootias
-    for vereda in veredas_seleccionadas:
-        vereda_norm = normalize_name(vereda)
-        
-        # Buscar casos en esta vereda (cualquier municipio de los seleccionados)
-        if not casos.empty and "vereda" in casos.columns:
-            if municipios_seleccionados:
-                # Filtrar por municipios seleccionados también
-                casos_vereda = casos[
-                    (casos["vereda"].apply(normalize_name) == vereda_norm) &
-                    (casos["municipio"].isin(municipios_seleccionados))
-                ]
-            else:
-                casos_vereda = casos[casos["vereda"].apply(normalize_name) == vereda_norm]
-            
-            if not casos_vereda.empty:
-                veredas_con_casos.add(vereda)
+    def tiene_filas(df, kind, vereda):
+        if df.empty or "vereda" not in df.columns:
+            return False
+        if not municipios_seleccionados:
+            return not location_rows(df, kind, vereda=vereda, location_index=location_index).empty
+        # Vereda dentro de cualquiera de los municipios seleccionados
+        return any(
+            not location_rows(df, kind, municipio, vereda, location_index).empty
+            for municipio in municipios_seleccionados
+        )
 
-        # Buscar epizootias en esta vereda
-        if not epizootias.empty and "vereda" in epizootias.columns:
-            if municipios_seleccionados:
-                epi_vereda = epizootias[
-                    (epizootias["vereda"].apply(normalize_name) == vereda_norm) &
-                    (epizootias["municipio"].isin(municipios_seleccionados))
-                ]
-            else:
-                epi_vereda = epizootias[epizootias["vereda"].apply(normalize_name) == vereda_norm]
-            
-            if not epi_vereda.empty:
-                veredas_con_epizootias.add(vereda)
+    total_veredas_seleccionadas = len(veredas_seleccionadas)
+    veredas_con_casos = {
+        vereda for vereda in veredas_seleccionadas if tiene_filas(casos, "casos", vereda)
+    }
+    veredas_con_epizootias = {
+        vereda
+        for vereda in veredas_seleccionadas
+        if tiene_filas(epizootias, "epizootias", vereda)
+    }
 
     veredas_con_ambos = veredas_con_casos.intersection(veredas_con_epizootias)
     veredas_afectadas = veredas_con_casos.union(veredas_con_epizootias)
@@ -4296,10 +3997,14 @@ def get_filter_context_compact(filters):
     else:
         return "Tolima"
 
-def create_casos_card_optimized(casos, filters, colors):
+def create_casos_card_optimized(casos, filters, colors, data_filtered=None):
     """Tarjeta de casos."""
     filter_context = get_filter_context_compact(filters)
-    metrics = calculate_basic_metrics(casos, pd.DataFrame())
+    cube, cube_filters = get_cube(data_filtered)
+    if cube is not None:
+        metrics = calculate_basic_metrics_from_cube(cube, cube_filters, kinds=("casos",))
+    else:
+        metrics = calculate_basic_metrics(casos, pd.DataFrame())
 
     total_casos = metrics["total_casos"]
     vivos = metrics["vivos"]
@@ -4347,10 +4052,14 @@ def create_casos_card_optimized(casos, filters, colors):
         unsafe_allow_html=True,
     )
 
-def create_epizootias_card_optimized(epizootias, filters, colors):
+def create_epizootias_card_optimized(epizootias, filters, colors, data_filtered=None):
     """Tarjeta de epizootias optimizada."""
     filter_context = get_filter_context_compact(filters)
-    metrics = calculate_basic_metrics(pd.DataFrame(), epizootias)
+    cube, cube_filters = get_cube(data_filtered)
+    if cube is not None:
+        metrics = calculate_basic_metrics_from_cube(cube, cube_filters, kinds=("epizootias",))
+    else:
+        metrics = calculate_basic_metrics(pd.DataFrame(), epizootias)
 
     total_epizootias = metrics["total_epizootias"]
     positivas = metrics["epizootias_positivas"]
@@ -4425,157 +4134,149 @@ def create_folium_map(geo_data, zoom_start=8, max_height=500):
     return m
 
 
-def add_municipios_to_map_simplified(folium_map, municipios_data, colors, modo_mapa):
-    """Agrega municipios al mapa SIMPLIFICADO."""
-    municipio_col = get_municipio_column(municipios_data)
+# Campos del tooltip por capa y modo: (propiedad, etiqueta)
+TOOLTIP_FIELDS = {
+    ("municipio", "Epidemiológico"): [
+        ("casos", "🦠 Casos"),
+        ("fallecidos", "⚰️ Fallecidos"),
+        ("epizootias", "🐒 Epizootias"),
+        ("descripcion_color", "📊 Estado"),
+    ],
+    ("vereda", "Epidemiológico"): [
+        ("casos", "🦠 Casos"),
+        ("epizootias", "🐒 Epizootias"),
+        ("descripcion_color", "📊 Estado"),
+    ],
+    ("cobertura", None): [
+        ("cobertura", "💉 Cobertura"),
+        ("poblacion", "👥 Población"),
+        ("vacunados", "💉 Vacunados"),
+        ("descripcion_color", "📊 Estado"),
+    ],
+    ("contexto", None): [
+        ("casos", "🦠 Casos"),
+        ("epizootias", "🐒 Epizootias"),
+    ],
+}
 
-    for idx, row in municipios_data.iterrows():
-        municipio_name = row.get(municipio_col, "DESCONOCIDO")
-        color = row["color"]
 
-        tooltip_text = create_municipio_tooltip_simplified(
-            municipio_name, row, colors, modo_mapa
-        )
+def get_tooltip_fields(nivel, modo_mapa):
+    """Campos del tooltip de una capa (municipio, vereda o contexto)."""
+    if nivel == "contexto":
+        return TOOLTIP_FIELDS[("contexto", None)]
+    if modo_mapa == "Epidemiológico":
+        return TOOLTIP_FIELDS[(nivel, modo_mapa)]
+    return TOOLTIP_FIELDS[("cobertura", None)]
+
+
+def _tooltip_property(features, campo):
+    """Columna ya formateada para el tooltip (valores ausentes → 0 / 'Sin datos')."""
+    if campo == "descripcion_color":
+        if campo not in features.columns:
+            return "Sin datos"
+        return features[campo].fillna("Sin datos").astype(str).to_numpy()
+
+    valores = (
+        pd.to_numeric(features[campo], errors="coerce").fillna(0)
+        if campo in features.columns
+        else pd.Series(0, index=features.index)
+    )
+    if campo == "cobertura":
+        return [f"{valor:.1f}%" for valor in valores]
+    if campo in ("poblacion", "vacunados"):
+        return [f"{int(valor):,}" for valor in valores]
+    return valores.astype(np.int64).to_numpy()
+
+
+def add_features_layer(
+    folium_map, features, name_col, fields, style, default_color, titulo, fallback_name
+):
+    """
+    Agrega todas las features como una sola capa GeoJSON (FeatureCollection).
+
+    Nombre, color y valores del tooltip viajan como propiedades de cada
+    feature; el estilo y el tooltip se definen una vez para la capa.
+
+    Args:
+        fields: [(propiedad, etiqueta)] del tooltip (ver TOOLTIP_FIELDS)
+        style: estilo común (sin fillColor, que sale de la propiedad color)
+        titulo: etiqueta del nombre en el tooltip
+    """
+    if features.empty:
+        return
+
+    layer = features[[features.geometry.name]].copy()
+    nombres = (
+        features[name_col].map(strip_name)
+        if name_col in features.columns
+        else pd.Series("", index=features.index)
+    )
+    layer["nombre"] = nombres.replace("", fallback_name).to_numpy()
+    layer["color"] = (
+        features["color"].fillna(default_color).to_numpy()
+        if "color" in features.columns
+        else default_color
+    )
+    for campo, _ in fields:
+        layer[campo] = _tooltip_property(features, campo)
+
+    folium.GeoJson(
+        layer.to_json(),
+        style_function=lambda feature: {
+            "fillColor": feature["properties"]["color"],
+            **style,
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=["nombre"] + [campo for campo, _ in fields],
+            aliases=[titulo] + [etiqueta for _, etiqueta in fields],
+            sticky=True,
+        ),
+    ).add_to(folium_map)
+
+
+def add_municipios_to_map_simplified(folium_map, municipios_data, colors, modo_mapa):
+    """Agrega municipios al mapa como una sola capa."""
+    add_features_layer(
+        folium_map,
+        municipios_data,
+        get_municipio_column(municipios_data),
+        get_tooltip_fields("municipio", modo_mapa),
+        style={
+            "color": colors["primary"],
+            "weight": 2,
+            "fillOpacity": 0.7,
+            "opacity": 1,
+        },
+        default_color=colors.get("sin_datos", "#E5E7EB"),
+        titulo="🏛️ Municipio",
+        fallback_name="DESCONOCIDO",
+    )
 
-        folium.GeoJson(
-            row["geometry"],
-            style_function=lambda x, color=color: {
-                "fillColor": color,
-                "color": colors["primary"],
-                "weight": 2,
-                "fillOpacity": 0.7,
-                "opacity": 1,
-            },
-            tooltip=folium.Tooltip(tooltip_text, sticky=True),
-        ).add_to(folium_map)
 
 def add_veredas_to_map_simplified(folium_map, veredas_data, colors, modo_mapa):
-    """Agrega veredas al mapa COMPLETAMENTE SEGURO."""
+    """Agrega veredas al mapa como una sola capa."""
     vereda_col = get_vereda_column(veredas_data)
 
     if not vereda_col:
         logger.error("❌ No se encontró columna de veredas")
         return
 
-    for idx, row in veredas_data.iterrows():
-        try:
-            vereda_name = safe_get_feature_name(row, vereda_col) or f"VEREDA_{idx}"
-            color = row.get("color", colors.get("sin_datos", "#E5E7EB"))
-
-            # Usar tooltip seguro
-            tooltip_text = create_vereda_tooltip_simplified(
-                vereda_name, row, colors, modo_mapa
-            )
-
-            folium.GeoJson(
-                row["geometry"],
-                style_function=lambda x, color=color: {
-                    "fillColor": color,
-                    "color": colors.get("accent", "#5A4214"),
-                    "weight": 1.5,
-                    "fillOpacity": 0.6,
-                    "opacity": 0.8,
-                },
-                tooltip=folium.Tooltip(tooltip_text, sticky=True),
-            ).add_to(folium_map)
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Error agregando vereda {vereda_name}: {str(e)}")
-            continue
-
-def create_municipio_tooltip_simplified(name, row, colors, modo_mapa):
-    """Tooltip para municipio."""
-    if modo_mapa == "Epidemiológico":
-        return f"""
-        <div style="font-family: Arial; padding: 10px; max-width: 250px;">
-            <b style="color: {colors['primary']}; font-size: 1.1em;">🏛️ {name}</b><br>
-            <div style="margin: 8px 0; padding: 6px; background: #f8f9fa; border-radius: 4px;">
-                🦠 Casos: {row.get('casos', 0)}<br>
-                ⚰️ Fallecidos: {row.get('fallecidos', 0)}<br>
-                🐒 Epizootias: {row.get('epizootias', 0)}<br>
-            </div>
-            <div style="color: {colors['info']}; font-size: 0.9em;">
-                {row.get('descripcion_color', 'Sin clasificar')}
-            </div>
-            <i style="color: {colors['accent']}; font-size: 0.8em;">👆 Clic para filtrar</i>
-        </div>
-        """
-    else:
-        # Tooltip mejorado para cobertura con datos reales
-        poblacion = row.get('poblacion', 0)
-        vacunados = row.get('vacunados', 0)
-        cobertura = row.get('cobertura', 0)
-        
-        # Información adicional si tenemos datos reales
-        info_adicional = ""
-        if poblacion > 0:
-            info_adicional = f"<br>👥 Población: {poblacion:,}<br>💉 Vacunados: {vacunados:,}"
-        
-        return f"""
-        <div style="font-family: Arial; padding: 10px; max-width: 250px;">
-            <b style="color: {colors['primary']}; font-size: 1.1em;">🏛️ {name}</b><br>
-            <div style="margin: 8px 0; padding: 6px; background: #f0f8ff; border-radius: 4px;">
-                💉 Cobertura: {cobertura:.1f}%{info_adicional}<br>
-                📊 {row.get('descripcion_color', 'Sin datos')}
-            </div>
-            <i style="color: {colors['accent']}; font-size: 0.8em;">👆 Clic para filtrar</i>
-        </div>
-        """
+    add_features_layer(
+        folium_map,
+        veredas_data,
+        vereda_col,
+        get_tooltip_fields("vereda", modo_mapa),
+        style={
+            "color": colors.get("accent", "#5A4214"),
+            "weight": 1.5,
+            "fillOpacity": 0.6,
+            "opacity": 0.8,
+        },
+        default_color=colors.get("sin_datos", "#E5E7EB"),
+        titulo="🏘️ Vereda",
+        fallback_name="VEREDA DESCONOCIDA",
+    )
 
-def create_vereda_tooltip_simplified(name, row, colors, modo_mapa):
-    """Tooltip para vereda COMPLETAMENTE SEGURO."""
-    try:
-        if modo_mapa == "Epidemiológico":
-            casos = safe_int_conversion(row.get('casos', 0))
-            epizootias = safe_int_conversion(row.get('epizootias', 0))
-            descripcion = str(row.get('descripcion_color', 'Sin datos'))
-            
-            return f"""
-            <div style="font-family: Arial; padding: 8px; max-width: 200px;">
-                <b style="color: {colors['primary']};">🏘️ {name}</b><br>
-                <div style="margin: 6px 0; font-size: 0.9em;">
-                    🦠 Casos: {casos}<br>
-                    🐒 Epizootias: {epizootias}<br>
-                </div>
-                <div style="color: {colors['info']}; font-size: 0.8em;">
-                    {descripcion}
-                </div>
-                <i style="color: {colors['accent']}; font-size: 0.8em;">👆 Clic para filtrar</i>
-            </div>
-            """
-        else:
-            # Modo cobertura - acceso seguro
-            cobertura = safe_float_conversion(row.get('cobertura', 0))
-            poblacion = safe_int_conversion(row.get('poblacion', 0))
-            vacunados = safe_int_conversion(row.get('vacunados', 0))
-            descripcion = str(row.get('descripcion_color', 'Sin datos'))
-            
-            # Información adicional solo si hay datos válidos
-            info_adicional = ""
-            if poblacion > 0:
-                info_adicional = f"<br><span style='font-size: 0.8em;'>👥 {poblacion:,} | 💉 {vacunados:,}</span>"
-            
-            return f"""
-            <div style="font-family: Arial; padding: 8px; max-width: 200px;">
-                <b style="color: {colors['primary']};">🏘️ {name}</b><br>
-                <div style="margin: 6px 0;">
-                    💉 Cobertura: {cobertura:.1f}%{info_adicional}
-                </div>
-                <div style="color: {colors['info']}; font-size: 0.8em;">
-                    {descripcion}
-                </div>
-                <i style="color: {colors['accent']}; font-size: 0.8em;">👆 Clic para filtrar</i>
-            </div>
-            """
-            
-    except Exception as e:
-        logger.error(f"❌ Error creando tooltip para {name}: {str(e)}")
-        return f"""
-        <div style="font-family: Arial; padding: 8px;">
-            <b>🏘️ {name}</b><br>
-            <i style="color: red;">Error en tooltip</i>
-        </div>
-        """
 
 def show_fallback_summary(casos, epizootias, level, location=None):
     """Resumen cuando no hay mapas."""
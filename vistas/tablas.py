@@ -11,7 +11,10 @@ from datetime import datetime
 import io
 import logging
 
-from utils.data_processor import calculate_basic_metrics
+from utils.data_processor import calculate_basic_metrics, calculate_basic_metrics_from_cube
+from utils.date_parser import FORMAT_COLUMN_SUFFIX
+from utils.location_index import location_rows, normalize_location
+from utils.epi_cube import get_cube
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +43,7 @@ def show(data_filtered, filters, colors):
         st.info(f"📊 Análisis de {context_info}: {' • '.join(active_filters[:2])}")
 
     # **SECCIONES PRINCIPALES**
-    show_executive_summary_optimized(casos_filtrados, epizootias_filtradas, filters, colors)
+    show_executive_summary_optimized(casos_filtrados, epizootias_filtradas, filters, colors, data_filtered)
     show_location_summary_with_drilldown(casos_filtrados, epizootias_filtradas, filters, colors, data_filtered)
     show_detailed_tables_optimized(casos_filtrados, epizootias_filtradas, colors)
     show_visual_analysis_optimized(casos_filtrados, epizootias_filtradas, colors)
@@ -68,7 +71,7 @@ def show_location_summary_with_drilldown(casos, epizootias, filters, colors, dat
     elif current_level == "vereda":
         show_vereda_detail_analysis(casos, epizootias, filters, colors)
     elif current_level == "multiple":
-        show_multiple_selection_summary(casos, epizootias, filters, colors)
+        show_multiple_selection_summary(casos, epizootias, filters, colors, data_original)
     
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -213,10 +216,11 @@ def show_vereda_detail_analysis(casos, epizootias, filters, colors):
             st.session_state['vereda_filter'] = 'Todas'
             st.rerun()
 
-def show_multiple_selection_summary(casos, epizootias, filters, colors):
-    """Resumen para selección múltiple."""
+def show_multiple_selection_summary(casos, epizootias, filters, colors, data_original=None):
+    """Resumen para selección múltiple (casos/epizootias ya filtrados a la selección)."""
     municipios_seleccionados = filters.get("municipios_seleccionados", [])
     veredas_seleccionadas = filters.get("veredas_seleccionadas", [])
+    location_index = data_original.get("location_index") if data_original else None
     
     if municipios_seleccionados and not veredas_seleccionadas:
         # Vista de múltiples municipios
@@ -224,7 +228,9 @@ def show_multiple_selection_summary(casos, epizootias, filters, colors):
         
         summary_data = []
         for municipio in municipios_seleccionados:
-            municipio_summary = create_single_municipio_summary(casos, epizootias, municipio)
+            municipio_summary = create_single_municipio_summary(
+                casos, epizootias, municipio, location_index
+            )
             if municipio_summary:
                 summary_data.append(municipio_summary)
         
@@ -252,8 +258,12 @@ def show_multiple_selection_summary(casos, epizootias, filters, colors):
         summary_data = []
         for vereda in veredas_seleccionadas:
             # Encontrar municipio de la vereda
-            municipio_vereda = find_municipio_for_vereda(vereda, municipios_seleccionados, casos, epizootias)
-            vereda_summary = create_single_vereda_summary(casos, epizootias, vereda, municipio_vereda)
+            municipio_vereda = find_municipio_for_vereda(
+                vereda, municipios_seleccionados, casos, epizootias, location_index
+            )
+            vereda_summary = create_single_vereda_summary(
+                casos, epizootias, vereda, municipio_vereda, location_index
+            )
             if vereda_summary:
                 summary_data.append(vereda_summary)
         
@@ -279,26 +289,27 @@ def show_multiple_selection_summary(casos, epizootias, filters, colors):
 
 def create_municipal_summary_optimized(casos, epizootias, data_original):
     """Crea resumen municipal."""
+    cube, cube_filters = get_cube(data_original)
+    if cube is not None:
+        return create_municipal_summary_from_cube(cube, cube_filters, data_original)
+
     summary_data = []
     
     # Lista completa de municipios del Tolima (desde configuración)
     municipios_tolima = get_all_tolima_municipios(data_original)
     
-    def normalize_name(name):
-        return str(name).upper().strip() if pd.notna(name) else ""
+    location_index = data_original.get("location_index")
     
     for municipio in municipios_tolima:
-        municipio_norm = normalize_name(municipio)
-        
         # Casos en este municipio
         casos_municipio = pd.DataFrame()
         if not casos.empty and "municipio" in casos.columns:
-            casos_municipio = casos[casos["municipio"].apply(normalize_name) == municipio_norm]
+            casos_municipio = location_rows(casos, "casos", municipio, location_index=location_index)
         
         # Epizootias en este municipio
         epi_municipio = pd.DataFrame()
         if not epizootias.empty and "municipio" in epizootias.columns:
-            epi_municipio = epizootias[epizootias["municipio"].apply(normalize_name) == municipio_norm]
+            epi_municipio = location_rows(epizootias, "epizootias", municipio, location_index=location_index)
         
         # Cálculos
         total_casos = len(casos_municipio)
@@ -341,36 +352,138 @@ def create_municipal_summary_optimized(casos, epizootias, data_original):
     
     return summary_data
 
+def _cube_location_counts(cube, cube_filters):
+    """
+    Conteos del cubo por municipio/vereda con la clave normalizada del municipio.
+
+    Returns:
+        tuple: (casos, epizootias) DataFrames con columnas clave, vereda, n, fecha_max
+               y condicion_final / descripcion
+    """
+    casos = cube.query("casos", cube_filters, by=["municipio", "vereda", "condicion_final"])
+    epizootias = cube.query("epizootias", cube_filters, by=["municipio", "vereda", "descripcion"])
+    for frame in (casos, epizootias):
+        frame["clave"] = frame["municipio"].astype(object).map(normalize_location)
+    return casos, epizootias
+
+def _sum_by(frame, key, mask=None):
+    """Suma de n por clave, opcionalmente sobre un subconjunto."""
+    if mask is not None:
+        frame = frame[mask]
+    return frame.groupby(key, observed=True)["n"].sum()
+
+def create_municipal_summary_from_cube(cube, cube_filters, data_original):
+    """create_municipal_summary_optimized leyendo los conteos del cubo."""
+    casos, epizootias = _cube_location_counts(cube, cube_filters)
+
+    casos_mun = _sum_by(casos, "clave")
+    fallecidos_mun = _sum_by(casos, "clave", casos["condicion_final"] == "Fallecido")
+    epi_mun = _sum_by(epizootias, "clave")
+    positivas_mun = _sum_by(epizootias, "clave", epizootias["descripcion"] == "POSITIVO FA")
+    en_estudio_mun = _sum_by(epizootias, "clave", epizootias["descripcion"] == "EN ESTUDIO")
+    veredas_mun = (
+        pd.concat(
+            [casos[["clave", "vereda"]].astype(object), epizootias[["clave", "vereda"]].astype(object)]
+        )
+        .dropna()
+        .drop_duplicates()
+        .groupby("clave", observed=True)
+        .size()
+    )
+
+    summary_data = []
+    for municipio in get_all_tolima_municipios(data_original):
+        clave = normalize_location(municipio)
+        total_casos = int(casos_mun.get(clave, 0))
+        total_epizootias = int(epi_mun.get(clave, 0))
+        fallecidos = int(fallecidos_mun.get(clave, 0))
+        letalidad = (fallecidos / total_casos * 100) if total_casos > 0 else 0
+
+        summary_data.append({
+            "municipio": municipio,
+            "casos": total_casos,
+            "fallecidos": fallecidos,
+            "letalidad": round(letalidad, 1),
+            "epizootias": total_epizootias,
+            "epizootias_positivas": int(positivas_mun.get(clave, 0)),
+            "epizootias_en_estudio": int(en_estudio_mun.get(clave, 0)),
+            "veredas_afectadas": int(veredas_mun.get(clave, 0)),
+            "tiene_datos": (total_casos + total_epizootias) > 0
+        })
+
+    return summary_data
+
+def create_vereda_summary_from_cube(cube, cube_filters, municipio_actual):
+    """create_vereda_summary_optimized leyendo los conteos del cubo."""
+    casos, epizootias = _cube_location_counts(cube, cube_filters)
+    clave = normalize_location(municipio_actual)
+    casos = casos[casos["clave"] == clave]
+    epizootias = epizootias[epizootias["clave"] == clave]
+
+    casos_ver = _sum_by(casos, "vereda")
+    fallecidos_ver = _sum_by(casos, "vereda", casos["condicion_final"] == "Fallecido")
+    epi_ver = _sum_by(epizootias, "vereda")
+    positivas_ver = _sum_by(epizootias, "vereda", epizootias["descripcion"] == "POSITIVO FA")
+    en_estudio_ver = _sum_by(epizootias, "vereda", epizootias["descripcion"] == "EN ESTUDIO")
+    ultima_ver = (
+        pd.concat([casos[["vereda", "fecha_max"]], epizootias[["vereda", "fecha_max"]]])
+        .astype({"vereda": object})
+        .groupby("vereda", observed=True)["fecha_max"]
+        .max()
+    )
+
+    # Mismas veredas que get_all_veredas_for_municipio: las que tienen registros
+    todas_las_veredas = sorted(v for v in ultima_ver.index if v and str(v).strip())
+    if not todas_las_veredas:
+        todas_las_veredas = [f"{municipio_actual} - CENTRO"]
+
+    summary_data = []
+    for vereda in todas_las_veredas:
+        total_casos = int(casos_ver.get(vereda, 0))
+        total_epizootias = int(epi_ver.get(vereda, 0))
+        fallecidos = int(fallecidos_ver.get(vereda, 0))
+        letalidad = (fallecidos / total_casos * 100) if total_casos > 0 else 0
+        ultima_fecha = ultima_ver.get(vereda, pd.NaT)
+
+        summary_data.append({
+            "vereda": vereda,
+            "casos": total_casos,
+            "fallecidos": fallecidos,
+            "letalidad": round(letalidad, 1),
+            "epizootias": total_epizootias,
+            "epizootias_positivas": int(positivas_ver.get(vereda, 0)),
+            "epizootias_en_estudio": int(en_estudio_ver.get(vereda, 0)),
+            "ultima_actividad": (
+                ultima_fecha.strftime("%Y-%m-%d") if pd.notna(ultima_fecha) else "Sin actividad"
+            ),
+            "tiene_datos": (total_casos + total_epizootias) > 0
+        })
+
+    return summary_data
+
 def create_vereda_summary_optimized(casos, epizootias, municipio_actual, data_original):
     """Crea resumen de veredas para un municipio específico."""
+    cube, cube_filters = get_cube(data_original)
+    if cube is not None:
+        return create_vereda_summary_from_cube(cube, cube_filters, municipio_actual)
+
     summary_data = []
     
-    def normalize_name(name):
-        return str(name).upper().strip() if pd.notna(name) else ""
-    
-    municipio_norm = normalize_name(municipio_actual)
+    location_index = data_original.get("location_index")
     
     # Obtener las veredas del municipio
     todas_las_veredas = get_all_veredas_for_municipio(municipio_actual, data_original)
     
     for vereda in todas_las_veredas:
-        vereda_norm = normalize_name(vereda)
-        
         # Casos en esta vereda del municipio específico
         casos_vereda = pd.DataFrame()
         if not casos.empty and "vereda" in casos.columns and "municipio" in casos.columns:
-            casos_vereda = casos[
-                (casos["vereda"].apply(normalize_name) == vereda_norm) &
-                (casos["municipio"].apply(normalize_name) == municipio_norm)
-            ]
+            casos_vereda = location_rows(casos, "casos", municipio_actual, vereda, location_index)
         
         # Epizootias en esta vereda del municipio específico
         epi_vereda = pd.DataFrame()
         if not epizootias.empty and "vereda" in epizootias.columns and "municipio" in epizootias.columns:
-            epi_vereda = epizootias[
-                (epizootias["vereda"].apply(normalize_name) == vereda_norm) &
-                (epizootias["municipio"].apply(normalize_name) == municipio_norm)
-            ]
+            epi_vereda = location_rows(epizootias, "epizootias", municipio_actual, vereda, location_index)
         
         # Cálculos
         total_casos = len(casos_vereda)
@@ -406,53 +519,24 @@ def create_vereda_summary_optimized(casos, epizootias, municipio_actual, data_or
     
     return summary_data
 
-def create_single_municipio_summary(casos, epizootias, municipio):
+def create_single_municipio_summary(casos, epizootias, municipio, location_index=None):
     """Crea resumen para un municipio específico."""
-    def normalize_name(name):
-        return str(name).upper().strip() if pd.notna(name) else ""
-    
-    municipio_norm = normalize_name(municipio)
-    
-    # Filtrar por municipio
-    casos_mun = casos[casos["municipio"].apply(normalize_name) == municipio_norm] if not casos.empty and "municipio" in casos.columns else pd.DataFrame()
-    epi_mun = epizootias[epizootias["municipio"].apply(normalize_name) == municipio_norm] if not epizootias.empty and "municipio" in epizootias.columns else pd.DataFrame()
-    
+    casos_mun = location_rows(casos, "casos", municipio, location_index=location_index)
+    epi_mun = location_rows(epizootias, "epizootias", municipio, location_index=location_index)
+
     return {
         "municipio": municipio,
         "casos": len(casos_mun),
         "epizootias": len(epi_mun)
     }
 
-def create_single_vereda_summary(casos, epizootias, vereda, municipio):
+def create_single_vereda_summary(casos, epizootias, vereda, municipio, location_index=None):
     """Crea resumen para una vereda específica."""
-    def normalize_name(name):
-        return str(name).upper().strip() if pd.notna(name) else ""
-    
-    vereda_norm = normalize_name(vereda)
-    municipio_norm = normalize_name(municipio) if municipio else ""
-    
-    # Filtrar por vereda y municipio
-    casos_ver = pd.DataFrame()
-    epi_ver = pd.DataFrame()
-    
-    if not casos.empty and "vereda" in casos.columns:
-        if municipio:
-            casos_ver = casos[
-                (casos["vereda"].apply(normalize_name) == vereda_norm) &
-                (casos["municipio"].apply(normalize_name) == municipio_norm)
-            ]
-        else:
-            casos_ver = casos[casos["vereda"].apply(normalize_name) == vereda_norm]
-    
-    if not epizootias.empty and "vereda" in epizootias.columns:
-        if municipio:
-            epi_ver = epizootias[
-                (epizootias["vereda"].apply(normalize_name) == vereda_norm) &
-                (epizootias["municipio"].apply(normalize_name) == municipio_norm)
-            ]
-        else:
-            epi_ver = epizootias[epizootias["vereda"].apply(normalize_name) == vereda_norm]
-    
+    municipio_key = municipio or None
+
+    casos_ver = location_rows(casos, "casos", municipio_key, vereda, location_index)
+    epi_ver = location_rows(epizootias, "epizootias", municipio_key, vereda, location_index)
+
     return {
         "vereda": vereda,
         "municipio": municipio or "N/A",
@@ -539,22 +623,15 @@ def get_ultima_actividad_vereda(casos_vereda, epi_vereda):
     else:
         return "Sin actividad"
 
-def find_municipio_for_vereda(vereda, municipios_seleccionados, casos, epizootias):
+def find_municipio_for_vereda(
+    vereda, municipios_seleccionados, casos, epizootias, location_index=None
+):
     """Encuentra el municipio al que pertenece una vereda."""
-    def normalize_name(name):
-        return str(name).upper().strip() if pd.notna(name) else ""
-    
-    vereda_norm = normalize_name(vereda)
-    
-    # Buscar en casos
-    if not casos.empty and "vereda" in casos.columns and "municipio" in casos.columns:
-        municipio_encontrado = casos[casos["vereda"].apply(normalize_name) == vereda_norm]
-        if not municipio_encontrado.empty:
-            return municipio_encontrado["municipio"].iloc[0]
-    
-    # Buscar en epizootias
-    if not epizootias.empty and "vereda" in epizootias.columns and "municipio" in epizootias.columns:
-        municipio_encontrado = epizootias[epizootias["vereda"].apply(normalize_name) == vereda_norm]
+    # Buscar en casos y luego en epizootias
+    for df, kind in ((casos, "casos"), (epizootias, "epizootias")):
+        if df.empty or "municipio" not in df.columns or "vereda" not in df.columns:
+            continue
+        municipio_encontrado = location_rows(df, kind, vereda=vereda, location_index=location_index)
         if not municipio_encontrado.empty:
             return municipio_encontrado["municipio"].iloc[0]
     
@@ -704,7 +781,7 @@ def create_vereda_specific_metrics(casos, epizootias, vereda, municipio, colors)
         
         if not casos_vereda.empty:
             if "sexo" in casos_vereda.columns:
-                sexo_dist = casos_vereda["sexo"].value_counts()
+                sexo_dist = casos_vereda["sexo"].value_counts().loc[lambda c: c > 0]
                 info_text.append(f"**Distribución por sexo:** {dict(sexo_dist)}")
             
             if "edad" in casos_vereda.columns and not casos_vereda["edad"].isna().all():
@@ -714,7 +791,7 @@ def create_vereda_specific_metrics(casos, epizootias, vereda, municipio, colors)
                 info_text.append(f"**Edad:** promedio {edad_promedio:.1f} años (rango {edad_min}-{edad_max})")
         
         if not epi_vereda.empty and "descripcion" in epi_vereda.columns:
-            desc_dist = epi_vereda["descripcion"].value_counts()
+            desc_dist = epi_vereda["descripcion"].value_counts().loc[lambda c: c > 0]
             info_text.append(f"**Resultados epizootias:** {dict(desc_dist)}")
         
         for info in info_text:
@@ -821,7 +898,7 @@ def create_summary_export_button(display_df, context, filters):
         use_container_width=True
     )
 
-def show_executive_summary_optimized(casos, epizootias, filters, colors):
+def show_executive_summary_optimized(casos, epizootias, filters, colors, data_filtered=None):
     """Resumen ejecutivo con métricas principales."""
     
     st.markdown(
@@ -851,8 +928,14 @@ def show_executive_summary_optimized(casos, epizootias, filters, colors):
         unsafe_allow_html=True,
     )
 
-    # Calcular métricas
-    metrics = calculate_basic_metrics(casos, epizootias)
+    # Métricas del caché de filtros, o desde el cubo cuando el dataset lo trae
+    cube, cube_filters = get_cube(data_filtered)
+    if data_filtered and data_filtered.get("metrics"):
+        metrics = data_filtered["metrics"]
+    elif cube is not None:
+        metrics = calculate_basic_metrics_from_cube(cube, cube_filters)
+    else:
+        metrics = calculate_basic_metrics(casos, epizootias)
     
     # Mostrar métricas en grid
     col1, col2, col3, col4, col5, col6 = st.columns(6)
@@ -1055,7 +1138,10 @@ def prepare_data_for_display(data, data_type):
     if data.empty:
         return pd.DataFrame()
 
-    data_display = data.copy()
+    # Los códigos de formato de fecha son internos
+    data_display = data.drop(
+        columns=[col for col in data.columns if col.endswith(FORMAT_COLUMN_SUFFIX)]
+    )
     
     if data_type == "casos":
         # Formatear fechas
@@ -1155,7 +1241,7 @@ def create_casos_chart_optimized(casos, colors):
         return
     
     if "municipio" in casos.columns:
-        municipio_counts = casos["municipio"].value_counts().head(10)
+        municipio_counts = casos["municipio"].value_counts().loc[lambda c: c > 0].head(10)
         
         if not municipio_counts.empty:
             fig = px.bar(
@@ -1173,7 +1259,7 @@ def create_epizootias_chart_optimized(epizootias, colors):
         return
     
     if "descripcion" in epizootias.columns:
-        resultado_counts = epizootias["descripcion"].value_counts()
+        resultado_counts = epizootias["descripcion"].value_counts().loc[lambda c: c > 0]
         
         if not resultado_counts.empty:
             fig = px.pie(